@@ -0,0 +1,93 @@
+"""
+Benchmark building the lightweight-charts series data for a long price history.
+
+Usage: python -m benchmarks.bench_chart_payload [--days 2500 11000] [--max-points 4000 1000] [--repeat 5]
+
+Compares the original builder (strftime per row, then to_json/json.loads per series) with
+build_chart_payload, with and without downsampling. Reports build time and the size of the
+JSON the chart component is sent.
+"""
+import argparse
+import json
+import time
+import numpy as np
+import pandas as pd
+from tools.indicators import build_indicator_frame
+from utils.chart_payload import build_chart_payload
+
+
+def synthetic_history(n_days, seed=0):
+    """Random-walk OHLCV history on a business-day calendar, indexed like yfinance output."""
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range(end="2024-06-28", periods=n_days, name="Date").tz_localize("America/New_York")
+    close = 100 * np.exp(np.cumsum(rng.normal(0.0003, 0.02, n_days)))
+    spread = np.abs(rng.normal(0, 0.01, n_days))
+    return pd.DataFrame({
+        "Open": close * (1 + rng.normal(0, 0.005, n_days)),
+        "High": close * (1 + spread),
+        "Low": close * (1 - spread),
+        "Close": close,
+        "Volume": rng.integers(1_000_000, 50_000_000, n_days),
+    }, index=dates)
+
+
+def legacy_payload(stock_history, indicators):
+    """The series data as display_stock_charts used to build it."""
+    df = stock_history.reset_index()
+    df['time'] = df['Date'].dt.strftime('%Y-%m-%d')
+    df = df.rename(columns={'Open': 'open', 'High': 'high', 'Low': 'low', 'Close': 'close', 'Volume': 'volume'})
+    df['color'] = np.where(df['open'] > df['close'], 'rgba(239,83,80,0.9)', 'rgba(38,166,154,0.9)')
+    df['MACD'] = indicators['MACD'].to_numpy()
+    df['Signal'] = indicators['Signal'].to_numpy()
+    df['Histogram'] = indicators['Histogram'].to_numpy()
+    records = lambda columns: json.loads(df[columns].to_json(orient="records"))
+    return {
+        "candles": records(['time', 'open', 'high', 'low', 'close', 'color']),
+        "volume": json.loads(df[['time', 'volume']].rename(columns={"volume": "value"}).to_json(orient="records")),
+        "close": json.loads(df[['time', 'close']].rename(columns={"close": "value"}).to_json(orient="records")),
+        "macd": json.loads(df[['time', 'MACD']].rename(columns={"MACD": "value"}).to_json(orient="records")),
+        "signal": json.loads(df[['time', 'Signal']].rename(columns={"Signal": "value"}).to_json(orient="records")),
+        "histogram": json.loads(df[['time', 'Histogram']].rename(columns={"Histogram": "value"}).to_json(orient="records")),
+    }
+
+
+def measure(build, repeat):
+    """Best build time over repeat runs, and the payload of the last one."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        payload = build()
+        best = min(best, time.perf_counter() - start)
+    return best, payload
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--days", type=int, nargs="+", default=[2500, 11000])
+    parser.add_argument("--max-points", type=int, nargs="+", default=[4000, 1000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'bars':>6} {'builder':<20} {'build ms':>9} {'points':>7} {'JSON KB':>8}")
+    for n_days in args.days:
+        history = synthetic_history(n_days)
+        indicators = build_indicator_frame(history)
+
+        legacy_time, legacy = measure(lambda: legacy_payload(history, indicators), args.repeat)
+        new_time, new = measure(lambda: build_chart_payload(history, indicators), args.repeat)
+        # Without downsampling the new builder must produce the same points, up to rounding
+        assert [p["time"] for p in new["candles"]] == [p["time"] for p in legacy["candles"]]
+        np.testing.assert_allclose([p["close"] for p in new["candles"]], [p["close"] for p in legacy["candles"]], atol=1e-4)
+
+        rows = [("to_json round trip", legacy_time, legacy), ("columnar", new_time, new)]
+        for max_points in args.max_points:
+            if max_points < n_days:
+                elapsed, payload = measure(lambda: build_chart_payload(history, indicators, max_points=max_points), args.repeat)
+                rows.append((f"columnar, LTTB {max_points}", elapsed, payload))
+        for label, elapsed, payload in rows:
+            size = len(json.dumps(payload, separators=(",", ":")))
+            print(f"{n_days:>6} {label:<20} {elapsed * 1000:>9.1f} {len(payload['candles']):>7} {size / 1024:>8.0f}")
+
+
+if __name__ == "__main__":
+    main()
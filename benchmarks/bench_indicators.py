@@ -0,0 +1,74 @@
+"""
+Benchmark the vectorized indicator engine against StockHistoryProcessor's per-ticker metrics.
+
+Usage: python -m benchmarks.bench_indicators [--tickers 1 100 1000] [--days 252]
+"""
+import argparse
+import time
+import numpy as np
+import pandas as pd
+from tools.indicators import compute_batch_metrics
+from tools.processor import StockHistoryProcessor
+
+
+def synthetic_histories(n_tickers, n_days, seed=0):
+    """Random-walk OHLCV histories sharing one business-day calendar."""
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range(end="2024-06-28", periods=n_days, name="Date")
+    returns = rng.normal(0.0004, 0.02, size=(n_days, n_tickers))
+    close = 100 * np.exp(np.cumsum(returns, axis=0))
+    spread = np.abs(rng.normal(0, 0.01, size=close.shape))
+    volume = rng.integers(1_000_000, 50_000_000, size=close.shape)
+    histories = {}
+    for i in range(n_tickers):
+        histories[f"T{i:04d}"] = pd.DataFrame({
+            "Open": close[:, i],
+            "High": close[:, i] * (1 + spread[:, i]),
+            "Low": close[:, i] * (1 - spread[:, i]),
+            "Close": close[:, i],
+            "Volume": volume[:, i],
+        }, index=dates)
+    return histories
+
+
+def per_ticker(histories):
+    results = {}
+    for ticker, df in histories.items():
+        processor = StockHistoryProcessor()
+        processor.df = df.copy()
+        processor.calculate_key_metrics()
+        results[ticker] = dict(processor.get_metrics_dict())
+    return pd.DataFrame.from_dict(results, orient="index")
+
+
+def batched(histories):
+    tickers = list(histories)
+    stack = lambda column: np.column_stack([histories[t][column].to_numpy() for t in tickers])
+    return compute_batch_metrics(stack("Close"), stack("High"), stack("Low"), stack("Volume"), tickers=tickers)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tickers", type=int, nargs="+", default=[1, 100, 1000])
+    parser.add_argument("--days", type=int, default=252)
+    args = parser.parse_args()
+
+    for n in args.tickers:
+        histories = synthetic_histories(n, args.days)
+
+        start = time.perf_counter()
+        expected = per_ticker(histories)
+        loop_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        actual = batched(histories)
+        batch_time = time.perf_counter() - start
+
+        actual = actual[expected.columns]
+        np.testing.assert_allclose(actual.to_numpy(), expected.to_numpy().astype(float), rtol=1e-8, equal_nan=True)
+        print(f"{n:>5} tickers: per-ticker {loop_time * 1000:9.1f} ms | batch {batch_time * 1000:7.1f} ms "
+              f"| speedup {loop_time / batch_time:6.1f}x | max rel diff ok")
+
+
+if __name__ == "__main__":
+    main()
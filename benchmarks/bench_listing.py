@@ -0,0 +1,101 @@
+"""
+Benchmark fetching and parsing the Yahoo news listing page, against saved HTML fixtures.
+
+Usage: python -m benchmarks.bench_listing [--rounds 5] [--latency 0.05]
+
+Parsing: the original full BeautifulSoup tree with html.parser, a SoupStrainer limited to the
+stream items, and parse_listing's lxml XPath. All must find the same articles.
+
+Fetch + parse per ticker, from a local server serving benchmarks/fixtures/yahoo_news_*.html with
+--latency per request: a bare requests.get per page (the original get_news) against NewsScraper's
+pooled session, which revalidates pages it has seen with ETag/If-None-Match and gets 304s back.
+"""
+import argparse
+import glob
+import os
+import re
+import time
+import requests
+from bs4 import BeautifulSoup, SoupStrainer
+from tools.news_scraper import NewsScraper, parse_listing
+from .stub_server import FIXTURES_DIR, ListingHandler, StubServer
+
+HEADERS = {"User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"}
+
+
+def soup_listing(soup, limit=8):
+    """The original get_news extraction loop."""
+    news_data = {}
+    for item in soup.find_all('li', class_='stream-item'):
+        if len(news_data) >= limit:
+            break
+        element = item.find('a', class_='subtle-link')
+        if element:
+            news_data[element['title']] = element['href']
+    return news_data
+
+
+def legacy_get_news(url):
+    """The original get_news: a new connection, no timeout, and a full html.parser tree per page."""
+    response = requests.get(url, headers=HEADERS)
+    response.raise_for_status()
+    return soup_listing(BeautifulSoup(response.text, 'html.parser'))
+
+
+def best_time(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rounds", type=int, default=5, help="Times each ticker's listing is fetched")
+    parser.add_argument("--latency", type=float, default=0.05, help="Injected server latency per request (seconds)")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    fixtures = sorted(glob.glob(os.path.join(FIXTURES_DIR, "yahoo_news_*.html")))
+    tickers = [os.path.basename(path)[len("yahoo_news_"):-len(".html")].upper() for path in fixtures]
+
+    print(f"{'fixture':<24} {'KB':>5} {'html.parser':>12} {'SoupStrainer':>13} {'lxml XPath':>11}")
+    for path in fixtures:
+        with open(path, encoding="utf-8") as f:
+            html = f.read()
+        full_time, expected = best_time(lambda: soup_listing(BeautifulSoup(html, 'html.parser')), args.repeat)
+        # Matched against the raw class attribute while parsing, so test for the word
+        strainer = SoupStrainer('li', class_=re.compile(r'(^|\s)stream-item(\s|$)'))
+        strained_time, strained = best_time(lambda: soup_listing(BeautifulSoup(html, 'html.parser', parse_only=strainer)), args.repeat)
+        lxml_time, parsed = best_time(lambda: parse_listing(html), args.repeat)
+        assert strained == expected and parsed == expected, "extraction paths disagree"
+        print(f"{os.path.basename(path):<24} {len(html) // 1024:>5} {full_time * 1000:>9.1f} ms {strained_time * 1000:>10.1f} ms {lxml_time * 1000:>8.1f} ms")
+
+    with StubServer(ListingHandler) as server:
+        template = server.url + "/quote/{ticker}/news/?delay=" + str(args.latency)
+
+        ListingHandler.bytes_sent = 0
+        start = time.perf_counter()
+        for _ in range(args.rounds):
+            for ticker in tickers:
+                legacy_get_news(template.format(ticker=ticker))
+        legacy_time, legacy_bytes = time.perf_counter() - start, ListingHandler.bytes_sent
+
+        ListingHandler.bytes_sent = 0
+        scraper = NewsScraper(session=requests.Session(), listing_url=template)
+        start = time.perf_counter()
+        for _ in range(args.rounds):
+            for ticker in tickers:
+                scraper.get_news(ticker)
+        pooled_time, pooled_bytes = time.perf_counter() - start, ListingHandler.bytes_sent
+
+    fetches = args.rounds * len(tickers)
+    print(f"\nfetch + parse, {len(tickers)} tickers x {args.rounds} rounds, {args.latency * 1000:.0f} ms server latency")
+    print(f"{'requests.get + html.parser':<32} {legacy_time / fetches * 1000:>7.1f} ms/ticker {legacy_bytes / 1024:>8.0f} KB sent")
+    print(f"{'pooled conditional + lxml':<32} {pooled_time / fetches * 1000:>7.1f} ms/ticker {pooled_bytes / 1024:>8.0f} KB sent")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+Measure import time of tools.processor and the cost of getting an LLM client.
+
+Usage: python -m benchmarks.bench_llm_client [--live]
+
+--live also times a first and second tiny completion through the shared client
+(requires GROQ_API_KEY); the second call reuses the kept-alive connection.
+"""
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+IMPORT_SNIPPET = """
+import time
+start = time.perf_counter()
+import tools.processor
+print(time.perf_counter() - start)
+"""
+
+
+def time_import(runs):
+    """Import tools.processor in fresh interpreters so nothing is cached in sys.modules."""
+    timings = []
+    for _ in range(runs):
+        output = subprocess.run(
+            [sys.executable, "-c", IMPORT_SNIPPET], cwd=PROJECT_ROOT, capture_output=True, text=True, check=True
+        ).stdout
+        timings.append(float(output.strip().splitlines()[-1]))
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--live", action="store_true", help="Also time real completions (needs GROQ_API_KEY)")
+    args = parser.parse_args()
+
+    timings = sorted(time_import(args.runs))
+    print(f"import tools.processor: median {timings[len(timings) // 2] * 1000:.1f} ms over {args.runs} runs")
+
+    from tools.llm import get_client
+
+    start = time.perf_counter()
+    client = get_client()
+    print(f"first get_client():  {(time.perf_counter() - start) * 1000:.1f} ms (builds client and connection pool)")
+    start = time.perf_counter()
+    get_client()
+    print(f"second get_client(): {(time.perf_counter() - start) * 1000:.3f} ms (shared instance)")
+
+    if args.live:
+        for label in ("first", "second"):
+            start = time.perf_counter()
+            client.chat.completions.create(
+                messages=[{"role": "user", "content": "Reply with OK."}],
+                model="llama-3.1-8b-instant",
+                max_tokens=2,
+            )
+            print(f"{label} completion: {(time.perf_counter() - start) * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
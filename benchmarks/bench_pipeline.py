@@ -0,0 +1,141 @@
+"""
+End-to-end latency of the Analyze pipeline, replayed from a cassette (see benchmarks/replay.py).
+
+Usage: python -m benchmarks.bench_pipeline [--cassette path] [--tickers AAPL ...] [--runs 5]
+                                           [--latency-scale 1.0] [--latency llm=0.5] [--mode fast] [--warm]
+
+Without --cassette a synthetic one is built in memory for DEMO and answered by the stub LLM
+backend, so the benchmark runs offline with no setup. Each run analyzes every ticker the way the
+dashboard does (stock information, price history with rating, news) and reports per-stage wall
+time and per-source call counts and latencies as p50/p95 over the runs, plus the traced spans
+(tools.tracing) with the most time. History, sentiment and
+article caches start empty on every run unless --warm is given.
+"""
+import argparse
+import contextlib
+import os
+import shutil
+import tempfile
+import time
+from collections import defaultdict
+
+STAGES = ("info", "history", "news", "total")
+
+
+def percentile(values, q):
+    import numpy as np
+
+    return float(np.percentile(values, q)) if values else float("nan")
+
+
+def parse_latency(values):
+    latency = {}
+    for value in values or []:
+        source, _, seconds = value.partition("=")
+        latency[source] = float(seconds)
+    return latency
+
+
+def run_once(tickers, mode, rating):
+    from tools import pipeline
+
+    timings = defaultdict(float)
+    start = time.perf_counter()
+    for ticker in tickers:
+        stage_start = time.perf_counter()
+        pipeline.get_stock_info(ticker)
+        timings["info"] += time.perf_counter() - stage_start
+
+        stage_start = time.perf_counter()
+        pipeline.get_history_analysis(ticker, rating=rating)
+        timings["history"] += time.perf_counter() - stage_start
+
+        stage_start = time.perf_counter()
+        pipeline.get_news_analysis(ticker, mode=mode)
+        timings["news"] += time.perf_counter() - stage_start
+    timings["total"] = time.perf_counter() - start
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--cassette", help="Cassette recorded with python -m benchmarks.replay (synthetic if omitted)")
+    parser.add_argument("--tickers", nargs="+", help="Tickers to analyze (all in the cassette if omitted)")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--latency-scale", type=float, default=1.0, help="Factor on recorded latencies (0 = no waiting)")
+    parser.add_argument("--latency", action="append", metavar="SOURCE=SECONDS",
+                        help="Fixed latency for a source (yfinance, listing, article, llm); repeatable")
+    parser.add_argument("--mode", choices=["ensemble", "fast", "batch"], default="ensemble", help="Per-article news analysis mode")
+    parser.add_argument("--no-rating", action="store_true", help="Skip the LLM rating of the price history")
+    parser.add_argument("--warm", action="store_true", help="Keep history, fundamentals, sentiment and article caches between runs")
+    args = parser.parse_args()
+
+    # The stores read their locations when tools is first imported, so point them at a scratch directory first
+    scratch = tempfile.mkdtemp(prefix="bench_pipeline_")
+    os.environ["HISTORY_STORE_DIR"] = os.path.join(scratch, "history")
+    os.environ["FUNDAMENTALS_STORE_DIR"] = os.path.join(scratch, "fundamentals")
+    os.environ["SENTIMENT_CACHE_PATH"] = os.path.join(scratch, "sentiment.sqlite")
+    os.environ["ARTICLE_INDEX_PATH"] = os.path.join(scratch, "articles.sqlite")
+
+    from tools import tracing
+    from tools.llm_backends import StubClient
+    from .replay import Cassette, Recorder, synthesize
+
+    cassette = Cassette.load(args.cassette) if args.cassette else synthesize(["DEMO"])
+    tickers = args.tickers or cassette.symbols()
+    recorder = Recorder(
+        cassette,
+        latency_scale=args.latency_scale,
+        latency=parse_latency(args.latency),
+        llm_fallback=StubClient() if cassette.meta.get("synthetic") else None,
+    )
+
+    stage_times = defaultdict(list)
+    source_calls = defaultdict(list)
+    source_latencies = defaultdict(list)
+    span_totals = defaultdict(lambda: {"count": 0, "seconds": 0.0})
+    try:
+        with recorder, open(os.devnull, "w") as devnull:
+            for run in range(args.runs):
+                if not args.warm:
+                    for directory in (os.environ["HISTORY_STORE_DIR"], os.environ["FUNDAMENTALS_STORE_DIR"]):
+                        shutil.rmtree(directory, ignore_errors=True)
+                    for path in (os.environ["SENTIMENT_CACHE_PATH"], os.environ["ARTICLE_INDEX_PATH"]):
+                        with contextlib.suppress(FileNotFoundError):
+                            os.remove(path)
+                recorder.reset_stats()
+                # The processors print progress; keep it out of the report
+                with contextlib.redirect_stdout(devnull), tracing.start_trace(f"bench run {run}") as trace:
+                    timings = run_once(tickers, args.mode, not args.no_rating)
+                for name, summary in trace.summary().items():
+                    span_totals[name]["count"] += summary["count"]
+                    span_totals[name]["seconds"] += summary["seconds"]
+                for stage in STAGES:
+                    stage_times[stage].append(timings[stage])
+                for source, count in recorder.calls.items():
+                    source_calls[source].append(count)
+                    source_latencies[source].extend(recorder.durations[source])
+    finally:
+        shutil.rmtree(scratch, ignore_errors=True)
+
+    cache_state = "warm" if args.warm else "cold"
+    print(f"{len(tickers)} ticker(s), {args.runs} {cache_state} run(s), news mode {args.mode}, latency scale {args.latency_scale}")
+    print(f"\n{'stage':<10} {'p50 s':>8} {'p95 s':>8} {'mean s':>8}")
+    for stage in STAGES:
+        values = stage_times[stage]
+        print(f"{stage:<10} {percentile(values, 50):>8.2f} {percentile(values, 95):>8.2f} {sum(values) / len(values):>8.2f}")
+
+    print(f"\n{'source':<10} {'calls/run':>9} {'p50 ms':>8} {'p95 ms':>8}")
+    for source in sorted(source_calls):
+        calls = source_calls[source]
+        latencies = source_latencies[source]
+        print(f"{source:<10} {sum(calls) / args.runs:>9.1f} {percentile(latencies, 50) * 1000:>8.0f} {percentile(latencies, 95) * 1000:>8.0f}")
+
+    # Spans nest and overlap across threads, so their times add up to more than the wall time
+    print(f"\n{'span':<28} {'calls/run':>9} {'s/run':>8}")
+    for name, total in sorted(span_totals.items(), key=lambda item: -item[1]["seconds"])[:12]:
+        print(f"{name:<28} {total['count'] / args.runs:>9.1f} {total['seconds'] / args.runs:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
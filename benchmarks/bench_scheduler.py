@@ -0,0 +1,103 @@
+"""
+Exercise the LLM scheduler against a local fake Groq API that enforces its own rate limit.
+
+Usage: python -m benchmarks.bench_scheduler [--interactive 5] [--batch 20] [--provider-rpm 20] [--rpm 20] [--window 60]
+
+The fake API (benchmarks/stub_server.py) answers 429 with Retry-After and Groq's error body once more
+than --provider-rpm requests arrive in a sliding --window seconds. A real groq.Groq client is pointed at
+it, so the SDK's error types, its Retry-After handling and its own retries are all exercised. Runs the
+same mixed workload (a burst of batch requests, then interactive ones) with plain concurrent calls
+relying on the SDK's retries, and through LLMScheduler with the SDK's retries off, as tools.llm sets it
+up, and limits set to --rpm. Reports 429s, retries, failures, wall time, and how long interactive
+requests waited behind the batch backlog.
+"""
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor
+import httpx
+from groq import Groq
+from tools.llm_scheduler import BATCH, INTERACTIVE, LLMScheduler, ScheduledClient
+from .stub_server import StubServer, rate_limited_llm_handler
+
+MODEL = "llama-3.1-8b-instant"
+
+
+def groq_client(base_url, max_retries):
+    """A Groq SDK client talking to the fake API."""
+    http_client = httpx.Client(limits=httpx.Limits(max_connections=50, max_keepalive_connections=20), timeout=120)
+    return Groq(api_key="stub", base_url=base_url, http_client=http_client, max_retries=max_retries)
+
+
+def workload(create, interactive, batch):
+    """Send batch requests, then interactive ones shortly after; return per-request latencies by kind."""
+    latencies = {"interactive": [], "batch": []}
+    errors = []
+
+    def send(kind):
+        start = time.perf_counter()
+        try:
+            create[kind](messages=[{"role": "user", "content": "x" * 200}], model=MODEL, max_tokens=50)
+        except Exception as e:
+            errors.append(e)
+            return
+        latencies[kind].append(time.perf_counter() - start)
+
+    with ThreadPoolExecutor(max_workers=interactive + batch) as executor:
+        for _ in range(batch):
+            executor.submit(send, "batch")
+        time.sleep(0.05)
+        for _ in range(interactive):
+            executor.submit(send, "interactive")
+    return latencies, errors
+
+
+def report(label, latencies, errors, wall, extra=""):
+    print(f"\n== {label} ==")
+    print(f"wall time {wall:.2f}s, failed requests {len(errors)}{extra}")
+    for kind, values in latencies.items():
+        if values:
+            values = sorted(values)
+            print(f"{kind:<12} n={len(values):<4} p50 {values[len(values) // 2]:.2f}s  max {values[-1]:.2f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--interactive", type=int, default=5)
+    parser.add_argument("--batch", type=int, default=20)
+    parser.add_argument("--provider-rpm", type=int, default=20, help="Requests per window the fake API allows")
+    parser.add_argument("--rpm", type=int, default=20, help="Requests per window the scheduler is configured with")
+    parser.add_argument("--window", type=float, default=60, help="Rate limit window in seconds; shorten it for a quicker run")
+    parser.add_argument("--workers", type=int, default=8)
+    args = parser.parse_args()
+
+    handler = rate_limited_llm_handler(args.provider_rpm, args.window)
+    with StubServer(handler) as server:
+        # The SDK's default: up to 2 retries, waiting Retry-After when the server sends one
+        client = groq_client(server.url, max_retries=2)
+        create = {"interactive": client.chat.completions.create, "batch": client.chat.completions.create}
+        start = time.perf_counter()
+        latencies, errors = workload(create, args.interactive, args.batch)
+        report("unscheduled, SDK retries", latencies, errors, time.perf_counter() - start,
+               f", 429s {handler.rejected}" + (f", last error {type(errors[-1]).__name__}" if errors else ""))
+
+    handler = rate_limited_llm_handler(args.provider_rpm, args.window)
+    with StubServer(handler) as server:
+        client = groq_client(server.url, max_retries=0)
+        # Limits are per minute; scale --rpm per window to that
+        per_minute = args.rpm * 60 / args.window
+        scheduler = LLMScheduler(limits={MODEL: (per_minute, 10 ** 9)}, workers=args.workers, base_delay=0.1, max_delay=2)
+        # A small burst capacity, so the bucket smooths requests out instead of letting a full minute's worth through
+        requests_bucket, _ = scheduler._buckets_for(MODEL)
+        requests_bucket.capacity = requests_bucket.tokens = max(1, per_minute / 60)
+        create = {
+            "interactive": ScheduledClient(client, scheduler, INTERACTIVE).create,
+            "batch": ScheduledClient(client, scheduler, BATCH).create,
+        }
+        start = time.perf_counter()
+        latencies, errors = workload(create, args.interactive, args.batch)
+        stats = scheduler.stats
+        report("scheduled, SDK retries off", latencies, errors, time.perf_counter() - start,
+               f", 429s {handler.rejected}, retries {stats['retries']}, throttled {stats['throttled_seconds']:.1f}s")
+
+if __name__ == "__main__":
+    main()
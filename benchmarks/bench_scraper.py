@@ -0,0 +1,106 @@
+"""
+Benchmark NewsScraper.collect_news_data against a local stub server.
+
+Usage: python -m benchmarks.bench_scraper [--runs 4] [--new-per-run 1]
+
+First the original serial loop against parallel downloads. Then a sliding news window, where each
+run's listing has --new-per-run new articles and drops the oldest ones, scraped with and without
+the seen-article index.
+"""
+import argparse
+import os
+import tempfile
+import time
+from newspaper import Article
+from tools.article_index import ArticleIndex
+from tools.news_scraper import NewsScraper
+from .stub_server import StubServer
+
+
+def serial_collect(news_data, timeout):
+    """The original one-by-one download loop, kept here as the baseline."""
+    articles = {}
+    for key, value in news_data.items():
+        try:
+            article = Article(value, request_timeout=timeout)
+            article.download()
+            article.parse()
+            articles[key, value] = article.text
+        except Exception as e:
+            print(f"Error processing article: {e}")
+    return articles
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--articles", type=int, default=8)
+    parser.add_argument("--latency", type=float, default=0.5, help="Injected latency per article (seconds)")
+    parser.add_argument("--straggler", type=float, default=6.0, help="Latency of one slow publisher (seconds)")
+    parser.add_argument("--timeout", type=float, default=7)
+    parser.add_argument("--deadline", type=float, default=3)
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--runs", type=int, default=4, help="Runs of the sliding news window")
+    parser.add_argument("--new-per-run", type=int, default=1, help="New articles in the listing per run")
+    args = parser.parse_args()
+
+    with StubServer() as server:
+        news_data = {}
+        for n in range(args.articles):
+            delay = args.straggler if n == 0 else args.latency
+            news_data[f"Article {n}"] = f"{server.url}/article/{n}?delay={delay}"
+
+        start = time.perf_counter()
+        serial = serial_collect(news_data, args.timeout)
+        serial_time = time.perf_counter() - start
+
+        scraper = NewsScraper(max_workers=args.workers, article_timeout=args.timeout, deadline=args.deadline, use_index=False)
+        start = time.perf_counter()
+        first = None
+        parallel = {}
+        for key, text in scraper.iter_news_data(news_data):
+            if first is None:
+                first = time.perf_counter() - start
+            parallel[key] = text
+        parallel_time = time.perf_counter() - start
+
+    print(f"serial:   {len(serial)}/{args.articles} articles in {serial_time:.2f}s")
+    print(f"parallel: {len(parallel)}/{args.articles} articles in {parallel_time:.2f}s "
+          f"(first after {first or 0:.2f}s, deadline {args.deadline}s)")
+
+    sliding_window(args)
+
+
+def sliding_window(args):
+    """Scrape a listing that gains new_per_run articles per run, with and without the index."""
+    with StubServer() as server, tempfile.TemporaryDirectory() as scratch:
+        def window(run):
+            first = run * args.new_per_run
+            return {f"Article {n}": f"{server.url}/article/{n}?delay={args.latency}" for n in range(first, first + args.articles)}
+
+        print(f"\nsliding window of {args.articles} articles, {args.new_per_run} new per run, {args.latency}s per download")
+        index = ArticleIndex(os.path.join(scratch, "articles.sqlite"))
+        for label, scraper in (
+            ("no index", NewsScraper(max_workers=args.workers, article_timeout=args.timeout, use_index=False)),
+            ("index", NewsScraper(max_workers=args.workers, article_timeout=args.timeout, index=index)),
+        ):
+            downloads = 0
+            fetch = scraper.fetch_article_html
+
+            def counting_fetch(url):
+                nonlocal downloads
+                downloads += 1
+                return fetch(url)
+
+            scraper.fetch_article_html = counting_fetch
+            times = []
+            for run in range(args.runs):
+                start = time.perf_counter()
+                collected = scraper.collect_news_data(window(run))
+                times.append(time.perf_counter() - start)
+            steady = times[1:] or times
+            print(f"{label:<9} {downloads:>3} downloads over {args.runs} runs, first run {times[0]:.2f}s, "
+                  f"later runs {sum(steady) / len(steady):.2f}s avg, {len(collected)} articles in the last")
+
+
+if __name__ == "__main__":
+    main()
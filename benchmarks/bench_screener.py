@@ -0,0 +1,182 @@
+"""
+Benchmark the cross-sectional screener on a synthetic universe.
+
+Usage: python -m benchmarks.bench_screener [--tickers 5000] [--repeat 5] [--loop-sample 200] [--store-tickers 5000]
+
+Times computing the history metrics of the universe in one compute_batch_metrics pass against
+StockHistoryProcessor.preprocess one ticker at a time (on a sample, extrapolated). Then it times
+each screen over the prebuilt universe table with tools.screener.screen, and the same screen as a
+per-ticker Python loop over row dictionaries. Finally it times loading the saved table, and
+building it from the fundamentals and history stores (what `screen --rebuild` does) for
+--store-tickers tickers written to a scratch directory.
+"""
+import argparse
+import contextlib
+import os
+import shutil
+import tempfile
+import time
+import numpy as np
+import pandas as pd
+from tools.fundamentals_store import FundamentalsStore
+from tools.history_store import HistoryStore
+from tools.indicators import TRADING_DAYS, compute_batch_metrics
+from tools.processor import StockHistoryProcessor
+from tools.screener import build_universe, load_universe, parse_screen, save_universe, screen
+
+SCREENS = [
+    "RSI < 30 and pe_ratio < 15 order by sharpe_ratio",
+    "sector == 'Technology' and debt_to_equity < 50 and max_drawdown > -20 order by annualized_return limit 25",
+    "pe_ratio > 0 and (return_on_equity > 0.15 or profit_margins > 0.2) order by pe_ratio asc, market_cap desc",
+    "order by volatility asc limit 100",
+]
+SECTORS = ["Technology", "Healthcare", "Financial Services", "Energy", "Industrials", "Utilities", "Consumer Cyclical"]
+
+
+def synthetic_histories(n_tickers, bars, seed=0):
+    """Random-walk close, high, low and volume matrices of shape bars x tickers."""
+    rng = np.random.default_rng(seed)
+    close = 50 * np.exp(np.cumsum(rng.normal(0.0003, 0.02, (bars, n_tickers)), axis=0))
+    spread = np.abs(rng.normal(0, 0.01, (bars, n_tickers)))
+    volume = rng.integers(100_000, 20_000_000, (bars, n_tickers)).astype(np.float64)
+    return close, close * (1 + spread), close * (1 - spread), volume
+
+
+def synthetic_info(tickers, close, seed=0):
+    """yfinance-style info dicts with the fields StockInfoProcessor extracts."""
+    rng = np.random.default_rng(seed + 1)
+    infos = {}
+    for i, ticker in enumerate(tickers):
+        infos[ticker] = {
+            "symbol": ticker,
+            "longName": f"{ticker} Corp",
+            "sector": SECTORS[i % len(SECTORS)],
+            "currentPrice": float(close[-1, i]),
+            "marketCap": int(rng.integers(10**8, 10**12)),
+            "trailingPE": float(rng.uniform(-20, 80)),
+            "debtToEquity": float(rng.uniform(0, 300)),
+            "returnOnEquity": float(rng.normal(0.1, 0.1)),
+            "profitMargins": float(rng.normal(0.1, 0.1)),
+            "recommendationKey": ["buy", "hold", "sell"][i % 3],
+        }
+    return infos
+
+
+def synthetic_universe(n_tickers, seed=0):
+    """The universe table build_universe would produce for n_tickers stored tickers."""
+    tickers = [f"T{i:05d}" for i in range(n_tickers)]
+    close, high, low, volume = synthetic_histories(n_tickers, TRADING_DAYS, seed)
+    metrics = compute_batch_metrics(close, high=high, low=low, volume=volume, tickers=tickers)
+    info = pd.DataFrame.from_dict({
+        ticker: {"company_name": data["longName"], "sector": data["sector"], "recommendation": data["recommendationKey"],
+                 "current_price": data["currentPrice"], "market_cap": float(data["marketCap"]), "pe_ratio": data["trailingPE"],
+                 "debt_to_equity": data["debtToEquity"], "return_on_equity": data["returnOnEquity"],
+                 "profit_margins": data["profitMargins"]}
+        for ticker, data in synthetic_info(tickers, close, seed).items()
+    }, orient="index")
+    table = info.combine_first(metrics)
+    table.index.name = "ticker"
+    return table
+
+
+def loop_screen(rows, expression):
+    """The same screen as a per-ticker loop: evaluate the condition on each row dict, then sort."""
+    query = parse_screen(expression)
+    condition = query["condition"]
+    if condition:
+        code = compile(condition, "<screen>", "eval")
+        matches = []
+        for ticker, row in rows.items():
+            try:
+                if eval(code, {}, row):
+                    matches.append(ticker)
+            except TypeError:
+                pass
+    else:
+        matches = list(rows)
+    for field, ascending in reversed(query["order_by"]):
+        present = [t for t in matches if rows[t][field] == rows[t][field]]
+        missing = [t for t in matches if rows[t][field] != rows[t][field]]
+        matches = sorted(present, key=lambda t: rows[t][field], reverse=not ascending) + missing
+    return matches[:query["limit"]] if query["limit"] else matches
+
+
+def best_of(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tickers", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--loop-sample", type=int, default=200, help="Tickers the per-ticker metrics loop is timed on")
+    parser.add_argument("--store-tickers", type=int, default=5000, help="Universe size for the build-from-stores timing")
+    args = parser.parse_args()
+
+    tickers = [f"T{i:05d}" for i in range(args.tickers)]
+    close, high, low, volume = synthetic_histories(args.tickers, TRADING_DAYS)
+    batch_time, _ = best_of(lambda: compute_batch_metrics(close, high=high, low=low, volume=volume, tickers=tickers), args.repeat)
+    sample = min(args.loop_sample, args.tickers)
+    histories = [
+        pd.DataFrame({"High": high[:, i], "Low": low[:, i], "Close": close[:, i], "Volume": volume[:, i]})
+        for i in range(sample)
+    ]
+    processor = StockHistoryProcessor()
+    # preprocess prints its metrics; keep them out of the report
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        start = time.perf_counter()
+        for history in histories:
+            processor.preprocess(history)
+        loop_time = (time.perf_counter() - start) / sample * args.tickers
+    print(f"History metrics for {args.tickers} tickers: per-ticker preprocess ~{loop_time:.2f}s "
+          f"(extrapolated from {sample}), one batch pass {batch_time * 1000:.1f} ms\n")
+
+    table = synthetic_universe(args.tickers)
+    rows = table.to_dict(orient="index")
+    print(f"{args.tickers} tickers x {table.shape[1]} fields")
+    print(f"{'screen':<60} {'matches':>7} {'loop ms':>8} {'vector ms':>9}")
+    for expression in SCREENS:
+        vector_time, result = best_of(lambda: screen(table, expression), args.repeat)
+        loop_time, matches = best_of(lambda: loop_screen(rows, expression), args.repeat)
+        assert list(result.index) == matches, expression
+        label = expression if len(expression) <= 60 else expression[:57] + "..."
+        print(f"{label:<60} {len(result):>7} {loop_time * 1000:>8.1f} {vector_time * 1000:>9.1f}")
+
+    scratch = tempfile.mkdtemp(prefix="bench_screener_")
+    try:
+        path = os.path.join(scratch, "universe.npz")
+        save_universe(table, path)
+        load_time, loaded = best_of(lambda: load_universe(path), args.repeat)
+        pd.testing.assert_frame_equal(loaded, table, check_dtype=False, check_index_type=False, check_column_type=False)
+        print(f"\nLoad saved universe table ({os.path.getsize(path) / 1024:.0f} KB): {load_time * 1000:.1f} ms")
+
+        # Writing thousands of snapshots takes a while; only the build is timed
+        n = args.store_tickers
+        tickers = [f"T{i:05d}" for i in range(n)]
+        close, high, low, volume = synthetic_histories(n, TRADING_DAYS + 50, seed=1)
+        dates = pd.bdate_range(end="2024-06-28", periods=len(close), name="Date").tz_localize("America/New_York")
+        fundamentals = FundamentalsStore(os.path.join(scratch, "fundamentals"))
+        history_store = HistoryStore(os.path.join(scratch, "history"))
+        for i, (ticker, info) in enumerate(synthetic_info(tickers, close, seed=1).items()):
+            fundamentals.save(ticker, "info", info)
+            history_store.save(ticker, pd.DataFrame(
+                {"Open": close[:, i], "High": high[:, i], "Low": low[:, i], "Close": close[:, i], "Volume": volume[:, i]},
+                index=dates,
+            ))
+        start = time.perf_counter()
+        fundamentals.info_table(tickers)
+        info_time = time.perf_counter() - start
+        build_time, built = best_of(lambda: build_universe(fundamentals=fundamentals, history_store=history_store), 1)
+        print(f"Build universe table from the stores ({len(built)} tickers): {build_time * 1000:.0f} ms, "
+              f"of which reading the info snapshots ~{info_time * 1000:.0f} ms")
+    finally:
+        shutil.rmtree(scratch, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
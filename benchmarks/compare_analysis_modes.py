@@ -0,0 +1,87 @@
+"""
+Compare the ensemble, fast and batch news analysis modes against recorded responses.
+
+Usage: python -m benchmarks.compare_analysis_modes [--fixture path] [--latency-scale 1.0]
+
+Reports model calls, tokens and wall-clock latency per article for each mode (batch mode
+totals are divided evenly over the articles in the batch). Recorded latencies
+are replayed with time.sleep, scaled by --latency-scale (0 to skip the waiting).
+"""
+import argparse
+import json
+import os
+import time
+from tools.news_analyzer import ANALYSIS_MODES, NewsAnalyzer
+from .fake_llm import FakeLLMClient
+
+DEFAULT_FIXTURE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "analysis_modes.json")
+
+
+def run_batch_mode(fixture, latency_scale):
+    """Batch mode analyzes all articles together, so calls, tokens and time are split evenly per article."""
+    client = FakeLLMClient(fixture["responses"]["batch"], latency_scale=latency_scale)
+    analyzer = NewsAnalyzer(use_cache=False, client=client, mode="batch")
+    articles = {(article["title"], article["ticker"]): article["text"] for article in fixture["articles"]}
+    start = time.perf_counter()
+    results = dict(analyzer.iter_analyze_batches(articles, fixture["articles"][0]["ticker"]))
+    elapsed = time.perf_counter() - start
+    n = len(articles)
+    return [{
+        "title": title,
+        "calls": len(client.calls) / n,
+        "prompt_tokens": sum(call["prompt_tokens"] for call in client.calls) / n,
+        "completion_tokens": sum(call["completion_tokens"] for call in client.calls) / n,
+        "latency_ms": elapsed * 1000 / n,
+        "score": (results.get((title, ticker)) or {}).get("Sentiment Score"),
+    } for title, ticker in articles]
+
+
+def run_mode(mode, fixture, latency_scale):
+    if mode == "batch":
+        return run_batch_mode(fixture, latency_scale)
+    client = FakeLLMClient(fixture["responses"][mode], latency_scale=latency_scale)
+    analyzer = NewsAnalyzer(use_cache=False, client=client, mode=mode)
+    rows = []
+    for counter, article in enumerate(fixture["articles"]):
+        calls_before = len(client.calls)
+        start = time.perf_counter()
+        result = analyzer.analyze_news_article(article["text"], article["ticker"], counter)
+        elapsed = time.perf_counter() - start
+        calls = client.calls[calls_before:]
+        rows.append({
+            "title": article["title"],
+            "calls": len(calls),
+            "prompt_tokens": sum(call["prompt_tokens"] for call in calls),
+            "completion_tokens": sum(call["completion_tokens"] for call in calls),
+            "latency_ms": elapsed * 1000,
+            "score": (result or {}).get("Sentiment Score"),
+        })
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--fixture", default=DEFAULT_FIXTURE)
+    parser.add_argument("--latency-scale", type=float, default=1.0)
+    args = parser.parse_args()
+
+    with open(args.fixture) as f:
+        fixture = json.load(f)
+
+    for mode in ANALYSIS_MODES:
+        if mode not in fixture["responses"]:
+            continue
+        rows = run_mode(mode, fixture, args.latency_scale)
+        print(f"\n== {mode} ==")
+        print(f"{'article':<55} {'calls':>5} {'prompt':>7} {'compl.':>7} {'ms':>8} {'score':>6}")
+        for row in rows:
+            print(f"{row['title'][:55]:<55} {row['calls']:>5.1f} {row['prompt_tokens']:>7.0f} {row['completion_tokens']:>7.0f} "
+                  f"{row['latency_ms']:>8.0f} {row['score'] if row['score'] is not None else 'n/a':>6}")
+        n = len(rows)
+        print(f"{'mean per article':<55} {sum(r['calls'] for r in rows) / n:>5.1f} "
+              f"{sum(r['prompt_tokens'] for r in rows) / n:>7.0f} {sum(r['completion_tokens'] for r in rows) / n:>7.0f} "
+              f"{sum(r['latency_ms'] for r in rows) / n:>8.0f}")
+
+
+if __name__ == "__main__":
+    main()
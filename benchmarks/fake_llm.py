@@ -0,0 +1,47 @@
+import threading
+import time
+from collections import defaultdict
+from types import SimpleNamespace
+
+
+class FakeLLMClient:
+    """
+    Stand-in for the Groq client that replays recorded responses.
+
+    responses maps a model id to a list of recorded responses, each a dict with
+    content, prompt_tokens, completion_tokens and latency_ms. Calls to a model cycle through its list
+    in order. Every call is logged in self.calls with its model, token counts and latency.
+    """
+    def __init__(self, responses, latency_scale=1.0):
+        self.responses = responses
+        self.latency_scale = latency_scale
+        self.calls = []
+        self._positions = defaultdict(int)
+        self._lock = threading.Lock()
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def create(self, messages, model, **kwargs):
+        with self._lock:
+            recorded = self.responses[model]
+            response = recorded[self._positions[model] % len(recorded)]
+            self._positions[model] += 1
+            self.calls.append({
+                "model": model,
+                "prompt_tokens": response.get("prompt_tokens", 0),
+                "completion_tokens": response.get("completion_tokens", 0),
+                "latency_ms": response.get("latency_ms", 0),
+            })
+        time.sleep(response.get("latency_ms", 0) / 1000 * self.latency_scale)
+        return SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content=response["content"]))],
+            usage=SimpleNamespace(
+                prompt_tokens=response.get("prompt_tokens", 0),
+                completion_tokens=response.get("completion_tokens", 0),
+                total_tokens=response.get("prompt_tokens", 0) + response.get("completion_tokens", 0),
+            ),
+        )
+
+    def reset(self):
+        with self._lock:
+            self.calls = []
+            self._positions.clear()
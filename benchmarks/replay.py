@@ -0,0 +1,396 @@
+"""
+Record/replay of the network calls the analysis makes, so benchmarks are reproducible offline.
+
+Sources:
+    yfinance - yf.Ticker(...).history(...) and attributes such as info, as used by tools.stock
+    listing  - Yahoo news listing pages (NewsScraper.fetch_listing_html)
+    article  - article pages (NewsScraper.fetch_article_html)
+    llm      - chat completions of the configured LLM backend
+
+In record mode the real calls are made, and their results and latencies are saved to a cassette
+file. In replay mode results come from the cassette after sleeping the recorded latency times
+latency_scale, or a fixed latency per source.
+
+    with Recorder(Cassette.load("aapl.pkl.gz"), latency_scale=0.5) as recorder:
+        pipeline.analyze("AAPL")
+    print(recorder.calls)
+
+Usage: python -m benchmarks.replay record AAPL MSFT --out aapl_msft.pkl.gz [--mode fast]
+       python -m benchmarks.replay synthesize DEMO1 DEMO2 --out demo.pkl.gz
+       python -m benchmarks.replay show aapl_msft.pkl.gz
+
+Cassettes are pickles: only load ones you recorded yourself.
+"""
+import argparse
+import contextlib
+import gzip
+import hashlib
+import json
+import os
+import pickle
+import re
+import sys
+import threading
+import time
+from collections import Counter, defaultdict
+from types import SimpleNamespace
+
+SOURCES = ("yfinance", "listing", "article", "llm")
+REPLAY_BACKEND = "replay"
+NEWS_LISTING_URL = "https://sg.finance.yahoo.com/quote/{ticker}/news/"
+
+
+class ReplayMiss(KeyError):
+    """The call being replayed is not in the cassette."""
+
+
+class Cassette:
+    """Recorded results per source, each entry a dict with value and latency (seconds)."""
+    def __init__(self, entries=None, meta=None):
+        self.entries = entries or {source: {} for source in SOURCES}
+        self.meta = meta or {}
+
+    @classmethod
+    def load(cls, path):
+        with gzip.open(path, "rb") as f:
+            data = pickle.load(f)
+        return cls(data["entries"], data.get("meta"))
+
+    def save(self, path):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with gzip.open(path, "wb") as f:
+            pickle.dump({"entries": self.entries, "meta": self.meta}, f)
+
+    def get(self, source, key):
+        entry = self.entries[source].get(key)
+        if entry is None:
+            raise ReplayMiss(f"{source} call not in cassette: {key}")
+        return entry
+
+    def put(self, source, key, value, latency):
+        self.entries[source][key] = {"value": value, "latency": latency}
+
+    def symbols(self):
+        return sorted({key[0] for key in self.entries["yfinance"]})
+
+
+def llm_key(kwargs):
+    """Key a chat completion by everything that determines its answer."""
+    request = {name: kwargs.get(name) for name in ("model", "messages", "response_format", "stream", "temperature", "max_tokens")}
+    return hashlib.sha256(json.dumps(request, sort_keys=True, default=str).encode()).hexdigest()
+
+
+class _Ticker:
+    """Stands in for yf.Ticker, routing history() and attribute reads through the recorder."""
+    def __init__(self, recorder, symbol, real=None):
+        self._recorder = recorder
+        self._symbol = symbol.upper()
+        self._real = real
+
+    def history(self, **kwargs):
+        return self._recorder.yfinance(self._symbol, "history", kwargs, lambda: self._real.history(**kwargs))
+
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return self._recorder.yfinance(self._symbol, name, {}, lambda: getattr(self._real, name))
+
+
+class _RecordingLLMClient:
+    def __init__(self, recorder, client):
+        self.recorder = recorder
+        self.client = client
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def create(self, **kwargs):
+        def call():
+            response = self.client.chat.completions.create(**kwargs)
+            if kwargs.get("stream"):
+                # Drain the stream so the whole answer (and its full latency) is recorded
+                return {"content": "".join(chunk.choices[0].delta.content or "" for chunk in response), "usage": None}
+            usage = getattr(response, "usage", None)
+            return {
+                "content": response.choices[0].message.content,
+                "usage": (getattr(usage, "prompt_tokens", 0), getattr(usage, "completion_tokens", 0)) if usage else None,
+            }
+        return self.recorder.llm_response(kwargs, self.recorder.record("llm", llm_key(kwargs), call))
+
+
+class _ReplayLLMClient:
+    def __init__(self, recorder, fallback=None):
+        self.recorder = recorder
+        self.fallback = fallback
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def create(self, **kwargs):
+        try:
+            recorded = self.recorder.replay("llm", llm_key(kwargs))
+        except ReplayMiss:
+            if self.fallback is None:
+                raise
+            # Synthetic cassettes have no LLM entries; answer offline with the configured latency
+            self.recorder.replay_latency("llm", self.recorder.cassette.meta.get("llm_latency", 0.0))
+            return self.fallback.create(**kwargs)
+        return self.recorder.llm_response(kwargs, recorded)
+
+
+class Recorder:
+    """
+    Context manager patching the network calls of tools.* to record into or replay from a cassette.
+
+    calls counts the calls per source and durations lists each call's time in seconds
+    (for replay, the injected latency).
+    """
+    def __init__(self, cassette, mode="replay", latency_scale=1.0, latency=None, llm_fallback=None, rebase_dates=True):
+        """
+        :param cassette: Cassette to replay from, or to record into
+        :param mode: "record" or "replay"
+        :param latency_scale: Factor applied to recorded latencies when replaying (0 = no waiting)
+        :param latency: Source -> fixed latency in seconds, used instead of the recorded one
+        :param llm_fallback: LLM client answering prompts missing from the cassette, e.g. a StubClient
+        :param rebase_dates: Shift replayed price history so its last bar is today, keeping
+                             period slices ("1y") the same length whenever the cassette is replayed
+        """
+        if mode not in ("record", "replay"):
+            raise ValueError(f"Unknown recorder mode: {mode}")
+        self.cassette = cassette
+        self.mode = mode
+        self.latency_scale = latency_scale
+        self.latency = dict(latency or {})
+        self.llm_fallback = llm_fallback
+        self.rebase_dates = rebase_dates
+        self.calls = Counter()
+        self.durations = defaultdict(list)
+        self._lock = threading.Lock()
+        self._restore = []
+
+    def _count(self, source, seconds):
+        with self._lock:
+            self.calls[source] += 1
+            self.durations[source].append(seconds)
+
+    def reset_stats(self):
+        with self._lock:
+            self.calls = Counter()
+            self.durations = defaultdict(list)
+
+    def record(self, source, key, fetch):
+        start = time.perf_counter()
+        value = fetch()
+        latency = time.perf_counter() - start
+        with self._lock:
+            self.cassette.put(source, key, value, latency)
+        self._count(source, latency)
+        return value
+
+    def replay_latency(self, source, recorded):
+        latency = self.latency.get(source, recorded * self.latency_scale)
+        if latency > 0:
+            time.sleep(latency)
+        self._count(source, latency)
+
+    def replay(self, source, key):
+        entry = self.cassette.get(source, key)
+        self.replay_latency(source, entry["latency"])
+        return entry["value"]
+
+    def llm_response(self, kwargs, recorded):
+        from tools.llm_backends import make_chunk, make_completion
+
+        if kwargs.get("stream"):
+            return iter([make_chunk(word) for word in re.findall(r"\S+\s*", recorded["content"])])
+        prompt_tokens, completion_tokens = recorded["usage"] or (0, 0)
+        return make_completion(recorded["content"], prompt_tokens, completion_tokens)
+
+    def yfinance(self, symbol, name, kwargs, fetch):
+        key = (symbol, name, tuple(sorted(kwargs.items())))
+        if self.mode == "record":
+            return self.record("yfinance", key, fetch)
+        if name != "history":
+            return self.replay("yfinance", key)
+        try:
+            return self._rebase(self.replay("yfinance", key)).copy()
+        except ReplayMiss:
+            return self._derive_history(symbol, kwargs)
+
+    def _rebase(self, history):
+        if not self.rebase_dates or history.empty:
+            return history
+        import pandas as pd
+
+        today = pd.Timestamp.now(tz=history.index.tz).normalize()
+        shift = (today - history.index[-1].normalize()).days
+        history = history.copy()
+        history.index = history.index + pd.Timedelta(days=shift)
+        return history
+
+    def _derive_history(self, symbol, kwargs):
+        """Answer an incremental or shorter-period history request from the recorded max series."""
+        import pandas as pd
+        from tools.stock import PERIOD_OFFSETS
+
+        for key in (("interval", "1d"), ("period", "max")), (("period", "max"),):
+            if (symbol, "history", key) in self.cassette.entries["yfinance"]:
+                full = self._rebase(self.replay("yfinance", (symbol, "history", key)))
+                break
+        else:
+            raise ReplayMiss(f"yfinance history not in cassette: {symbol} {kwargs}")
+        if full.empty:
+            return full
+        if "start" in kwargs:
+            return full[full.index >= pd.Timestamp(kwargs["start"], tz=full.index.tz)].copy()
+        if kwargs.get("period") in PERIOD_OFFSETS:
+            return full[full.index >= full.index[-1] - PERIOD_OFFSETS[kwargs["period"]]].copy()
+        return full.copy()
+
+    def _patch(self, obj, name, value):
+        self._restore.append((obj, name, getattr(obj, name)))
+        setattr(obj, name, value)
+
+    def __enter__(self):
+        import tools.llm
+        import tools.news_scraper
+        import tools.stock
+
+        recorder = self
+        real_yf = tools.stock.yf
+        scraper = tools.news_scraper.NewsScraper
+        real_listing, real_article = scraper.fetch_listing_html, scraper.fetch_article_html
+
+        if self.mode == "record":
+            ticker = lambda symbol, *args, **kwargs: _Ticker(recorder, symbol, real_yf.Ticker(symbol, *args, **kwargs))
+            listing = lambda self, url: recorder.record("listing", url, lambda: real_listing(self, url))
+            article = lambda self, url: recorder.record("article", url, lambda: real_article(self, url))
+            client = _RecordingLLMClient(recorder, tools.llm.get_client())
+        else:
+            ticker = lambda symbol, *args, **kwargs: _Ticker(recorder, symbol)
+            listing = lambda self, url: recorder.replay("listing", url)
+            article = lambda self, url: recorder.replay("article", url)
+            client = _ReplayLLMClient(recorder, self.llm_fallback)
+
+        self._patch(tools.stock, "yf", SimpleNamespace(Ticker=ticker))
+        self._patch(scraper, "fetch_listing_html", listing)
+        self._patch(scraper, "fetch_article_html", article)
+        tools.llm.register_backend(REPLAY_BACKEND, lambda: client)
+        self._backend = os.environ.get("LLM_BACKEND")
+        os.environ["LLM_BACKEND"] = REPLAY_BACKEND
+        return self
+
+    def __exit__(self, *exc):
+        for obj, name, value in reversed(self._restore):
+            setattr(obj, name, value)
+        self._restore = []
+        if self._backend is None:
+            os.environ.pop("LLM_BACKEND", None)
+        else:
+            os.environ["LLM_BACKEND"] = self._backend
+        return False
+
+
+def synthesize(symbols, articles=8, years=5, seed=0):
+    """
+    Build a cassette with synthetic prices, company info, news listings and article pages.
+
+    LLM answers are not included; replay it with llm_fallback=StubClient(). Latencies are typical
+    values seen against the live services.
+    """
+    import numpy as np
+    import pandas as pd
+
+    rng = np.random.default_rng(seed)
+    cassette = Cassette(meta={"synthetic": True, "llm_latency": 0.6})
+    end = pd.Timestamp.now(tz="America/New_York").normalize()
+    index = pd.bdate_range(end=end.tz_localize(None), periods=252 * years).tz_localize("America/New_York")
+    for number, symbol in enumerate(symbols):
+        symbol = symbol.upper()
+        close = 50 * np.exp(np.cumsum(rng.normal(0.0004, 0.018, len(index))))
+        open_ = close * (1 + rng.normal(0, 0.004, len(index)))
+        history = pd.DataFrame({
+            "Open": open_,
+            "High": np.maximum(open_, close) * (1 + np.abs(rng.normal(0, 0.006, len(index)))),
+            "Low": np.minimum(open_, close) * (1 - np.abs(rng.normal(0, 0.006, len(index)))),
+            "Close": close,
+            "Volume": rng.integers(1_000_000, 20_000_000, len(index)).astype(float),
+            "Dividends": 0.0,
+            "Stock Splits": 0.0,
+        }, index=pd.DatetimeIndex(index, name="Date"))
+        cassette.put("yfinance", (symbol, "history", (("interval", "1d"), ("period", "max"))), history, 0.35)
+        shares = int(rng.uniform(1e8, 5e9))
+        # The fields the dashboard formats as numbers, so a synthetic ticker renders like a real one
+        cassette.put("yfinance", (symbol, "info", ()), {
+            "symbol": symbol, "longName": f"{symbol} Holdings Inc.", "sector": "Technology", "industry": "Software",
+            "website": f"https://{symbol.lower()}.example.com", "fullTimeEmployees": int(rng.integers(500, 200_000)),
+            "longBusinessSummary": f"{symbol} Holdings builds software.",
+            "currentPrice": float(close[-1]), "marketCap": float(close[-1]) * shares,
+            "sharesOutstanding": shares, "floatShares": int(shares * 0.95), "averageVolume": int(rng.integers(1e6, 2e7)),
+            "trailingPE": float(rng.uniform(8, 40)), "forwardPE": float(rng.uniform(8, 35)), "beta": float(rng.uniform(0.5, 1.8)),
+            "dividendYield": float(rng.uniform(0, 0.04)), "revenueGrowth": float(rng.normal(0.08, 0.1)),
+            "earningsGrowth": float(rng.normal(0.1, 0.2)), "returnOnAssets": float(rng.uniform(0, 0.2)),
+            "returnOnEquity": float(rng.uniform(0, 0.4)),
+            "fiftyDayAverage": float(close[-50:].mean()), "twoHundredDayAverage": float(close[-200:].mean()),
+            "fiftyTwoWeekLow": float(close[-252:].min()), "fiftyTwoWeekHigh": float(close[-252:].max()),
+        }, 0.25)
+
+        items = []
+        for i in range(articles):
+            url = f"https://news.example.com/{symbol.lower()}/{i}"
+            title = f"{symbol} story {i}: quarterly results and outlook"
+            items.append(f'<li class="stream-item"><a class="subtle-link" title="{title}" href="{url}">{title}</a></li>')
+            paragraphs = "".join(
+                f"<p>{symbol} reported revenue growth of {rng.uniform(-10, 25):.1f}% in segment {j}, "
+                f"while margins moved {rng.uniform(-3, 3):.1f} points as management reiterated guidance.</p>"
+                for j in range(12 + number % 5)
+            )
+            page = f"<html><head><title>{title}</title></head><body><article><h1>{title}</h1>{paragraphs}</article></body></html>"
+            cassette.put("article", url, page, float(rng.uniform(0.3, 1.2)))
+        listing = f'<html><body><ul>{"".join(items)}</ul></body></html>'
+        cassette.put("listing", NEWS_LISTING_URL.format(ticker=symbol), listing, 0.6)
+    return cassette
+
+
+def record(symbols, out, modes=("ensemble",)):
+    """Run the full pipeline live for each symbol, recording every call into a cassette at out."""
+    from tools import pipeline
+
+    cassette = Cassette(meta={"synthetic": False, "recorded_at": time.time()})
+    with Recorder(cassette, mode="record") as recorder:
+        for symbol in symbols:
+            for mode in modes:
+                with contextlib.redirect_stdout(sys.stderr):
+                    pipeline.analyze(symbol, news_mode=mode)
+    cassette.save(out)
+    return recorder.calls
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    record_parser = subparsers.add_parser("record", help="Record live calls (needs network and GROQ_API_KEY)")
+    record_parser.add_argument("tickers", nargs="+")
+    record_parser.add_argument("--out", required=True)
+    record_parser.add_argument("--mode", action="append", choices=["ensemble", "fast", "batch"], help="News analysis modes to record (repeatable)")
+    synth_parser = subparsers.add_parser("synthesize", help="Write a synthetic cassette")
+    synth_parser.add_argument("tickers", nargs="+")
+    synth_parser.add_argument("--out", required=True)
+    synth_parser.add_argument("--articles", type=int, default=8)
+    show_parser = subparsers.add_parser("show", help="Summarize a cassette")
+    show_parser.add_argument("path")
+    args = parser.parse_args(argv)
+
+    if args.command == "record":
+        calls = record(args.tickers, args.out, tuple(args.mode or ["ensemble"]))
+        print(f"Recorded {dict(calls)} to {args.out}")
+    elif args.command == "synthesize":
+        synthesize(args.tickers, articles=args.articles).save(args.out)
+        print(f"Wrote synthetic cassette for {', '.join(args.tickers)} to {args.out}")
+    else:
+        cassette = Cassette.load(args.path)
+        print(f"symbols: {', '.join(cassette.symbols())}")
+        for source in SOURCES:
+            entries = cassette.entries[source].values()
+            latency = sum(entry["latency"] for entry in entries)
+            print(f"{source:<9} {len(entries):>5} entries, {latency:.2f}s recorded latency")
+
+
+if __name__ == "__main__":
+    main()
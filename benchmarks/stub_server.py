@@ -0,0 +1,191 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+ARTICLE_TEMPLATE = """<html>
+<head><title>{title}</title></head>
+<body>
+<article>
+<h1>{title}</h1>
+{paragraphs}
+</article>
+</body>
+</html>"""
+
+
+def canned_article(n, paragraphs=12):
+    """Build a canned article page that newspaper can extract text from."""
+    title = f"Stub company reports quarter number {n}"
+    body = "\n".join(
+        f"<p>Paragraph {i} of article {n}. Revenue grew while margins held steady, "
+        f"according to analysts who follow the stock closely and expect guidance to improve.</p>"
+        for i in range(paragraphs)
+    )
+    return ARTICLE_TEMPLATE.format(title=title, paragraphs=body)
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """
+    Serves /article/<n>?delay=<seconds> with a canned article after the given delay.
+    """
+    def do_GET(self):
+        parsed = urlparse(self.path)
+        params = parse_qs(parsed.query)
+        delay = float(params.get("delay", [0])[0])
+        if delay:
+            time.sleep(delay)
+
+        parts = parsed.path.strip("/").split("/")
+        if len(parts) == 2 and parts[0] == "article":
+            body = canned_article(parts[1]).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        else:
+            self.send_error(404)
+
+    def log_message(self, format, *args):
+        pass
+
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+
+class ListingHandler(BaseHTTPRequestHandler):
+    """
+    Serves /quote/<ticker>/news/?delay=<seconds> from fixtures/yahoo_news_<ticker>.html.
+
+    Pages carry an ETag and Last-Modified, and a request sending either one back is answered
+    with 304 Not Modified, like Yahoo's CDN. Bytes sent are counted in the class's bytes_sent.
+    """
+    # Keep-alive, so pooled clients can reuse their connection
+    protocol_version = "HTTP/1.1"
+    bytes_sent = 0
+
+    def do_GET(self):
+        parsed = urlparse(self.path)
+        params = parse_qs(parsed.query)
+        delay = float(params.get("delay", [0])[0])
+        if delay:
+            time.sleep(delay)
+
+        parts = parsed.path.strip("/").split("/")
+        path = os.path.join(FIXTURES_DIR, f"yahoo_news_{parts[1].lower()}.html") if len(parts) == 3 else ""
+        if parts[0] != "quote" or not os.path.exists(path):
+            self.send_error(404)
+            return
+        with open(path, "rb") as f:
+            body = f.read()
+        etag = '"' + hashlib.sha1(body).hexdigest() + '"'
+        last_modified = time.strftime("%a, %d %b %Y %H:%M:%S GMT", time.gmtime(os.path.getmtime(path)))
+        if self.headers.get("If-None-Match") == etag or self.headers.get("If-Modified-Since") == last_modified:
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("ETag", etag)
+        self.send_header("Last-Modified", last_modified)
+        self.end_headers()
+        self.wfile.write(body)
+        type(self).bytes_sent += len(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def rate_limited_llm_handler(rpm, window=60.0, latency_ms=50):
+    """
+    Build a handler serving POST /openai/v1/chat/completions like Groq's API, allowing rpm requests
+    per sliding window of seconds.
+
+    Requests over the limit get a 429 with a Retry-After header and Groq's error body, so a real
+    groq.Groq(base_url=server.url) client raises groq.RateLimitError on them. The returned class
+    counts accepted and rejected requests in its accepted and rejected attributes.
+    """
+    class RateLimitedLLMHandler(BaseHTTPRequestHandler):
+        # Keep-alive, so the SDK's pooled httpx client reuses its connections
+        protocol_version = "HTTP/1.1"
+        accepted = 0
+        rejected = 0
+        _sent = deque()
+        _lock = threading.Lock()
+
+        def do_POST(self):
+            request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+            if urlparse(self.path).path != "/openai/v1/chat/completions":
+                self.send_error(404)
+                return
+            cls = type(self)
+            with cls._lock:
+                now = time.monotonic()
+                while cls._sent and now - cls._sent[0] >= window:
+                    cls._sent.popleft()
+                if len(cls._sent) >= rpm:
+                    cls.rejected += 1
+                    retry_after = window - (now - cls._sent[0])
+                else:
+                    cls.accepted += 1
+                    cls._sent.append(now)
+                    retry_after = None
+            if retry_after is not None:
+                self._send_json(429, {"error": {
+                    "message": f"Rate limit reached for model {request.get('model')}: {rpm} requests per {window:g}s",
+                    "type": "requests", "code": "rate_limit_exceeded",
+                }}, {"Retry-After": f"{retry_after:.2f}"})
+                return
+            time.sleep(latency_ms / 1000)
+            prompt_tokens = sum(len(m.get("content", "")) // 4 for m in request.get("messages", []))
+            self._send_json(200, {
+                "id": f"chatcmpl-stub-{cls.accepted}",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": request.get("model"),
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": "{}"}, "finish_reason": "stop"}],
+                "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": 2, "total_tokens": prompt_tokens + 2},
+            })
+
+        def _send_json(self, status, payload, headers=None):
+            body = json.dumps(payload).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    return RateLimitedLLMHandler
+
+
+class StubServer:
+    """Run a StubHandler-style server on a random local port in a background thread."""
+    def __init__(self, handler=StubHandler):
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+        self.httpd.daemon_threads = True
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address
+        return f"http://{host}:{port}"
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
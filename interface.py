@@ -5,11 +5,466 @@ from plotly.subplots import make_subplots
 import plotly.express as px
 from tools.stock import Stock
 from tools.processor import ProcessorFactory
-from utils.utils import display_stock_charts, get_sentiment_color, calculate_bollinger_bands, color_metric, safe_get, color_sharpe_ratio
+from tools.indicators import build_indicator_frame, CHART_SMA_WINDOWS
+from tools.result_cache import ResultCache, SOURCE_TTLS, force_refresh
+from tools.results_store import ResultsStore
+from tools.llm_scheduler import POLLER_RATE_SHARE
+from tools import tracing
+from utils.chart_payload import CHART_MAX_POINTS
+from utils.utils import display_stock_charts, get_sentiment_color, color_metric, safe_get, color_sharpe_ratio
+import contextlib
 import json
+import os
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+
+# The dashboard shares the API key with the poller, so unless told otherwise it schedules LLM calls
+# against the part of the key's limits the poller leaves (read when the scheduler starts)
+os.environ.setdefault("LLM_RATE_SHARE", str(1 - POLLER_RATE_SHARE))
+
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def get_indicator_frame(ticker, history_range, first_bar, last_bar, _history):
+    """
+    Build the indicator frame once per (ticker, history range) and reuse it across reruns.
+
+    The history DataFrame itself is not hashed; its range and latest bar identify it.
+    """
+    return build_indicator_frame(_history)
+
+def render_news_card(title, url, sentiment_data):
+    """Render one article's sentiment card with its reasons."""
+    sentiment_score = sentiment_data['Sentiment Score']
+    sentiment_color = get_sentiment_color(sentiment_score)
+    st.markdown(f"""
+    <div class="news-card sentiment-border" style="border-left-color: {sentiment_color};">
+        <div class="sentiment-score" style="color: {sentiment_color};">{sentiment_score:.2f}</div>
+        <div class="title-container">
+            <div class="title"><a href="{url}" target="_blank" title="{title}">{title}</a></div>
+        </div>
+    </div>
+    """, unsafe_allow_html=True)
+
+    with st.expander("Show Reasons"):
+        st.write(f"Reason 1: {sentiment_data['Reason 1']}")
+        st.write(f"Reason 2: {sentiment_data['Reason 2']}")
+
+
+@st.cache_resource
+def get_result_cache():
+    """One ResultCache shared by every session, so reruns and other users reuse fresh results."""
+    return ResultCache()
+
+
+@st.cache_resource
+def get_results_store():
+    """The store the background poller (python -m tools poll) writes precomputed results to."""
+    return ResultsStore()
+
+
+def format_age(seconds):
+    if seconds < 90:
+        return f"{seconds:.0f}s"
+    if seconds < 90 * 60:
+        return f"{seconds / 60:.0f} min"
+    return f"{seconds / 3600:.1f} h"
+
+
+@st.cache_resource
+def start_metrics_server(port):
+    """Serve span metrics for Prometheus once per process, however many sessions run."""
+    return tracing.serve_metrics(port)
+
+
+def render_waterfall(trace):
+    """Debug view: one bar per span of the run, positioned at its start offset."""
+    spans = sorted(trace.spans, key=lambda span: span["start"])
+    if not spans:
+        return
+    labels = [f"{i:>3} {span['name']}" for i, span in enumerate(spans)]
+    hover = [
+        f"{span['name']}<br>{span['duration'] * 1000:.0f} ms on {span['thread']}<br>"
+        + "<br>".join(f"{key}: {value}" for key, value in span["attrs"].items())
+        for span in spans
+    ]
+    fig = go.Figure(go.Bar(
+        y=labels,
+        x=[span["duration"] for span in spans],
+        base=[span["start"] for span in spans],
+        orientation="h",
+        hovertext=hover,
+        hoverinfo="text",
+        marker_color=["crimson" if "error" in span["attrs"] else "steelblue" for span in spans],
+    ))
+    fig.update_layout(
+        height=max(300, 18 * len(spans)),
+        xaxis_title="Seconds since Analyze was clicked",
+        yaxis=dict(autorange="reversed"),
+        margin=dict(l=10, r=10, t=30, b=10),
+    )
+    with st.expander(f"Timing waterfall: {len(spans)} spans in {trace.duration:.2f}s", expanded=True):
+        st.plotly_chart(fig, use_container_width=True)
+        summary = pd.DataFrame(trace.summary()).T.sort_values("seconds", ascending=False)
+        st.dataframe(summary)
+
+
+def render_info_tab(data):
+    """Stock & Company Information tab, from StockInfoProcessor output."""
+    st.header("Stock & Company Information")
+
+    st.title(f"{safe_get(data, 'company_name', 'Company')} ({safe_get(data, 'symbol', 'Symbol')}) Dashboard")
+
+    # Company Overview
+    st.header("Company Overview")
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.metric("Current Price", f"${safe_get(data, 'current_price', 0):.2f}")
+    with col2:
+        st.metric("Market Cap", f"${safe_get(data, 'market_cap', 0):,.0f}")
+    with col3:
+        st.metric("Recommendation", safe_get(data, 'recommendation', 'N/A').upper())
+
+    # Stock Performance
+    st.header("Stock Performance")
+    fig = go.Figure()
+    current_price = safe_get(data, 'current_price')
+    if current_price is not None:
+        fig.add_trace(go.Indicator(
+            mode="number+delta",
+            value=current_price,
+            delta={'reference': safe_get(data, '50_day_average'), 'relative': True, 'position': "top"},
+            title={'text': "Current Price vs 50-Day Avg"},
+            domain={'x': [0, 0.5], 'y': [0, 1]}
+        ))
+        fig.add_trace(go.Indicator(
+            mode="number+delta",
+            value=current_price,
+            delta={'reference': safe_get(data, '200_day_average'), 'relative': True, 'position': "top"},
+            title={'text': "Current Price vs 200-Day Avg"},
+            domain={'x': [0.5, 1], 'y': [0, 1]}
+        ))
+        st.plotly_chart(fig, use_container_width=True)
+    else:
+        st.write("Stock performance data not available.")
+
+    # Financial Metrics
+    st.header("Financial Metrics")
+    metrics = [
+        ("P/E Ratio", safe_get(data, 'pe_ratio')),
+        ("Forward P/E", safe_get(data, 'forward_pe')),
+        ("PEG Ratio", safe_get(data, 'peg_ratio')),
+        ("Price to Sales", safe_get(data, 'price_to_sales')),
+        ("Price to Book", safe_get(data, 'price_to_book')),
+        ("Dividend Yield", f"{safe_get(data, 'dividend_yield', 0):.2%}"),
+    ]
+    df_metrics = pd.DataFrame(metrics, columns=["Metric", "Value"])
+    st.dataframe(df_metrics.set_index("Metric"), use_container_width=True)
+
+    # Growth and Returns
+    st.header("Growth and Returns")
+    col1, col2 = st.columns(2)
+    with col1:
+        fig = px.bar(
+            x=["Revenue Growth", "Earnings Growth"],
+            y=[safe_get(data, 'revenue_growth', 0), safe_get(data, 'earnings_growth', 0)],
+            labels={'x': 'Metric', 'y': 'Growth Rate'},
+            title="Growth Rates"
+        )
+        fig.update_traces(text=[f"{safe_get(data, 'revenue_growth', 0):.2%}", f"{safe_get(data, 'earnings_growth', 0):.2%}"], textposition='outside')
+        st.plotly_chart(fig, use_container_width=True)
+    with col2:
+        fig = px.bar(
+            x=["Return on Assets", "Return on Equity"],
+            y=[safe_get(data, 'return_on_assets', 0), safe_get(data, 'return_on_equity', 0)],
+            labels={'x': 'Metric', 'y': 'Return Rate'},
+            title="Return Rates"
+        )
+        fig.update_traces(text=[f"{safe_get(data, 'return_on_assets', 0):.2%}", f"{safe_get(data, 'return_on_equity', 0):.2%}"], textposition='outside')
+        st.plotly_chart(fig, use_container_width=True)
+
+    # Risk Assessment
+    st.header("Risk Assessment")
+    risk_data = {
+        'Risk Type': ['Overall', 'Audit', 'Board', 'Compensation', 'Shareholder Rights'],
+        'Risk Score': [
+            safe_get(data, 'overall_risk', 0),
+            safe_get(data, 'audit_risk', 0),
+            safe_get(data, 'board_risk', 0),
+            safe_get(data, 'compensation_risk', 0),
+            safe_get(data, 'shareholder_rights_risk', 0)
+        ]
+    }
+    df_risk = pd.DataFrame(risk_data)
+    fig = px.bar(df_risk, x='Risk Type', y='Risk Score', title="Risk Assessment")
+    fig.update_traces(marker_color='rgba(58, 71, 80, 0.6)', marker_line_color='rgb(8,48,107)', marker_line_width=1.5)
+    st.plotly_chart(fig, use_container_width=True)
+
+    # Analyst Recommendations
+    st.header("Analyst Recommendations")
+    target_median_price = safe_get(data, 'target_median_price')
+    week_52_low = safe_get(data, '52_week_low')
+    week_52_high = safe_get(data, '52_week_high')
+    current_price = safe_get(data, 'current_price')
+
+    if all([target_median_price, week_52_low, week_52_high, current_price]):
+        fig = go.Figure(go.Indicator(
+            mode="gauge+number",
+            value=target_median_price,
+            domain={'x': [0, 1], 'y': [0, 1]},
+            title={'text': "Median Target Price", 'font': {'size': 24}},
+            gauge={
+                'axis': {'range': [week_52_low, week_52_high], 'tickwidth': 1, 'tickcolor': "darkblue"},
+                'bar': {'color': "darkblue"},
+                'bgcolor': "white",
+                'borderwidth': 2,
+                'bordercolor': "gray",
+                'steps': [
+                    {'range': [week_52_low, current_price], 'color': 'cyan'},
+                    {'range': [current_price, week_52_high], 'color': 'royalblue'}],
+                'threshold': {
+                    'line': {'color': "red", 'width': 4},
+                    'thickness': 0.75,
+                    'value': current_price}}))
+        st.plotly_chart(fig, use_container_width=True)
+    else:
+        st.write("Analyst recommendations data not available.")
+
+    # Additional Information
+    st.header("Additional Information")
+    col1, col2 = st.columns(2)
+    with col1:
+        st.subheader("Company Details")
+        st.write(f"**Industry:** {safe_get(data, 'industry', 'N/A')}")
+        st.write(f"**Sector:** {safe_get(data, 'sector', 'N/A')}")
+        st.write(f"**Employees:** {safe_get(data, 'employees', 'N/A'):,}")
+        website = safe_get(data, 'website', '#')
+        st.write(f"**Website:** [{website}]({website})")
+    with col2:
+        st.subheader("Trading Information")
+        st.write(f"**Beta:** {safe_get(data, 'beta', 'N/A'):.2f}")
+        st.write(f"**Average Volume:** {safe_get(data, 'average_volume', 'N/A'):,}")
+        st.write(f"**Shares Outstanding:** {safe_get(data, 'shares_outstanding', 'N/A'):,}")
+        st.write(f"**Float Shares:** {safe_get(data, 'float_shares', 'N/A'):,}")
+
+
+def render_rating(history_analysis, indicators):
+    """Rating and key indicator cards plus the reasons, under the analyst report."""
+    # Display Rating and Key Indicators in cards
+    col1, col2, col3, col4, col5 = st.columns(5)
+
+    # Custom CSS for cards
+    st.markdown("""
+    <style>
+    .metric-card {
+        border: 1px solid #e0e0e0;
+        border-radius: 5px;
+        padding: 10px;
+        text-align: center;
+        box-shadow: 0 2px 4px rgba(0,0,0,0.1);
+    }
+    .metric-title {
+        font-size: 16px;
+        font-weight: bold;
+        margin-bottom: 5px;
+    }
+    .metric-value {
+        font-size: 20px;
+        font-weight: bold;
+    }
+    </style>
+    """, unsafe_allow_html=True)
+
+    with col1:
+        rating_color = "green" if history_analysis["Rating"] == "Buy" else "red" if history_analysis["Rating"] == "Sell" else "orange"
+        st.markdown(f"""
+        <div class="metric-card">
+            <div class="metric-title">Rating</div>
+            <div class="metric-value" style="color: {rating_color};">{history_analysis['Rating']}</div>
+        </div>
+        """, unsafe_allow_html=True)
+
+    with col2:
+        st.markdown(f"""
+        <div class="metric-card">
+            <div class="metric-title">Latest Price</div>
+            <div class="metric-value">${indicators['latest_price']:.2f}</div>
+        </div>
+        """, unsafe_allow_html=True)
+
+    with col3:
+        annualized_return = indicators['annualized_return']
+        color = color_metric(annualized_return, [0, 10])
+        st.markdown(f"""
+        <div class="metric-card">
+            <div class="metric-title">Annualized Return</div>
+            <div class="metric-value" style="color: {color};">{annualized_return:.2f}%</div>
+        </div>
+        """, unsafe_allow_html=True)
+
+    with col4:
+        sharpe_ratio = indicators['sharpe_ratio']
+        color = color_sharpe_ratio(sharpe_ratio)
+        st.markdown(f"""
+        <div class="metric-card">
+            <div class="metric-title">Sharpe Ratio</div>
+            <div class="metric-value" style="color: {color};">{sharpe_ratio:.2f}</div>
+        </div>
+        """, unsafe_allow_html=True)
+
+    with col5:
+        rsi = indicators['RSI']
+        color = color_metric(rsi, [30, 70])
+        st.markdown(f"""
+        <div class="metric-card">
+            <div class="metric-title">RSI</div>
+            <div class="metric-value" style="color: {color};">{rsi:.2f}</div>
+        </div>
+        """, unsafe_allow_html=True)
+
+    # Display Analysis Reasons
+    st.subheader("Analysis Reasons")
+    for i in range(1, 6):
+        reason_key = f"Reason {i}"
+        if reason_key in history_analysis:
+            st.info(f"{i}. {history_analysis[reason_key]}")
+
+
+def render_history_charts(full_stock_history, full_indicators, timings):
+    """Price charts over the full history."""
+    # Visualizations
+    st.subheader("Charts")
+
+    fig = make_subplots(rows=1, cols=1, shared_xaxes=True)
+
+    # Add Close Price
+    fig.add_trace(go.Scatter(x=full_stock_history.index, y=full_stock_history['Close'], mode='lines', name='Close Price'))
+
+    # Add SMAs
+    for period in CHART_SMA_WINDOWS:
+        fig.add_trace(go.Scatter(x=full_stock_history.index, y=full_indicators[f'SMA_{period}'], mode='lines', name=f'{period}-day SMA'))
+
+    # Add Bollinger Bands
+    fig.add_trace(go.Scatter(x=full_stock_history.index, y=full_indicators['BB_Upper'], mode='lines', name='Upper Bollinger Band', line=dict(dash='dash')))
+    fig.add_trace(go.Scatter(x=full_stock_history.index, y=full_indicators['BB_Lower'], mode='lines', name='Lower Bollinger Band', line=dict(dash='dash')))
+
+    fig.update_layout(
+        title='Stock Price with SMAs and Bollinger Bands',
+        xaxis_title='Date',
+        yaxis_title='Price',
+        legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1)
+    )
+    st.plotly_chart(fig, use_container_width=True)
+
+    # Display additional charts
+    display_stock_charts(full_stock_history, full_indicators, max_points=CHART_MAX_POINTS)
+
+    fetch = timings.get("get_full_history")
+    if fetch:
+        st.caption(f"Price history: {fetch['mode']} fetch in {fetch['seconds']:.2f}s ({fetch['rows_fetched']} bars downloaded)")
+
+
+# Oldest precomputed result each tab shows instead of computing on demand, in seconds; info
+# carries the current price, so it is held to the quote freshness rule
+PRECOMPUTED_MAX_AGE = {"info": SOURCE_TTLS["quote"], "history": 30 * 60, "news": 2 * 60 * 60}
+
+
+def start_flows(ticker, news_mode, executor, result_cache=None, results_store=None):
+    """
+    Start the three tabs' data flows in background threads and return the queue they report to.
+
+    Each flow puts (kind, payload) events on the queue as results become available and ends with
+    (f"{flow}_done", None), or ("error", (flow, exception)) if it fails. Only the script thread
+    renders; the flows never call Streamlit, except for the indicator cache, which is why their
+    threads are given the script's run context.
+
+    Flows submitted inside force_refresh() bypass result_cache lookups, since bind carries the
+    context into their threads.
+
+    With a results_store, a tab whose poller result is younger than PRECOMPUTED_MAX_AGE is filled
+    from it, after a ("precomputed", (flow, computed_at)) event, and computed on demand otherwise.
+    Price charts are always drawn from the local price history, which the poller keeps current.
+    """
+    events = queue.Queue()
+    emit = lambda kind, payload=None: events.put((kind, payload))
+    ctx = get_script_run_ctx()
+
+    def precomputed(flow, part):
+        stored = results_store.get(ticker, part, PRECOMPUTED_MAX_AGE[flow]) if results_store is not None else None
+        if stored is not None:
+            emit("precomputed", (flow, stored[1]))
+            return stored[0]
+        return None
+
+    def run_info():
+        stored = precomputed("info", "info")
+        if stored is not None:
+            emit("info", stored)
+            return
+        stock_info = Stock(ticker, result_cache=result_cache).get_info()
+        emit("info", ProcessorFactory.get_processor("stock_info").process(stock_info))
+
+    def run_history():
+        stock = Stock(ticker, result_cache=result_cache)
+        stored = precomputed("history", "history")
+        if stored is not None and stored["rating"]:
+            emit("report", stored["report"])
+            emit("rating", (stored["rating"], stored["indicators"]))
+        else:
+            stock_history_processor = ProcessorFactory.get_processor("stock_history", result_cache=result_cache)
+            stock_history = stock.get_history()
+            history_indicators = get_indicator_frame(stock.symbol, "1y", stock_history.index[0], stock_history.index[-1], stock_history)
+            indicators = stock_history_processor.preprocess(stock_history, history_indicators)
+            chunks = []
+            for chunk in stock_history_processor.stream_report(indicators):
+                chunks.append(chunk)
+                emit("report", chunk)
+            emit("rating", (json.loads(stock_history_processor.rate("".join(chunks))), indicators))
+        full_stock_history = stock.get_full_history()
+        full_indicators = get_indicator_frame(stock.symbol, "max", full_stock_history.index[0], full_stock_history.index[-1], full_stock_history)
+        emit("charts", (full_stock_history, full_indicators, stock.timings))
+
+    def run_news():
+        stored = precomputed("news", f"news:{news_mode}")
+        if stored is not None:
+            for title, url, sentiment in stored["articles"]:
+                emit("article", ((title, url), sentiment))
+            title_url_sentiment = {(title, url): sentiment for title, url, sentiment in stored["articles"]}
+            emit("conclusion", (stored["conclusion"], title_url_sentiment))
+            emit("news_stats", stored["stats"])
+            return
+        news_processor = ProcessorFactory.get_processor("news", mode=news_mode, result_cache=result_cache)
+        for event, payload in news_processor.iter_process(ticker):
+            emit(event, payload)
+        emit("news_stats", news_processor.last_stats)
+
+    def run(flow, fn):
+        add_script_run_ctx(threading.current_thread(), ctx)
+        try:
+            fn()
+            emit(f"{flow}_done")
+        except Exception as e:
+            emit("error", (flow, e))
+
+    for flow, fn in (("info", run_info), ("history", run_history), ("news", run_news)):
+        executor.submit(tracing.bind(run), flow, fn)
+    return events
+
+
+# Flow each streamed event belongs to; "<flow>_done", "precomputed" and "error" name it themselves
+EVENT_FLOWS = {
+    "info": "info",
+    "report": "history", "rating": "history", "charts": "history",
+    "article": "news", "conclusion": "news", "news_stats": "news",
+}
+
 
 def main():
     st.set_page_config(layout="wide", page_title="Stock Analysis Dashboard")
+    if os.getenv("TRACE_METRICS_PORT"):
+        start_metrics_server(int(os.getenv("TRACE_METRICS_PORT")))
     
     # Custom CSS for improved styling
     st.markdown("""
@@ -71,317 +526,155 @@ def main():
 
     # User input for ticker symbol
     ticker = st.text_input("Enter a stock ticker symbol (e.g., AAPL):", "")
+    news_mode = st.radio(
+        "News analysis mode",
+        ["ensemble", "fast", "batch"],
+        horizontal=True,
+        help="Ensemble: two models analyze each article and a third aggregates. Fast: one JSON call per article. Batch: several articles per call.",
+    )
+    show_trace = st.checkbox("Show timing waterfall", help="Debug view of where the time of each run goes")
+    refresh = st.checkbox(
+        "Force refresh",
+        help="Fetch quotes, history, news and analyses again instead of reusing results that are still fresh "
+             "(quotes for a minute, history for 15 minutes, news and analyses for an hour, fundamentals for a day).",
+    )
+    result_cache = get_result_cache()
 
     if st.button("Analyze", key="analyze_button"):
+        # Seconds from the click until each tab shows its first result
+        run_start = time.perf_counter()
+        first_results = {}
+        trace = tracing.begin_trace(f"analyze {ticker.upper()}")
+
+        # Tabs for different analyses
+        tabs = st.tabs([ "Stock & Company Information", "Stock Price Analysis & Charts", "News Analysis"])
+
+        # Every tab gets its layout up front; the flows fill it in whatever order they finish
+        with tabs[0]:
+            info_status = st.empty()
+            info_status.caption("Processing stock information...")
+            info_age = st.empty()
+            info_container = st.container()
+        with tabs[1]:
+            history_status = st.empty()
+            history_status.caption("Processing stock history...")
+            st.header("Stock Price Analysis & Charts")
+            history_age = st.empty()
+            # Stream the analyst report while it is written, then rate it
+            with st.expander("Analyst Report", expanded=True):
+                report_box = st.empty()
+                report_caption = st.empty()
+            rating_container = st.container()
+            charts_container = st.container()
+        with tabs[2]:
+            st.header("News Analysis")
+            news_status = st.empty()
+            news_status.caption("Processing news...")
+            news_age = st.empty()
+            # Filled in once the conclusion arrives, above the cards that stream in first
+            overall_container = st.container()
+            st.subheader("News Articles")
+            cards_container = st.container()
+        statuses = {"info": info_status, "history": history_status, "news": news_status}
+        ages = {"info": info_age, "history": history_age, "news": news_age}
+        error_containers = {"info": info_container, "history": charts_container, "news": cards_container}
+
+        executor = ThreadPoolExecutor(max_workers=3, thread_name_prefix="dashboard")
         try:
-            # Create Stock object
-            stock = Stock(ticker)
-
-            # Create processors
-            stock_info_processor = ProcessorFactory.get_processor("stock_info")
-            news_processor = ProcessorFactory.get_processor("news")
-            stock_history_processor = ProcessorFactory.get_processor("stock_history")
-
-            # Tabs for different analyses
-            tabs = st.tabs([ "Stock & Company Information", "Stock Price Analysis & Charts", "News Analysis"])
-
-            with tabs[0]:
-                with st.spinner("Processing stock information..."):
-                    st.header("Stock & Company Information")
-                    stock_info = stock.get_info()
-                    data = stock_info_processor.process(stock_info)
-                    
-                    st.title(f"{safe_get(data, 'company_name', 'Company')} ({safe_get(data, 'symbol', 'Symbol')}) Dashboard")
-                    
-                    # Company Overview
-                    st.header("Company Overview")
-                    col1, col2, col3 = st.columns(3)
-                    with col1:
-                        st.metric("Current Price", f"${safe_get(data, 'current_price', 0):.2f}")
-                    with col2:
-                        st.metric("Market Cap", f"${safe_get(data, 'market_cap', 0):,.0f}")
-                    with col3:
-                        st.metric("Recommendation", safe_get(data, 'recommendation', 'N/A').upper())
-
-                    # Stock Performance
-                    st.header("Stock Performance")
-                    fig = go.Figure()
-                    current_price = safe_get(data, 'current_price')
-                    if current_price is not None:
-                        fig.add_trace(go.Indicator(
-                            mode="number+delta",
-                            value=current_price,
-                            delta={'reference': safe_get(data, '50_day_average'), 'relative': True, 'position': "top"},
-                            title={'text': "Current Price vs 50-Day Avg"},
-                            domain={'x': [0, 0.5], 'y': [0, 1]}
-                        ))
-                        fig.add_trace(go.Indicator(
-                            mode="number+delta",
-                            value=current_price,
-                            delta={'reference': safe_get(data, '200_day_average'), 'relative': True, 'position': "top"},
-                            title={'text': "Current Price vs 200-Day Avg"},
-                            domain={'x': [0.5, 1], 'y': [0, 1]}
-                        ))
-                        st.plotly_chart(fig, use_container_width=True)
-                    else:
-                        st.write("Stock performance data not available.")
-
-                    # Financial Metrics
-                    st.header("Financial Metrics")
-                    metrics = [
-                        ("P/E Ratio", safe_get(data, 'pe_ratio')),
-                        ("Forward P/E", safe_get(data, 'forward_pe')),
-                        ("PEG Ratio", safe_get(data, 'peg_ratio')),
-                        ("Price to Sales", safe_get(data, 'price_to_sales')),
-                        ("Price to Book", safe_get(data, 'price_to_book')),
-                        ("Dividend Yield", f"{safe_get(data, 'dividend_yield', 0):.2%}"),
-                    ]
-                    df_metrics = pd.DataFrame(metrics, columns=["Metric", "Value"])
-                    st.dataframe(df_metrics.set_index("Metric"), use_container_width=True)
-
-                    # Growth and Returns
-                    st.header("Growth and Returns")
-                    col1, col2 = st.columns(2)
-                    with col1:
-                        fig = px.bar(
-                            x=["Revenue Growth", "Earnings Growth"],
-                            y=[safe_get(data, 'revenue_growth', 0), safe_get(data, 'earnings_growth', 0)],
-                            labels={'x': 'Metric', 'y': 'Growth Rate'},
-                            title="Growth Rates"
-                        )
-                        fig.update_traces(text=[f"{safe_get(data, 'revenue_growth', 0):.2%}", f"{safe_get(data, 'earnings_growth', 0):.2%}"], textposition='outside')
-                        st.plotly_chart(fig, use_container_width=True)
-                    with col2:
-                        fig = px.bar(
-                            x=["Return on Assets", "Return on Equity"],
-                            y=[safe_get(data, 'return_on_assets', 0), safe_get(data, 'return_on_equity', 0)],
-                            labels={'x': 'Metric', 'y': 'Return Rate'},
-                            title="Return Rates"
-                        )
-                        fig.update_traces(text=[f"{safe_get(data, 'return_on_assets', 0):.2%}", f"{safe_get(data, 'return_on_equity', 0):.2%}"], textposition='outside')
-                        st.plotly_chart(fig, use_container_width=True)
-
-                    # Risk Assessment
-                    st.header("Risk Assessment")
-                    risk_data = {
-                        'Risk Type': ['Overall', 'Audit', 'Board', 'Compensation', 'Shareholder Rights'],
-                        'Risk Score': [
-                            safe_get(data, 'overall_risk', 0),
-                            safe_get(data, 'audit_risk', 0),
-                            safe_get(data, 'board_risk', 0),
-                            safe_get(data, 'compensation_risk', 0),
-                            safe_get(data, 'shareholder_rights_risk', 0)
-                        ]
-                    }
-                    df_risk = pd.DataFrame(risk_data)
-                    fig = px.bar(df_risk, x='Risk Type', y='Risk Score', title="Risk Assessment")
-                    fig.update_traces(marker_color='rgba(58, 71, 80, 0.6)', marker_line_color='rgb(8,48,107)', marker_line_width=1.5)
-                    st.plotly_chart(fig, use_container_width=True)
-
-                    # Analyst Recommendations
-                    st.header("Analyst Recommendations")
-                    target_median_price = safe_get(data, 'target_median_price')
-                    week_52_low = safe_get(data, '52_week_low')
-                    week_52_high = safe_get(data, '52_week_high')
-                    current_price = safe_get(data, 'current_price')
-                    
-                    if all([target_median_price, week_52_low, week_52_high, current_price]):
-                        fig = go.Figure(go.Indicator(
-                            mode="gauge+number",
-                            value=target_median_price,
-                            domain={'x': [0, 1], 'y': [0, 1]},
-                            title={'text': "Median Target Price", 'font': {'size': 24}},
-                            gauge={
-                                'axis': {'range': [week_52_low, week_52_high], 'tickwidth': 1, 'tickcolor': "darkblue"},
-                                'bar': {'color': "darkblue"},
-                                'bgcolor': "white",
-                                'borderwidth': 2,
-                                'bordercolor': "gray",
-                                'steps': [
-                                    {'range': [week_52_low, current_price], 'color': 'cyan'},
-                                    {'range': [current_price, week_52_high], 'color': 'royalblue'}],
-                                'threshold': {
-                                    'line': {'color': "red", 'width': 4},
-                                    'thickness': 0.75,
-                                    'value': current_price}}))
-                        st.plotly_chart(fig, use_container_width=True)
+            with force_refresh() if refresh else contextlib.nullcontext():
+                # Force refresh recomputes everything, so precomputed results are skipped too
+                events = start_flows(ticker, news_mode, executor, result_cache, None if refresh else get_results_store())
+            running = set(statuses)
+            # Flows whose rendering failed; their remaining events are dropped
+            failed = set()
+            report = ""
+            shown = 0
+            news_analysis, news_stats = None, {}
+
+            def show_error(flow, error, stop=True):
+                print(f"{flow} failed: {error!r}")
+                if stop:
+                    failed.add(flow)
+                    statuses[flow].empty()
+                with error_containers[flow]:
+                    if flow == "info":
+                        st.error("Not a valid ticker name. Please enter a valid stock ticker symbol.")
                     else:
-                        st.write("Analyst recommendations data not available.")
-
-                    # Additional Information
-                    st.header("Additional Information")
-                    col1, col2 = st.columns(2)
-                    with col1:
-                        st.subheader("Company Details")
-                        st.write(f"**Industry:** {safe_get(data, 'industry', 'N/A')}")
-                        st.write(f"**Sector:** {safe_get(data, 'sector', 'N/A')}")
-                        st.write(f"**Employees:** {safe_get(data, 'employees', 'N/A'):,}")
-                        website = safe_get(data, 'website', '#')
-                        st.write(f"**Website:** [{website}]({website})")
-                    with col2:
-                        st.subheader("Trading Information")
-                        st.write(f"**Beta:** {safe_get(data, 'beta', 'N/A'):.2f}")
-                        st.write(f"**Average Volume:** {safe_get(data, 'average_volume', 'N/A'):,}")
-                        st.write(f"**Shares Outstanding:** {safe_get(data, 'shares_outstanding', 'N/A'):,}")
-                        st.write(f"**Float Shares:** {safe_get(data, 'float_shares', 'N/A'):,}")
-
-            with tabs[1]:
-                with st.spinner("Processing stock history..."):
-                    stock_history = stock.get_history()
-                    indicators = stock_history_processor.preprocess(stock_history)
-                    history_analysis = json.loads(stock_history_processor.process(indicators))
-                    
-                    st.header("Stock Price Analysis & Charts")
-
-                    # Display Rating and Key Indicators in cards
-                    col1, col2, col3, col4, col5 = st.columns(5)
-                    
-                    # Custom CSS for cards
-                    st.markdown("""
-                    <style>
-                    .metric-card {
-                        border: 1px solid #e0e0e0;
-                        border-radius: 5px;
-                        padding: 10px;
-                        text-align: center;
-                        box-shadow: 0 2px 4px rgba(0,0,0,0.1);
-                    }
-                    .metric-title {
-                        font-size: 16px;
-                        font-weight: bold;
-                        margin-bottom: 5px;
-                    }
-                    .metric-value {
-                        font-size: 20px;
-                        font-weight: bold;
-                    }
-                    </style>
-                    """, unsafe_allow_html=True)
-
-                    with col1:
-                        rating_color = "green" if history_analysis["Rating"] == "Buy" else "red" if history_analysis["Rating"] == "Sell" else "orange"
-                        st.markdown(f"""
-                        <div class="metric-card">
-                            <div class="metric-title">Rating</div>
-                            <div class="metric-value" style="color: {rating_color};">{history_analysis['Rating']}</div>
-                        </div>
-                        """, unsafe_allow_html=True)
-                    
-                    with col2:
-                        st.markdown(f"""
-                        <div class="metric-card">
-                            <div class="metric-title">Latest Price</div>
-                            <div class="metric-value">${indicators['latest_price']:.2f}</div>
-                        </div>
-                        """, unsafe_allow_html=True)
-                    
-                    with col3:
-                        annualized_return = indicators['annualized_return']
-                        color = color_metric(annualized_return, [0, 10])
-                        st.markdown(f"""
-                        <div class="metric-card">
-                            <div class="metric-title">Annualized Return</div>
-                            <div class="metric-value" style="color: {color};">{annualized_return:.2f}%</div>
-                        </div>
-                        """, unsafe_allow_html=True)
-                    
-                    with col4:
-                        sharpe_ratio = indicators['sharpe_ratio']
-                        color = color_sharpe_ratio(sharpe_ratio)
-                        st.markdown(f"""
-                        <div class="metric-card">
-                            <div class="metric-title">Sharpe Ratio</div>
-                            <div class="metric-value" style="color: {color};">{sharpe_ratio:.2f}</div>
-                        </div>
-                        """, unsafe_allow_html=True)
-                    
-                    with col5:
-                        rsi = indicators['RSI']
-                        color = color_metric(rsi, [30, 70])
-                        st.markdown(f"""
-                        <div class="metric-card">
-                            <div class="metric-title">RSI</div>
-                            <div class="metric-value" style="color: {color};">{rsi:.2f}</div>
-                        </div>
-                        """, unsafe_allow_html=True)
-
-                    # Display Analysis Reasons
-                    st.subheader("Analysis Reasons")
-                    for i in range(1, 6):
-                        reason_key = f"Reason {i}"
-                        if reason_key in history_analysis:
-                            st.info(f"{i}. {history_analysis[reason_key]}")
-
-                    # Visualizations
-                    st.subheader("Charts")
-                    full_stock_history = stock.get_full_history()
-                    
-                    fig = make_subplots(rows=1, cols=1, shared_xaxes=True)
-                    
-                    # Add Close Price
-                    fig.add_trace(go.Scatter(x=full_stock_history.index, y=full_stock_history['Close'], mode='lines', name='Close Price'))
-                    
-                    # Add SMAs
-                    for period in [5, 20, 50, 200]:
-                        sma = full_stock_history['Close'].rolling(window=period).mean()
-                        fig.add_trace(go.Scatter(x=full_stock_history.index, y=sma, mode='lines', name=f'{period}-day SMA'))
-                    
-                    # Calculate and add Bollinger Bands
-                    upper_band, lower_band = calculate_bollinger_bands(full_stock_history)
-                    fig.add_trace(go.Scatter(x=full_stock_history.index, y=upper_band, mode='lines', name='Upper Bollinger Band', line=dict(dash='dash')))
-                    fig.add_trace(go.Scatter(x=full_stock_history.index, y=lower_band, mode='lines', name='Lower Bollinger Band', line=dict(dash='dash')))
-                    
-                    fig.update_layout(
-                        title='Stock Price with SMAs and Bollinger Bands',
-                        xaxis_title='Date',
-                        yaxis_title='Price',
-                        legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1)
-                    )
-                    st.plotly_chart(fig, use_container_width=True)
-
-                    # Display additional charts
-                    display_stock_charts(full_stock_history)
-
-            with tabs[2]:
-                st.header("News Analysis")
-                with st.spinner("Processing news..."):
-                    news_analysis, title_url_sentiment = news_processor.process(ticker)
-                    sentiment_score = news_analysis['Sentiment Score']
-                    st.markdown(f"<h3>Overall Sentiment Score: <span style='color: {get_sentiment_color(sentiment_score)};'>{sentiment_score:.2f}</span></h3>", unsafe_allow_html=True)
-                    for i in range(1, 4):
-                        st.info(f"Reason {i}: {news_analysis[f'Reason {i}']}")
-                    
-                    # Display news cards
-                    st.subheader("News Articles")
-                    
-                    # Create a container for news cards
-                    st.markdown('<div class="news-container">', unsafe_allow_html=True)
-                    
-                    # Create rows of 4 cards each
-                    for i in range(0, len(title_url_sentiment), 4):
-                        cols = st.columns(4)
-                        for j, ((title, url), sentiment_data) in enumerate(list(title_url_sentiment.items())[i:i+4]):
-                            with cols[j]:
-                                sentiment_score = sentiment_data['Sentiment Score']
-                                sentiment_color = get_sentiment_color(sentiment_score)
-                                st.markdown(f"""
-                                <div class="news-card sentiment-border" style="border-left-color: {sentiment_color};">
-                                    <div class="sentiment-score" style="color: {sentiment_color};">{sentiment_score:.2f}</div>
-                                    <div class="title-container">
-                                        <div class="title"><a href="{url}" target="_blank" title="{title}">{title}</a></div>
-                                    </div>
-                                </div>
-                                """, unsafe_allow_html=True)
-
-                                
-                                with st.expander("Show Reasons"):
-                                    st.write(f"Reason 1: {sentiment_data['Reason 1']}")
-                                    st.write(f"Reason 2: {sentiment_data['Reason 2']}")
-                    
-                    st.markdown('</div>', unsafe_allow_html=True)
-        except Exception as e:
-            st.error(f"Not a valid ticker name. Please enter a valid stock ticker symbol.")
-            st.stop()
+                        st.error(f"Could not complete the {flow} analysis: {error}")
+
+            while running:
+                kind, payload = events.get()
+                flow = payload[0] if kind in ("precomputed", "error") else EVENT_FLOWS.get(kind, kind[:-len("_done")])
+                if kind == "error" or kind.endswith("_done"):
+                    running.discard(flow)
+                    statuses[flow].empty()
+                if flow in failed:
+                    continue
+                if kind == "error":
+                    show_error(flow, payload[1])
+                    continue
+                # A tab that fails to render shows its error and leaves the other tabs running
+                try:
+                    if kind == "precomputed":
+                        flow, computed_at = payload
+                        ages[flow].caption(f"Precomputed {format_age(time.time() - computed_at)} ago by the background poller. Tick Force refresh to recompute now.")
+                    elif kind == "info":
+                        with info_container:
+                            render_info_tab(payload)
+                    elif kind == "report":
+                        if "history" not in first_results:
+                            first_results["history"] = time.perf_counter() - run_start
+                            report_caption.caption(f"First report token after {first_results['history']:.2f}s")
+                        report += payload
+                        report_box.markdown(report)
+                    elif kind == "rating":
+                        with rating_container:
+                            render_rating(*payload)
+                    elif kind == "charts":
+                        with charts_container:
+                            render_history_charts(*payload)
+                    elif kind == "article":
+                        # Cards are added in rows of 4 as each article's analysis completes
+                        if shown == 0:
+                            first_results["news"] = time.perf_counter() - run_start
+                        with cards_container:
+                            if shown % 4 == 0:
+                                cols = st.columns(4)
+                            (title, url), sentiment_data = payload
+                            with cols[shown % 4]:
+                                render_news_card(title, url, sentiment_data)
+                        shown += 1
+                    elif kind == "conclusion":
+                        news_analysis, title_url_sentiment = payload
+                    elif kind == "news_stats":
+                        news_stats = payload
+                    elif kind == "news_done":
+                        with overall_container:
+                            if not news_analysis:
+                                st.warning("The overall news sentiment could not be computed right now. Please try again shortly.")
+                            else:
+                                sentiment_score = news_analysis['Sentiment Score']
+                                st.markdown(f"<h3>Overall Sentiment Score: <span style='color: {get_sentiment_color(sentiment_score)};'>{sentiment_score:.2f}</span></h3>", unsafe_allow_html=True)
+                                for i in range(1, 4):
+                                    st.info(f"Reason {i}: {news_analysis[f'Reason {i}']}")
+                                if "news" in first_results:
+                                    st.caption(f"First article result after {first_results['news']:.2f}s")
+                                if news_stats:
+                                    st.caption(f"Preprocessing saved {news_stats['prompt_tokens_saved']:,} prompt tokens and skipped {news_stats['duplicates']} duplicate article(s)")
+                except Exception as e:
+                    # One malformed article card shouldn't hide the rest of the news tab
+                    show_error(flow, e, stop=kind != "article")
+        finally:
+            # On a rerun mid-analysis, don't wait for the flows; their threads finish in the background
+            executor.shutdown(wait=False, cancel_futures=True)
+
+        cache_stats = result_cache.stats()
+        st.caption(f"All tabs ready after {time.perf_counter() - run_start:.2f}s. "
+                   f"Result cache: {cache_stats['hits']} hits, {cache_stats['misses']} misses, "
+                   f"{cache_stats['entries']} entries using {cache_stats['bytes'] / 2 ** 20:.1f} MB")
+        tracing.end_trace(trace)
+        if show_trace:
+            render_waterfall(trace)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,47 @@
+import multiprocessing
+import os
+import numpy as np
+import pandas as pd
+from tools.history_store import HistoryStore
+
+
+def history(rows, offset=0.0):
+    dates = pd.bdate_range(end="2024-06-28", periods=rows, name="Date").tz_localize("America/New_York").as_unit("ns")
+    close = np.arange(rows, dtype=np.float64) + offset
+    return pd.DataFrame({"Close": close, "Volume": np.arange(rows, dtype=np.int64)}, index=dates)
+
+
+def save_repeatedly(root, worker, saves):
+    store = HistoryStore(root)
+    for i in range(saves):
+        store.save("RACE", history(20 + (worker + i) % 5, offset=worker))
+        if i % 3 == 0:
+            store.touch("RACE")
+        # A writer pruning a directory another one is about to publish leaves meta.json pointing nowhere
+        assert len(store.load("RACE")) >= 20
+
+
+def test_save_and_load_round_trip(tmp_path):
+    store = HistoryStore(str(tmp_path))
+    df = history(10)
+    store.save("AAPL", df)
+    pd.testing.assert_frame_equal(store.load("AAPL"), df, check_freq=False)
+    np.testing.assert_array_equal(store.load_tail("AAPL", 3, ["Close"])[:, 0], [7.0, 8.0, 9.0])
+
+
+def test_concurrent_writers_leave_a_loadable_history(tmp_path):
+    root = str(tmp_path)
+    context = multiprocessing.get_context("fork" if hasattr(os, "fork") else "spawn")
+    workers = [context.Process(target=save_repeatedly, args=(root, worker, 60)) for worker in range(6)]
+    for process in workers:
+        process.start()
+    for process in workers:
+        process.join()
+    assert all(process.exitcode == 0 for process in workers)
+
+    store = HistoryStore(root)
+    loaded = store.load("RACE")
+    assert len(loaded) == store.meta("RACE")["rows"]
+    data_dirs = [name for name in os.listdir(os.path.join(root, "RACE")) if name.startswith("data-")]
+    assert store.meta("RACE")["data"] in data_dirs
+    assert len(data_dirs) <= 2
@@ -0,0 +1,48 @@
+from tools.text_prep import ArticlePreprocessor, strip_boilerplate
+
+WIRE_STORY = (
+    "Shares of Apple rose 5% after the company reported record quarterly revenue, "
+    "driven by iPhone sales in China and continued growth in its services business."
+)
+
+
+def test_short_unrelated_articles_are_both_analyzed():
+    articles = {
+        ("Fed raises rates", "https://example.com/fed"): "Fed raises rates.",
+        ("Apple beats estimates", "https://example.com/apple"): "Apple beats estimates.",
+    }
+    prepared, duplicates, stats = ArticlePreprocessor().run(articles)
+    assert set(prepared) == set(articles)
+    assert duplicates == {}
+    assert stats["duplicates"] == 0
+
+
+def test_boilerplate_only_articles_are_not_merged():
+    articles = {
+        ("Apple beats estimates", "https://example.com/apple"): "Subscribe now to get the latest news.",
+        ("Fed raises rates", "https://example.com/fed"): "",
+        ("Oil slips", "https://example.com/oil"): "Advertisement",
+    }
+    prepared, duplicates, _ = ArticlePreprocessor().run(articles)
+    assert set(prepared) == set(articles)
+    assert duplicates == {}
+
+
+def test_syndicated_copies_are_still_merged():
+    articles = {
+        ("Apple rallies", "https://example.com/a"): WIRE_STORY,
+        ("Apple rallies (wire)", "https://example.org/b"): WIRE_STORY,
+    }
+    prepared, duplicates, _ = ArticlePreprocessor().run(articles)
+    assert list(prepared) == [("Apple rallies", "https://example.com/a")]
+    assert duplicates == {("Apple rallies (wire)", "https://example.org/b"): ("Apple rallies", "https://example.com/a")}
+
+
+def test_footer_lines_are_stripped_but_content_mentioning_them_is_kept():
+    content = [
+        "Meta was fined after regulators found its terms of service misled users about data sharing.",
+        "Copyright lawsuits against AI developers weigh on the sector, analysts said.",
+        "The company updated its privacy policy to allow ad targeting, and shares fell 3%.",
+    ]
+    footer = ["© 2024 Reuters. All rights reserved.", "Copyright 2024 Bloomberg L.P.", "Privacy Policy | Terms of Use"]
+    assert strip_boilerplate("\n".join(content + footer)) == "\n".join(content)
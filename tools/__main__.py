@@ -0,0 +1,105 @@
+"""
+Command line entry point.
+
+Usage: python -m tools analyze AAPL [--json] [--no-info] [--no-history] [--no-news] [--no-rating] [--mode fast] [--backend ollama] [--trace spans.jsonl]
+       python -m tools batch AAPL MSFT --out results.csv
+       python -m tools poll AAPL MSFT --price-interval 900 --news-interval 3600
+       python -m tools screen "RSI < 30 and pe_ratio < 15 order by sharpe_ratio"
+"""
+import argparse
+import contextlib
+import json
+import os
+import sys
+from .llm import BACKENDS
+
+
+def print_summary(result):
+    """Print a short human-readable version of an analyze() result."""
+    print(f"=== {result['ticker']} ===")
+    info = result.get("info")
+    if info:
+        print(f"{info.get('company_name', result['ticker'])} | {info.get('sector', 'N/A')} | price {info.get('current_price', 'N/A')} | P/E {info.get('pe_ratio', 'N/A')}")
+
+    history = result.get("history")
+    if history:
+        indicators = history["indicators"]
+        print(f"Annualized return {indicators['annualized_return']:.2f}% | Sharpe {indicators['sharpe_ratio']:.2f} | "
+              f"RSI {indicators['RSI']:.2f} | Max drawdown {indicators['max_drawdown']:.2f}%")
+        analysis = history.get("analysis")
+        if analysis:
+            print(f"Rating: {analysis.get('Rating')}")
+            for i in range(1, 6):
+                if f"Reason {i}" in analysis:
+                    print(f"  {i}. {analysis[f'Reason {i}']}")
+
+    news = result.get("news")
+    if news:
+        conclusion = news.get("conclusion") or {}
+        print(f"News sentiment: {conclusion.get('Sentiment Score', 'N/A')} over {len(news['articles'])} articles")
+        for i in range(1, 4):
+            if f"Reason {i}" in conclusion:
+                print(f"  {i}. {conclusion[f'Reason {i}']}")
+        for article in news["articles"]:
+            print(f"  [{article.get('Sentiment Score')}] {article['title']}")
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    parser = argparse.ArgumentParser(prog="python -m tools", description="Stock and news analysis without the dashboard")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    analyze_parser = subparsers.add_parser("analyze", help="Analyze a single ticker")
+    analyze_parser.add_argument("ticker")
+    analyze_parser.add_argument("--json", action="store_true", help="Print the full result as JSON")
+    analyze_parser.add_argument("--no-info", action="store_true", help="Skip stock and company information")
+    analyze_parser.add_argument("--no-history", action="store_true", help="Skip price history analysis")
+    analyze_parser.add_argument("--no-news", action="store_true", help="Skip news sentiment analysis")
+    analyze_parser.add_argument("--no-rating", action="store_true", help="Skip the LLM rating of the price history")
+    analyze_parser.add_argument("--mode", choices=["ensemble", "fast", "batch"], default="ensemble", help="Per-article news analysis mode")
+    analyze_parser.add_argument("--backend", choices=BACKENDS, help="LLM backend, overriding LLM_BACKEND")
+    analyze_parser.add_argument("--trace", metavar="PATH", help="Write timing spans of the run to PATH as JSON lines")
+
+    subparsers.add_parser("batch", help="Analyze a watchlist (see python -m tools batch --help)", add_help=False)
+    subparsers.add_parser("poll", help="Keep the dashboard's precomputed results fresh (see python -m tools poll --help)", add_help=False)
+    subparsers.add_parser("screen", help="Filter and rank the stored tickers (see python -m tools screen --help)", add_help=False)
+
+    args, rest = parser.parse_known_args(argv)
+    if args.command == "batch":
+        from .batch import main as batch_main
+        return batch_main(rest)
+    if args.command == "poll":
+        from .poller import main as poll_main
+        return poll_main(rest)
+    if args.command == "screen":
+        from .screener import main as screen_main
+        return screen_main(rest)
+    if rest:
+        parser.error(f"unrecognized arguments: {' '.join(rest)}")
+    if args.backend:
+        os.environ["LLM_BACKEND"] = args.backend
+
+    from .pipeline import analyze, to_jsonable
+    from .tracing import start_trace
+
+    # The processors print progress to stdout; keep it off stdout so --json output stays parseable
+    with contextlib.redirect_stdout(sys.stderr), start_trace(f"analyze {args.ticker.upper()}") as trace:
+        result = analyze(
+            args.ticker,
+            info=not args.no_info,
+            history=not args.no_history,
+            news=not args.no_news,
+            rating=not args.no_rating,
+            news_mode=args.mode,
+        )
+    if args.trace:
+        with open(args.trace, "w") as f:
+            f.write(trace.to_jsonl())
+    if args.json:
+        print(json.dumps(to_jsonable(result), indent=2))
+    else:
+        print_summary(result)
+
+
+if __name__ == "__main__":
+    main()
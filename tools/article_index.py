@@ -0,0 +1,139 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+DEFAULT_INDEX_PATH = os.getenv(
+    "ARTICLE_INDEX_PATH",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".cache", "articles.sqlite"),
+)
+
+# Query parameters that only track where a click came from and never change the article
+TRACKING_PARAMS = {"guccounter", "guce_referrer", "guce_referrer_sig", "ncid", "tsrc", ".tsrc", "soc_src", "soc_trk", "fbclid", "gclid", "cmpid", "yptr"}
+
+
+def normalize_url(url: str) -> str:
+    """
+    Canonical form of an article URL, so the same article linked differently is seen once.
+
+    Lowercases the scheme and host, drops a leading "www.", the fragment, tracking parameters
+    (utm_* and TRACKING_PARAMS) and a trailing slash, and sorts the remaining query parameters.
+    """
+    parts = urlsplit(url.strip())
+    host = parts.netloc.lower()
+    if host.startswith("www."):
+        host = host[4:]
+    query = sorted(
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not key.lower().startswith("utm_") and key.lower() not in TRACKING_PARAMS
+    )
+    path = parts.path.rstrip("/") or "/"
+    return urlunsplit((parts.scheme.lower() or "https", host, path, urlencode(query), ""))
+
+
+def content_hash(text: str) -> str:
+    """Hash of an article's text, ignoring whitespace differences."""
+    return hashlib.sha256(" ".join(text.split()).encode("utf-8")).hexdigest()
+
+
+class ArticleIndex:
+    """
+    On-disk index of articles already downloaded, backed by SQLite.
+
+    Rows are keyed by normalize_url(url) and hold the title, extracted text, publish time and
+    content hash, so a run only has to download the URLs it has not seen before.
+    """
+    def __init__(self, path: str = DEFAULT_INDEX_PATH, max_age: float = 30 * 24 * 60 * 60, max_entries: int = 20000):
+        """
+        :param path: SQLite database file
+        :param max_age: Seconds an article is kept after it was last listed
+        :param max_entries: Maximum number of articles kept; the least recently listed ones are dropped first
+        """
+        self.path = path
+        self.max_age = max_age
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                """CREATE TABLE IF NOT EXISTS articles (
+                    url_key TEXT PRIMARY KEY,
+                    url TEXT NOT NULL,
+                    title TEXT,
+                    text TEXT NOT NULL,
+                    published_at REAL,
+                    content_hash TEXT NOT NULL,
+                    first_seen REAL NOT NULL,
+                    last_seen REAL NOT NULL
+                )"""
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS articles_hash ON articles (content_hash)")
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def get_many(self, urls: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Look up many URLs at once and mark the ones found as seen now.
+
+        :return: Dictionary of url (as given) -> {"text", "title", "published_at", "content_hash"} for the known ones
+        """
+        keys = {url: normalize_url(url) for url in urls}
+        if not keys:
+            return {}
+        now = time.time()
+        with self._lock, self._connect() as conn:
+            placeholders = ",".join("?" * len(keys))
+            rows = conn.execute(
+                f"SELECT url_key, text, title, published_at, content_hash FROM articles WHERE url_key IN ({placeholders})",
+                list(set(keys.values())),
+            ).fetchall()
+            conn.executemany("UPDATE articles SET last_seen = ? WHERE url_key = ?", [(now, row[0]) for row in rows])
+        found = {row[0]: {"text": row[1], "title": row[2], "published_at": row[3], "content_hash": row[4]} for row in rows}
+        result = {url: found[key] for url, key in keys.items() if key in found}
+        self.hits += len(result)
+        self.misses += len(keys) - len(result)
+        return result
+
+    def put(self, url: str, text: str, title: Optional[str] = None, published_at: Optional[float] = None) -> None:
+        """Store a downloaded article and drop old or excess entries."""
+        now = time.time()
+        with self._lock, self._connect() as conn:
+            conn.execute(
+                """INSERT INTO articles (url_key, url, title, text, published_at, content_hash, first_seen, last_seen)
+                   VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                   ON CONFLICT(url_key) DO UPDATE SET
+                       title = excluded.title, text = excluded.text, published_at = excluded.published_at,
+                       content_hash = excluded.content_hash, last_seen = excluded.last_seen""",
+                (normalize_url(url), url, title, text, published_at, content_hash(text), now, now),
+            )
+            conn.execute("DELETE FROM articles WHERE last_seen < ?", (now - self.max_age,))
+            conn.execute(
+                """DELETE FROM articles WHERE url_key IN (
+                    SELECT url_key FROM articles ORDER BY last_seen DESC LIMIT -1 OFFSET ?
+                )""",
+                (self.max_entries,),
+            )
+
+    def clear(self) -> None:
+        """Remove every entry."""
+        with self._lock, self._connect() as conn:
+            conn.execute("DELETE FROM articles")
+
+    def stats(self) -> Dict[str, int]:
+        """Return hit/miss counters, the number of stored articles and of distinct texts among them."""
+        with self._lock, self._connect() as conn:
+            size, distinct = conn.execute("SELECT COUNT(*), COUNT(DISTINCT content_hash) FROM articles").fetchone()
+        return {"hits": self.hits, "misses": self.misses, "entries": size, "distinct_texts": distinct}
@@ -0,0 +1,187 @@
+"""
+Headless watchlist mode: analyze many tickers in one run and write a consolidated table.
+
+Usage: python -m tools.batch AAPL MSFT NVDA --out results.csv
+       python -m tools.batch --file watchlist.txt --out results.csv --no-news
+"""
+import argparse
+import json
+import os
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Dict, List
+import pandas as pd
+from .history_store import HistoryStore
+from .llm import BACKENDS
+from .llm_scheduler import BATCH
+from .processor import NewsProcessor, ProcessorFactory, StockHistoryProcessor
+from .stock import Stock
+
+# Columns copied from StockInfoProcessor output into the results table
+INFO_COLUMNS = ["company_name", "sector", "industry", "current_price", "market_cap", "pe_ratio", "forward_pe", "debt_to_equity", "recommendation"]
+# Columns copied from StockHistoryProcessor metrics into the results table
+METRIC_COLUMNS = ["latest_price", "total_return", "annualized_return", "volatility", "RSI", "sharpe_ratio", "max_drawdown", "SMA_50", "SMA_200"]
+
+
+class BatchRunner:
+    """
+    Run fetching, indicator computation and LLM analysis for a watchlist as a pipeline.
+
+    Each stage has its own thread pool, so one ticker can be in the LLM stage while the next is
+    still being fetched. Processors, the news scraper/analyzer and the history store are shared
+    across all tickers instead of being rebuilt per request.
+    """
+    def __init__(
+        self,
+        fetch_workers: int = 8,
+        indicator_workers: int = 4,
+        llm_workers: int = 2,
+        news_workers: int = 4,
+        include_rating: bool = True,
+        include_news: bool = True,
+        news_mode: str = "ensemble",
+    ):
+        """
+        :param fetch_workers: Concurrent yfinance fetches
+        :param indicator_workers: Concurrent indicator computations
+        :param llm_workers: Tickers in the LLM stage at the same time
+        :param news_workers: Articles analyzed concurrently per ticker
+        :param include_rating: Ask the model for a Buy/Sell/Hold rating from the price history
+        :param include_news: Scrape and analyze news for each ticker
+        :param news_mode: Per-article news analysis mode, "ensemble", "fast" or "batch"
+        """
+        self.fetch_workers = fetch_workers
+        self.indicator_workers = indicator_workers
+        self.llm_workers = llm_workers
+        self.include_rating = include_rating
+        self.include_news = include_news
+        self.history_store = HistoryStore()
+        self.stock_info_processor = ProcessorFactory.get_processor("stock_info")
+        self.news_processor = NewsProcessor(max_workers=news_workers, mode=news_mode, priority=BATCH)
+
+    def fetch(self, row: Dict[str, Any]) -> None:
+        stock = Stock(row["ticker"], store=self.history_store)
+        row["_info"] = stock.get_info()
+        row["_history"] = stock.get_history()
+
+    def compute(self, row: Dict[str, Any]) -> None:
+        info = self.stock_info_processor.process(row["_info"])
+        for column in INFO_COLUMNS:
+            row[column] = info.get(column)
+        # StockHistoryProcessor keeps per-ticker state, so each ticker gets its own
+        row["_metrics"] = StockHistoryProcessor().preprocess(row["_history"])
+        for column in METRIC_COLUMNS:
+            row[column] = row["_metrics"].get(column)
+
+    def analyze(self, row: Dict[str, Any]) -> None:
+        if self.include_rating:
+            rating = json.loads(StockHistoryProcessor(priority=BATCH).process(row["_metrics"]))
+            row["rating"] = rating.get("Rating")
+        if self.include_news:
+            news_analysis, title_url_sentiment = self.news_processor.process(row["ticker"])
+            row["news_sentiment"] = (news_analysis or {}).get("Sentiment Score")
+            row["articles_analyzed"] = len(title_url_sentiment)
+
+    def _run_stage(self, stage, row: Dict[str, Any]) -> Dict[str, Any]:
+        # Once a stage fails, the ticker skips the remaining stages and keeps the error
+        if row.get("error"):
+            return row
+        start = time.perf_counter()
+        try:
+            stage(row)
+        except Exception as e:
+            row["error"] = f"{stage.__name__}: {e}"
+        row[f"{stage.__name__}_seconds"] = round(time.perf_counter() - start, 3)
+        return row
+
+    def run(self, tickers: List[str]) -> pd.DataFrame:
+        """
+        Analyze every ticker and return one row per ticker, in the given order.
+
+        :param tickers: Ticker symbols; duplicates are analyzed once
+        :return: DataFrame indexed by ticker
+        """
+        tickers = list(dict.fromkeys(ticker.strip().upper() for ticker in tickers if ticker.strip()))
+        done = {ticker: Future() for ticker in tickers}
+
+        with ThreadPoolExecutor(self.fetch_workers) as fetch_pool, \
+                ThreadPoolExecutor(self.indicator_workers) as indicator_pool, \
+                ThreadPoolExecutor(self.llm_workers) as llm_pool:
+            stages = [(fetch_pool, self.fetch), (indicator_pool, self.compute), (llm_pool, self.analyze)]
+
+            def advance(row, index):
+                if index == len(stages):
+                    done[row["ticker"]].set_result(row)
+                    return
+                pool, stage = stages[index]
+                future = pool.submit(self._run_stage, stage, row)
+                future.add_done_callback(lambda f: advance(f.result(), index + 1))
+
+            for ticker in tickers:
+                advance({"ticker": ticker}, 0)
+            # All pools must stay open until every ticker has gone through the last stage
+            rows = [done[ticker].result() for ticker in tickers]
+
+        table = pd.DataFrame([{k: v for k, v in row.items() if not k.startswith("_")} for row in rows])
+        return table.set_index("ticker") if not table.empty else table
+
+
+def write_results(table: pd.DataFrame, path: str) -> None:
+    """Write the results table as CSV or JSON depending on the file extension."""
+    if os.path.splitext(path)[1].lower() == ".json":
+        table.reset_index().to_json(path, orient="records", indent=2)
+    else:
+        table.to_csv(path)
+
+
+def read_watchlist(path: str) -> List[str]:
+    """Read tickers from a file, one per line or comma separated; '#' starts a comment."""
+    tickers = []
+    with open(path) as f:
+        for line in f:
+            line = line.split("#", 1)[0]
+            tickers.extend(part for part in line.replace(",", " ").split() if part)
+    return tickers
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("tickers", nargs="*", help="Ticker symbols to analyze")
+    parser.add_argument("--file", help="Watchlist file with one ticker per line")
+    parser.add_argument("--out", default="batch_results.csv", help="Output file (.csv or .json)")
+    parser.add_argument("--fetch-workers", type=int, default=8)
+    parser.add_argument("--indicator-workers", type=int, default=4)
+    parser.add_argument("--llm-workers", type=int, default=2)
+    parser.add_argument("--news-workers", type=int, default=4)
+    parser.add_argument("--no-rating", action="store_true", help="Skip the LLM rating of the price history")
+    parser.add_argument("--no-news", action="store_true", help="Skip news scraping and sentiment analysis")
+    parser.add_argument("--news-mode", choices=["ensemble", "fast", "batch"], default="ensemble", help="Per-article news analysis mode")
+    parser.add_argument("--backend", choices=BACKENDS, help="LLM backend, overriding LLM_BACKEND")
+    args = parser.parse_args(argv)
+    if args.backend:
+        os.environ["LLM_BACKEND"] = args.backend
+
+    tickers = list(args.tickers)
+    if args.file:
+        tickers.extend(read_watchlist(args.file))
+    if not tickers:
+        parser.error("no tickers given")
+
+    runner = BatchRunner(
+        fetch_workers=args.fetch_workers,
+        indicator_workers=args.indicator_workers,
+        llm_workers=args.llm_workers,
+        news_workers=args.news_workers,
+        include_rating=not args.no_rating,
+        include_news=not args.no_news,
+        news_mode=args.news_mode,
+    )
+    start = time.perf_counter()
+    table = runner.run(tickers)
+    write_results(table, args.out)
+    failed = int(table["error"].notna().sum()) if "error" in table else 0
+    print(f"Analyzed {len(table)} tickers in {time.perf_counter() - start:.1f}s ({failed} failed), results written to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
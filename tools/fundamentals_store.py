@@ -0,0 +1,268 @@
+import contextlib
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional
+import numpy as np
+import pandas as pd
+from .result_cache import SOURCE_TTLS
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+DEFAULT_FUNDAMENTALS_DIR = os.getenv(
+    "FUNDAMENTALS_STORE_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".cache", "fundamentals"),
+)
+
+# Seconds before a stored dataset is fetched again; quarterly statements change a few times a year.
+# Info also carries the live quote (currentPrice, day range, volume), so it is kept no longer than a quote.
+REFRESH_INTERVALS = {
+    "info": SOURCE_TTLS["quote"],
+    "quarterly_income_statement": 7 * 24 * 60 * 60,
+    "quarterly_balance_sheet": 7 * 24 * 60 * 60,
+    "quarterly_cashflow": 7 * 24 * 60 * 60,
+    "insider_transactions": 24 * 60 * 60,
+}
+# Statements keep the quarters of earlier snapshots that yfinance no longer returns
+STATEMENTS = ("quarterly_income_statement", "quarterly_balance_sheet", "quarterly_cashflow")
+# Older versions kept per dataset
+MAX_VERSIONS = 3
+
+
+def _encode_labels(labels: pd.Index):
+    """Index or column labels as an array np.load can read without pickle, plus how to decode it."""
+    if isinstance(labels, pd.DatetimeIndex):
+        tz = str(labels.tz) if labels.tz is not None else None
+        utc = labels.tz_convert("UTC") if tz else labels
+        return utc.as_unit("ns").asi8.astype(np.int64), {"kind": "datetime", "tz": tz, "name": labels.name}
+    if pd.api.types.is_integer_dtype(labels.dtype):
+        return labels.to_numpy(dtype=np.int64), {"kind": "int", "name": labels.name}
+    return np.array([str(label) for label in labels], dtype=str), {"kind": "str", "name": labels.name}
+
+
+def _decode_labels(array, meta) -> pd.Index:
+    if meta["kind"] == "datetime":
+        index = pd.to_datetime(array, utc=True)
+        index = index.tz_convert(meta["tz"]) if meta["tz"] else index.tz_localize(None)
+        return index.rename(meta["name"])
+    return pd.Index(array.tolist(), name=meta["name"])
+
+
+def encode_frame(df: pd.DataFrame):
+    """
+    Split a DataFrame into plain NumPy arrays, one per column, and the metadata to rebuild it.
+
+    Numeric columns are stored as float64 (or int64), datetimes as int64 nanoseconds and
+    everything else as strings with a missing-value mask, so the result loads without pickle.
+    """
+    arrays, columns = {}, []
+    arrays["index"], index_meta = _encode_labels(df.index)
+    arrays["columns"], columns_meta = _encode_labels(df.columns)
+    for i, (_, series) in enumerate(df.items()):
+        if pd.api.types.is_bool_dtype(series.dtype):
+            arrays[f"c{i}"], kind = series.to_numpy(dtype=bool), "bool"
+        elif pd.api.types.is_integer_dtype(series.dtype):
+            arrays[f"c{i}"], kind = series.to_numpy(dtype=np.int64), "int"
+        elif pd.api.types.is_numeric_dtype(series.dtype):
+            arrays[f"c{i}"], kind = series.to_numpy(dtype=np.float64, na_value=np.nan), "float"
+        elif pd.api.types.is_datetime64_any_dtype(series.dtype):
+            values = pd.DatetimeIndex(series)
+            arrays[f"c{i}"], kind = values.as_unit("ns").asi8.astype(np.int64), "datetime"
+            arrays[f"m{i}"] = values.isna()
+        else:
+            missing = series.isna().to_numpy()
+            arrays[f"c{i}"] = np.array(["" if m else str(v) for v, m in zip(series.tolist(), missing)], dtype=str)
+            arrays[f"m{i}"], kind = missing, "str"
+        columns.append(kind)
+    return arrays, {"index": index_meta, "columns": columns_meta, "kinds": columns}
+
+
+def decode_frame(arrays, meta) -> pd.DataFrame:
+    data = {}
+    for i, kind in enumerate(meta["kinds"]):
+        values = arrays[f"c{i}"]
+        if kind == "datetime":
+            values = pd.to_datetime(np.where(arrays[f"m{i}"], np.iinfo(np.int64).min, values))
+        elif kind == "str":
+            values = np.where(arrays[f"m{i}"], None, values.astype(object))
+        data[i] = values
+    df = pd.DataFrame(data, index=_decode_labels(arrays["index"], meta["index"]))
+    df.columns = _decode_labels(arrays["columns"], meta["columns"])
+    return df
+
+
+def encode_info(info: Dict[str, Any]):
+    """
+    Split a yfinance info dict into a numeric column (one float64 array keyed by field name) and
+    a JSON string for text, boolean and nested fields.
+    """
+    numeric = {k: v for k, v in info.items()
+               if isinstance(v, (int, float, np.integer, np.floating)) and not isinstance(v, (bool, np.bool_))}
+    rest = {k: v for k, v in info.items() if k not in numeric}
+    arrays = {
+        "numeric_keys": np.array(list(numeric), dtype=str),
+        "numeric_values": np.array(list(numeric.values()), dtype=np.float64),
+        "is_int": np.array([isinstance(v, (int, np.integer)) for v in numeric.values()], dtype=bool),
+        "text": np.array(json.dumps(rest, default=str)),
+    }
+    return arrays, {}
+
+
+def decode_info(arrays, meta) -> Dict[str, Any]:
+    info = json.loads(str(arrays["text"]))
+    for key, value, is_int in zip(arrays["numeric_keys"].tolist(), arrays["numeric_values"].tolist(), arrays["is_int"].tolist()):
+        info[key] = int(value) if is_int and value == value else value
+    return info
+
+
+class FundamentalsStore:
+    """
+    Versioned on-disk snapshots of a ticker's fundamentals, one directory per ticker.
+
+    Each dataset (info, the quarterly statements, insider transactions) is kept as numbered
+    .npz snapshots of plain arrays, loadable without pickle, plus an entry in meta.json with its
+    current version, update time and content hash. Refetching unchanged data only updates the
+    time, and statements are merged with the stored quarters, so a refresh adds the new quarter
+    instead of replacing the table. The last MAX_VERSIONS snapshots of each dataset are kept.
+    """
+    def __init__(self, root: str = DEFAULT_FUNDAMENTALS_DIR, intervals: Optional[Dict[str, float]] = None):
+        """
+        :param root: Directory holding one subdirectory per ticker
+        :param intervals: Dataset -> refresh interval in seconds, overriding REFRESH_INTERVALS
+        """
+        self.root = root
+        self.intervals = {**REFRESH_INTERVALS, **(intervals or {})}
+        # Used where fcntl is unavailable; then only writers in this process are serialized
+        self._lock = threading.Lock()
+
+    def _dir(self, ticker: str) -> str:
+        return os.path.join(self.root, ticker.upper().replace(os.sep, "_"))
+
+    def meta(self, ticker: str) -> Dict[str, Dict[str, Any]]:
+        """Return dataset -> {"version", "versions", "updated_at", "hash", ...} for ticker ({} if nothing is stored)."""
+        path = os.path.join(self._dir(ticker), "meta.json")
+        if not os.path.exists(path):
+            return {}
+        with open(path) as f:
+            return json.load(f)
+
+    @contextlib.contextmanager
+    def _locked(self, ticker: str):
+        """Hold ticker's exclusive lock, shared with other processes through an flock on its .lock file."""
+        directory = self._dir(ticker)
+        os.makedirs(directory, exist_ok=True)
+        if fcntl is None:
+            with self._lock:
+                yield
+            return
+        with open(os.path.join(directory, ".lock"), "a") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def _write_meta(self, ticker: str, meta) -> None:
+        path = os.path.join(self._dir(ticker), "meta.json")
+        tmp = path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(meta, f)
+        os.replace(tmp, path)
+
+    def is_fresh(self, ticker: str, dataset: str) -> bool:
+        """Whether dataset is stored and younger than its refresh interval."""
+        entry = self.meta(ticker).get(dataset)
+        return entry is not None and time.time() - entry["updated_at"] < self.intervals[dataset]
+
+    def load(self, ticker: str, dataset: str, version: Optional[int] = None):
+        """Load a dataset snapshot (the latest if version is None), or None if it is not stored."""
+        entry = self.meta(ticker).get(dataset)
+        if entry is None:
+            return None
+        version = entry["version"] if version is None else version
+        if version not in entry["versions"]:
+            return None
+        with np.load(os.path.join(self._dir(ticker), f"{dataset}.v{version}.npz")) as npz:
+            arrays = {name: npz[name] for name in npz.files}
+        layout = json.loads(str(arrays.pop("layout")))
+        return decode_info(arrays, layout) if dataset == "info" else decode_frame(arrays, layout)
+
+    def save(self, ticker: str, dataset: str, value):
+        """
+        Store a freshly fetched dataset and return what is now stored.
+
+        Statements are merged with the stored quarters first. If the result is unchanged, no new
+        version is written and only the update time moves. The read-modify-write of meta.json runs
+        under the ticker's lock, so concurrent writers (e.g. the poller and the dashboard) neither
+        drop each other's datasets nor write the same version.
+        """
+        with self._locked(ticker):
+            return self._save(ticker, dataset, value)
+
+    def _save(self, ticker: str, dataset: str, value):
+        meta = self.meta(ticker)
+        entry = meta.get(dataset)
+        if dataset in STATEMENTS and entry is not None and isinstance(value, pd.DataFrame) and not value.empty:
+            stored = self.load(ticker, dataset)
+            if stored is not None and not stored.empty:
+                value = value.combine_first(stored)
+                value = value[sorted(value.columns, reverse=True)]
+
+        if dataset == "info":
+            arrays, layout = encode_info(value)
+        else:
+            arrays, layout = encode_frame(value if isinstance(value, pd.DataFrame) else pd.DataFrame(value))
+        digest = hashlib.sha256()
+        for name in sorted(arrays):
+            digest.update(name.encode())
+            digest.update(np.ascontiguousarray(arrays[name]).tobytes())
+        content_hash = digest.hexdigest()
+
+        directory = self._dir(ticker)
+        if entry is not None and entry["hash"] == content_hash:
+            entry["updated_at"] = time.time()
+            self._write_meta(ticker, meta)
+            return value
+
+        version = entry["version"] + 1 if entry else 1
+        tmp = os.path.join(directory, f".{dataset}.v{version}.npz.tmp")
+        with open(tmp, "wb") as f:
+            # Each snapshot carries its own layout, so older versions stay readable if columns change
+            np.savez_compressed(f, layout=np.array(json.dumps(layout)), **arrays)
+        os.replace(tmp, os.path.join(directory, f"{dataset}.v{version}.npz"))
+        versions = ((entry or {}).get("versions", []) + [version])[-MAX_VERSIONS:]
+        for old in set((entry or {}).get("versions", [])) - set(versions):
+            path = os.path.join(directory, f"{dataset}.v{old}.npz")
+            if os.path.exists(path):
+                os.remove(path)
+        meta[dataset] = {"version": version, "versions": versions, "updated_at": time.time(), "hash": content_hash}
+        self._write_meta(ticker, meta)
+        return value
+
+    def tickers(self) -> List[str]:
+        """Every ticker with stored fundamentals."""
+        if not os.path.isdir(self.root):
+            return []
+        return sorted(name for name in os.listdir(self.root) if os.path.exists(os.path.join(self.root, name, "meta.json")))
+
+    def info_table(self, tickers: Optional[Iterable[str]] = None) -> pd.DataFrame:
+        """
+        One row per ticker of the key fields StockInfoProcessor extracts, read from stored info snapshots only.
+
+        :param tickers: Tickers to include, every stored one if omitted
+        :return: DataFrame indexed by ticker; tickers without a stored info snapshot are left out
+        """
+        from .processor import StockInfoProcessor
+
+        processor = StockInfoProcessor()
+        rows = {}
+        for ticker in tickers if tickers is not None else self.tickers():
+            info = self.load(ticker, "info")
+            if info is not None:
+                rows[ticker.upper()] = processor.process(info)
+        return pd.DataFrame.from_dict(rows, orient="index")
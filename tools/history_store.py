@@ -0,0 +1,191 @@
+import contextlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import numpy as np
+import pandas as pd
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+DEFAULT_HISTORY_DIR = os.getenv(
+    "HISTORY_STORE_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".cache", "history"),
+)
+
+
+class HistoryStore:
+    """
+    Columnar on-disk store of daily price history, one directory per ticker.
+
+    Each ticker directory holds meta.json and the data directory it points to:
+        data-<n>/index.npy  - bar timestamps as int64 nanoseconds since the epoch (UTC)
+        data-<n>/values.npy - float64 matrix of shape (bars, columns)
+        meta.json           - data directory, row count, column names and dtypes, index name,
+                              timezone and last update time
+
+    A save writes a new data directory and then replaces meta.json, so readers see either the old
+    or the new history, never a mix. The previous data directory is kept for readers still using it.
+    Saves and touches of a ticker hold its lock, so concurrent writers (the poller, batch runs and
+    the dashboard) never prune a directory another one has just published.
+    The .npy files are opened memory-mapped, so loading a long history does not read it all into memory.
+    """
+    def __init__(self, root: str = DEFAULT_HISTORY_DIR):
+        self.root = root
+        # Used where fcntl is unavailable; then only writers in this process are serialized
+        self._lock = threading.Lock()
+
+    def _dir(self, ticker: str) -> str:
+        return os.path.join(self.root, ticker.upper().replace(os.sep, "_"))
+
+    def meta(self, ticker: str) -> Optional[Dict[str, Any]]:
+        """Return the stored metadata for ticker, or None if nothing is stored."""
+        path = os.path.join(self._dir(ticker), "meta.json")
+        if not os.path.exists(path):
+            return None
+        with open(path) as f:
+            return json.load(f)
+
+    @contextlib.contextmanager
+    def _locked(self, ticker: str):
+        """Hold ticker's exclusive lock, shared with other processes through an flock on its .lock file."""
+        directory = self._dir(ticker)
+        os.makedirs(directory, exist_ok=True)
+        if fcntl is None:
+            with self._lock:
+                yield
+            return
+        with open(os.path.join(directory, ".lock"), "a") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def _write_meta(self, ticker: str, meta: Dict[str, Any]) -> None:
+        fd, tmp = tempfile.mkstemp(prefix=".meta.", suffix=".tmp", dir=self._dir(ticker))
+        with os.fdopen(fd, "w") as f:
+            json.dump(meta, f)
+        os.replace(tmp, os.path.join(self._dir(ticker), "meta.json"))
+
+    def _snapshot(self, ticker: str) -> Optional[Tuple[Dict[str, Any], np.ndarray, np.ndarray]]:
+        """Return (meta, index, values) of one consistent stored history, memory-mapped, or None."""
+        for attempt in range(3):
+            meta = self.meta(ticker)
+            if meta is None:
+                return None
+            # Stores written before data directories keep the arrays next to meta.json
+            directory = os.path.join(self._dir(ticker), meta.get("data", ""))
+            try:
+                index = np.load(os.path.join(directory, "index.npy"), mmap_mode="r")
+                values = np.load(os.path.join(directory, "values.npy"), mmap_mode="r")
+            except FileNotFoundError:
+                # Two saves replaced this snapshot after meta.json was read; read it again
+                if attempt == 2:
+                    raise
+                continue
+            rows = meta.get("rows", len(index))
+            if not len(index) == values.shape[0] == rows or values.shape[1] != len(meta["columns"]):
+                raise ValueError(f"Stored history for {ticker} is inconsistent: {len(index)} dates, "
+                                 f"{values.shape} values, {rows} rows and {len(meta['columns'])} columns in meta")
+            return meta, index, values
+
+    def load(self, ticker: str) -> Optional[pd.DataFrame]:
+        """Load the stored history for ticker as a DataFrame, or None if nothing is stored."""
+        snapshot = self._snapshot(ticker)
+        if snapshot is None:
+            return None
+        meta, index, values = snapshot
+
+        dates = pd.to_datetime(np.asarray(index), utc=True)
+        if meta["tz"]:
+            dates = dates.tz_convert(meta["tz"])
+        else:
+            dates = dates.tz_localize(None)
+        dates.name = meta["index_name"]
+
+        df = pd.DataFrame(values, index=dates, columns=meta["columns"], copy=False)
+        # Only non-float columns (e.g. Volume) need a cast back; the rest stay memory-mapped
+        casts = {col: dtype for col, dtype in meta["dtypes"].items() if dtype != "float64"}
+        return df.astype(casts) if casts else df
+
+    def load_tail(self, ticker: str, bars: int, columns: Sequence[str]) -> Optional[np.ndarray]:
+        """
+        Return the last bars rows of the given columns as a float64 array, without building a DataFrame.
+
+        :return: Array of shape (min(bars, stored bars), len(columns)), or None if nothing is stored
+        """
+        snapshot = self._snapshot(ticker)
+        if snapshot is None:
+            return None
+        meta, _, values = snapshot
+        positions = [meta["columns"].index(column) for column in columns]
+        return np.array(values[-bars:, positions], dtype=np.float64)
+
+    def tickers(self) -> List[str]:
+        """Every ticker with a stored history."""
+        if not os.path.isdir(self.root):
+            return []
+        return sorted(name for name in os.listdir(self.root) if os.path.exists(os.path.join(self.root, name, "meta.json")))
+
+    def save(self, ticker: str, df: pd.DataFrame) -> None:
+        """Replace the stored history for ticker with df."""
+        with self._locked(ticker):
+            self._save(ticker, df)
+
+    def _save(self, ticker: str, df: pd.DataFrame) -> None:
+        directory = self._dir(ticker)
+        previous = (self.meta(ticker) or {}).get("data")
+
+        index = df.index
+        tz = str(index.tz) if index.tz is not None else None
+        utc_index = index.tz_convert("UTC") if tz else index
+        data = f"data-{time.time_ns()}-{os.getpid()}-{threading.get_ident()}"
+        meta = {
+            "data": data,
+            "rows": len(df),
+            "columns": list(df.columns),
+            "dtypes": {col: str(dtype) for col, dtype in df.dtypes.items()},
+            "index_name": index.name,
+            "tz": tz,
+            "updated_at": time.time(),
+        }
+
+        # Write the arrays into a hidden directory, publish it under its name, then point
+        # meta.json at it; replacing meta.json is the one step readers can observe
+        tmp = os.path.join(directory, f".{data}")
+        os.makedirs(tmp)
+        arrays = {
+            # as_unit: pandas may hold the index in a coarser unit than ns, which asi8 would return as is
+            "index.npy": utc_index.as_unit("ns").asi8.astype(np.int64),
+            "values.npy": df.to_numpy(dtype=np.float64),
+        }
+        for name, array in arrays.items():
+            with open(os.path.join(tmp, name), "wb") as f:
+                np.save(f, array)
+        os.rename(tmp, os.path.join(directory, data))
+        self._write_meta(ticker, meta)
+
+        # Keep the previous snapshot for readers that read meta.json before the swap
+        for name in os.listdir(directory):
+            if name.startswith("data-") and name not in (data, previous):
+                shutil.rmtree(os.path.join(directory, name), ignore_errors=True)
+        if previous:
+            for name in ("index.npy", "values.npy"):
+                with contextlib.suppress(FileNotFoundError):
+                    os.remove(os.path.join(directory, name))
+
+    def touch(self, ticker: str) -> None:
+        """Mark the stored history as up to date without rewriting it."""
+        if self.meta(ticker) is None:
+            return
+        with self._locked(ticker):
+            meta = self.meta(ticker)
+            meta["updated_at"] = time.time()
+            self._write_meta(ticker, meta)
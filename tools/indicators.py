@@ -0,0 +1,139 @@
+import numpy as np
+import pandas as pd
+from typing import Dict, Optional, Sequence
+
+TRADING_DAYS = 252
+RISK_FREE_RATE = 0.02
+SMA_WINDOWS = (5, 10, 20, 50, 200)
+RSI_WINDOW = 14
+BOLLINGER_WINDOW = 20
+BOLLINGER_STD = 2
+CHART_SMA_WINDOWS = (5, 20, 50, 200)
+MACD_FAST, MACD_SLOW, MACD_SIGNAL = 12, 26, 9
+
+
+def build_indicator_frame(history: pd.DataFrame) -> pd.DataFrame:
+    """
+    Compute every per-date indicator series for one ticker's history in a single place.
+
+    The processor metrics, the Plotly chart and the lightweight-charts panes all read from this
+    frame, so each rolling window and EWM is computed once per history range.
+
+    :param history: DataFrame with at least a Close column
+    :return: DataFrame on the same index with Daily_Return, SMA_*, BB_*, RSI, MACD, Signal and Histogram
+    """
+    close = history["Close"]
+    frame = pd.DataFrame(index=history.index)
+    frame["Daily_Return"] = close.pct_change()
+
+    for window in sorted(set(SMA_WINDOWS) | set(CHART_SMA_WINDOWS)):
+        frame[f"SMA_{window}"] = close.rolling(window=window).mean()
+
+    rolling_std = close.rolling(window=BOLLINGER_WINDOW).std()
+    frame["BB_Upper"] = frame[f"SMA_{BOLLINGER_WINDOW}"] + rolling_std * BOLLINGER_STD
+    frame["BB_Lower"] = frame[f"SMA_{BOLLINGER_WINDOW}"] - rolling_std * BOLLINGER_STD
+
+    delta = close.diff()
+    gain = (delta.where(delta > 0, 0)).rolling(window=RSI_WINDOW).mean()
+    loss = (-delta.where(delta < 0, 0)).rolling(window=RSI_WINDOW).mean()
+    frame["RSI"] = 100 - (100 / (1 + gain / loss))
+
+    exp1 = close.ewm(span=MACD_FAST, adjust=False).mean()
+    exp2 = close.ewm(span=MACD_SLOW, adjust=False).mean()
+    frame["MACD"] = exp1 - exp2
+    frame["Signal"] = frame["MACD"].ewm(span=MACD_SIGNAL, adjust=False).mean()
+    frame["Histogram"] = frame["MACD"] - frame["Signal"]
+    return frame
+
+
+def stack_histories(histories: Dict[str, pd.DataFrame], column: str = "Close") -> pd.DataFrame:
+    """
+    Build a dates x tickers matrix of one column from per-ticker history DataFrames.
+
+    Only dates present for every ticker are kept, so the result has no gaps.
+    """
+    frame = pd.concat({ticker: df[column] for ticker, df in histories.items()}, axis=1, join="inner")
+    return frame.sort_index()
+
+
+def compute_batch_metrics(
+    close,
+    high=None,
+    low=None,
+    volume=None,
+    tickers: Optional[Sequence[str]] = None,
+) -> pd.DataFrame:
+    """
+    Compute the StockHistoryProcessor key metrics for many tickers at once.
+
+    :param close: Close prices, dates x tickers (DataFrame or 2-D array) with no missing values
+    :param high: High prices with the same shape, defaults to close
+    :param low: Low prices with the same shape, defaults to close
+    :param volume: Volumes with the same shape; volume metrics are NaN when omitted
+    :param tickers: Column labels when arrays are passed, taken from close.columns for DataFrames
+    :return: DataFrame indexed by ticker with one column per metric
+    """
+    if tickers is None:
+        tickers = list(close.columns) if isinstance(close, pd.DataFrame) else list(range(np.shape(close)[1]))
+    close = np.asarray(close, dtype=np.float64)
+    if close.ndim == 1:
+        close = close[:, None]
+    if close.shape[0] < 2:
+        raise ValueError("At least two days of prices are needed to compute metrics")
+    high = close if high is None else np.asarray(high, dtype=np.float64).reshape(close.shape)
+    low = close if low is None else np.asarray(low, dtype=np.float64).reshape(close.shape)
+    n_days = close.shape[0]
+
+    metrics = {}
+    first, last = close[0], close[-1]
+    metrics["latest_price"] = last
+    metrics["price_change"] = last - first
+    metrics["price_change_percent"] = (last - first) / first * 100
+
+    # One diff serves returns, volatility, Sharpe and RSI
+    delta = np.diff(close, axis=0)
+    returns = delta / close[:-1]
+    metrics["total_return"] = (last / first - 1) * 100
+    metrics["annualized_return"] = ((1 + metrics["total_return"] / 100) ** (TRADING_DAYS / n_days) - 1) * 100
+    metrics["volatility"] = returns.std(axis=0, ddof=1) * np.sqrt(TRADING_DAYS) * 100
+
+    # Only the latest value of each moving average is reported, so average the tail directly
+    for window in SMA_WINDOWS:
+        metrics[f"SMA_{window}"] = close[-window:].mean(axis=0) if n_days >= window else np.full(close.shape[1], np.nan)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        if n_days > RSI_WINDOW:
+            recent = delta[-RSI_WINDOW:]
+            gain = np.where(recent > 0, recent, 0).mean(axis=0)
+            loss = np.where(recent < 0, -recent, 0).mean(axis=0)
+            metrics["RSI"] = 100 - (100 / (1 + gain / loss))
+        else:
+            metrics["RSI"] = np.full(close.shape[1], np.nan)
+
+        if n_days >= BOLLINGER_WINDOW:
+            window = close[-BOLLINGER_WINDOW:]
+            mean, std = window.mean(axis=0), window.std(axis=0, ddof=1)
+        else:
+            mean = std = np.full(close.shape[1], np.nan)
+        metrics["upper_bollinger"] = mean + std * BOLLINGER_STD
+        metrics["lower_bollinger"] = mean - std * BOLLINGER_STD
+
+        if volume is not None:
+            volume = np.asarray(volume, dtype=np.float64).reshape(close.shape)
+            metrics["average_volume"] = volume.mean(axis=0)
+            metrics["volume_change"] = (volume[-1] / metrics["average_volume"] - 1) * 100
+        else:
+            metrics["average_volume"] = metrics["volume_change"] = np.full(close.shape[1], np.nan)
+
+        metrics["52_week_high"] = high.max(axis=0)
+        metrics["52_week_low"] = low.min(axis=0)
+
+        excess_returns = returns - RISK_FREE_RATE / TRADING_DAYS
+        metrics["sharpe_ratio"] = np.sqrt(TRADING_DAYS) * excess_returns.mean(axis=0) / excess_returns.std(axis=0, ddof=1)
+
+        # Cumulative return from the first close; the first day itself has no return, as in the processor
+        cumulative_returns = close[1:] / first
+        peak = np.maximum.accumulate(cumulative_returns, axis=0)
+        metrics["max_drawdown"] = (cumulative_returns / peak - 1).min(axis=0) * 100
+
+    return pd.DataFrame(metrics, index=pd.Index(tickers, name="ticker"))
@@ -0,0 +1,150 @@
+"""
+Shared, lazily built LLM clients.
+
+Clients are created on first use and then reused by every analyzer and processor, so the
+TLS connections in their pool stay alive between requests instead of being set up per call.
+Analyzers and processors talk to them through get_scheduled_client, so every call is rate
+limited and retried by one shared LLMScheduler per backend.
+
+The backend is chosen with the LLM_BACKEND environment variable (or .env entry):
+  groq:   hosted Groq models (default, needs GROQ_API_KEY)
+  ollama: a local Ollama server at OLLAMA_HOST, serving OLLAMA_MODEL for every call site
+  stub:   deterministic offline answers, for tests and benchmarks
+"""
+import os
+import threading
+from typing import Optional
+from .llm_scheduler import DEFAULT_LIMITS, FALLBACK_LIMITS, INTERACTIVE, LLMScheduler, ScheduledClient, share_limits
+
+# Connection pool sizing for the shared HTTP client; NewsProcessor runs several articles at once
+MAX_CONNECTIONS = 20
+MAX_KEEPALIVE_CONNECTIONS = 10
+KEEPALIVE_EXPIRY = 60
+REQUEST_TIMEOUT = 60
+
+BACKENDS = ("groq", "ollama", "stub")
+DEFAULT_BACKEND = "groq"
+
+# Requests the scheduler keeps in flight per backend; a local server gains little past its own parallelism
+SCHEDULER_WORKERS = {"groq": 8, "ollama": 4, "stub": 8}
+
+_clients = {}
+_schedulers = {}
+_dotenv_loaded = False
+_lock = threading.Lock()
+
+
+def _build_groq_client():
+    import httpx
+    from dotenv import load_dotenv
+    from groq import Groq
+
+    load_dotenv()
+    http_client = httpx.Client(
+        limits=httpx.Limits(
+            max_connections=MAX_CONNECTIONS,
+            max_keepalive_connections=MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=KEEPALIVE_EXPIRY,
+        ),
+        timeout=REQUEST_TIMEOUT,
+    )
+    # Retries are handled by the LLMScheduler, so the SDK's own retries are turned off
+    return Groq(api_key=os.getenv("GROQ_API_KEY"), http_client=http_client, max_retries=0)
+
+
+def _build_ollama_client():
+    from .llm_backends import OllamaClient
+
+    return OllamaClient(pool_size=MAX_KEEPALIVE_CONNECTIONS, timeout=REQUEST_TIMEOUT * 2)
+
+
+def _build_stub_client():
+    from .llm_backends import StubClient
+
+    return StubClient()
+
+
+_BUILDERS = {
+    "groq": _build_groq_client,
+    "ollama": _build_ollama_client,
+    "stub": _build_stub_client,
+}
+
+
+def get_backend() -> str:
+    """Return the configured backend name, from LLM_BACKEND (default groq)."""
+    global _dotenv_loaded
+    if not _dotenv_loaded:
+        from dotenv import load_dotenv
+
+        load_dotenv()
+        _dotenv_loaded = True
+    return (os.getenv("LLM_BACKEND") or DEFAULT_BACKEND).strip().lower()
+
+
+def get_client(provider: Optional[str] = None):
+    """Return the shared client for provider (the configured backend if omitted), building it on first use."""
+    provider = provider or get_backend()
+    client = _clients.get(provider)
+    if client is None:
+        with _lock:
+            client = _clients.get(provider)
+            if client is None:
+                if provider not in _BUILDERS:
+                    raise ValueError(f"Unknown LLM provider: {provider}")
+                client = _clients[provider] = _BUILDERS[provider]()
+    return client
+
+
+def get_scheduler(provider: Optional[str] = None) -> LLMScheduler:
+    """
+    Return the shared LLMScheduler for provider, starting it on first use.
+
+    Only Groq has provider rate limits; local and stub backends are not throttled. The Groq
+    scheduler uses the LLM_RATE_SHARE fraction (default 1) of each model's limits, read when it
+    is first started.
+    """
+    provider = provider or get_backend()
+    scheduler = _schedulers.get(provider)
+    if scheduler is None:
+        with _lock:
+            scheduler = _schedulers.get(provider)
+            if scheduler is None:
+                if provider == "groq":
+                    share = float(os.getenv("LLM_RATE_SHARE", "1"))
+                    scheduler = LLMScheduler(
+                        limits=share_limits(DEFAULT_LIMITS, share),
+                        workers=SCHEDULER_WORKERS["groq"],
+                        fallback_limits=share_limits({"": FALLBACK_LIMITS}, share)[""],
+                    )
+                else:
+                    scheduler = LLMScheduler(limits={}, workers=SCHEDULER_WORKERS.get(provider, 4), fallback_limits=None)
+                _schedulers[provider] = scheduler
+    return scheduler
+
+
+def get_scheduled_client(priority: int = INTERACTIVE, provider: Optional[str] = None) -> ScheduledClient:
+    """Return the shared client for provider, with its calls going through that provider's scheduler."""
+    provider = provider or get_backend()
+    return ScheduledClient(get_client(provider), get_scheduler(provider), priority)
+
+
+def register_backend(name: str, builder) -> None:
+    """
+    Add or replace a backend, e.g. a recording or replaying client in benchmarks.
+
+    :param builder: Callable returning the client; it is called on first use of the backend
+    """
+    with _lock:
+        _BUILDERS[name] = builder
+        _clients.pop(name, None)
+
+
+def reset_clients() -> None:
+    """Close and forget all shared clients, e.g. after the API key changes."""
+    with _lock:
+        for client in _clients.values():
+            close = getattr(client, "close", None)
+            if close:
+                close()
+        _clients.clear()
@@ -0,0 +1,171 @@
+"""
+LLM backends besides Groq, exposing the same client.chat.completions.create(...) interface.
+
+Call sites only use messages, model, temperature, max_tokens, stream and response_format, and read
+choices[0].message.content, choices[0].delta.content (streaming) and usage, so that is what these
+clients accept and return.
+  ollama: a local Ollama server, over a pooled keep-alive HTTP session
+  stub:   deterministic canned answers derived from the prompt, for tests and benchmarks
+"""
+import hashlib
+import json
+import os
+import re
+import time
+from types import SimpleNamespace
+from typing import Dict, Iterator, Optional
+
+DEFAULT_OLLAMA_HOST = "http://localhost:11434"
+DEFAULT_OLLAMA_MODEL = "llama3.1"
+
+
+def make_completion(content: str, prompt_tokens: int, completion_tokens: int):
+    """Build a response shaped like a non-streaming chat completion."""
+    return SimpleNamespace(
+        choices=[SimpleNamespace(message=SimpleNamespace(content=content), finish_reason="stop")],
+        usage=SimpleNamespace(
+            prompt_tokens=prompt_tokens,
+            completion_tokens=completion_tokens,
+            total_tokens=prompt_tokens + completion_tokens,
+        ),
+    )
+
+
+def make_chunk(text: str):
+    """Build one chunk shaped like those of a streaming chat completion."""
+    return SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=text))])
+
+
+def _prompt_text(messages) -> str:
+    return "\n".join(str(message.get("content", "")) for message in messages)
+
+
+class OllamaClient:
+    """
+    Client for a local Ollama server's /api/chat endpoint.
+
+    Requests share one requests.Session whose connection pool holds pool_size keep-alive
+    connections, so concurrent analyses (news articles are analyzed in parallel) do not open a
+    new connection per call. How many of them the server runs at once is set on the server with
+    OLLAMA_NUM_PARALLEL.
+    """
+    def __init__(
+        self,
+        host: Optional[str] = None,
+        model: Optional[str] = None,
+        models: Optional[Dict[str, str]] = None,
+        pool_size: int = 10,
+        timeout: float = 120,
+    ):
+        """
+        :param host: Server URL, env OLLAMA_HOST or DEFAULT_OLLAMA_HOST if omitted
+        :param model: Local model used for every model id not in models, env OLLAMA_MODEL or DEFAULT_OLLAMA_MODEL if omitted
+        :param models: Model id (e.g. a Groq model id used by the analyzers) -> local model name
+        :param pool_size: Keep-alive connections kept open to the server
+        :param timeout: Seconds to wait for a response
+        """
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        self.host = (host or os.getenv("OLLAMA_HOST") or DEFAULT_OLLAMA_HOST).rstrip("/")
+        if not self.host.startswith("http"):
+            self.host = "http://" + self.host
+        self.model = model or os.getenv("OLLAMA_MODEL") or DEFAULT_OLLAMA_MODEL
+        self.models = dict(models or {})
+        self.timeout = timeout
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def create(self, messages, model, temperature=None, max_tokens=None, stream=False, response_format=None, **kwargs):
+        options = {}
+        if temperature is not None:
+            options["temperature"] = temperature
+        if max_tokens is not None:
+            options["num_predict"] = max_tokens
+        payload = {
+            "model": self.models.get(model, self.model),
+            "messages": messages,
+            "stream": stream,
+            "options": options,
+        }
+        if (response_format or {}).get("type") == "json_object":
+            payload["format"] = "json"
+
+        response = self.session.post(f"{self.host}/api/chat", json=payload, timeout=self.timeout, stream=stream)
+        response.raise_for_status()
+        if stream:
+            return self._stream(response)
+        body = response.json()
+        return make_completion(body["message"]["content"], body.get("prompt_eval_count", 0), body.get("eval_count", 0))
+
+    @staticmethod
+    def _stream(response) -> Iterator:
+        """Turn Ollama's newline-delimited JSON stream into OpenAI-style chunks."""
+        with response:
+            for line in response.iter_lines():
+                if not line:
+                    continue
+                data = json.loads(line)
+                content = data.get("message", {}).get("content")
+                if content:
+                    yield make_chunk(content)
+                if data.get("done"):
+                    break
+
+    def close(self):
+        self.session.close()
+
+
+class StubClient:
+    """
+    Deterministic offline client: the same prompt always gets the same answer.
+
+    JSON-mode answers follow the shape the prompt asks for (per-article sentiment, the batch
+    "articles" array, the overall conclusion or the buy/sell/hold rating), with a sentiment score
+    derived from a hash of the prompt. Other prompts get a short fixed-format analysis text.
+    """
+    RATINGS = ("Buy", "Hold", "Sell")
+
+    def __init__(self, latency: float = 0.0):
+        """
+        :param latency: Seconds each call sleeps, to imitate a real backend in benchmarks
+        """
+        self.latency = latency
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    @staticmethod
+    def _score(text: str) -> float:
+        digest = hashlib.sha256(text.encode()).digest()
+        return round(int.from_bytes(digest[:4], "big") / 0xFFFFFFFF * 2 - 1, 2)
+
+    def respond(self, prompt: str) -> str:
+        score = self._score(prompt)
+        if '"articles"' in prompt:
+            numbers = re.findall(r"^\s*Article (\d+):", prompt, re.MULTILINE)
+            return json.dumps({"articles": [{
+                "Article": int(number),
+                "Sentiment Score": self._score(f"{prompt}#{number}"),
+                "Reason 1": f"Stub reason 1 for article {number}.",
+                "Reason 2": f"Stub reason 2 for article {number}.",
+            } for number in numbers]})
+        if '"Rating"' in prompt:
+            rating = {"Rating": self.RATINGS[int((score + 1) * 1.5) % 3]}
+            rating.update({f"Reason {i}": f"Stub reason {i}." for i in range(1, 6)})
+            return json.dumps(rating)
+        match = re.search(r"JSON object with keys: ([^.]+)\.", prompt)
+        if match:
+            keys = [key.strip() for key in match.group(1).split(",")]
+            return json.dumps({key: score if key == "Sentiment Score" else f"Stub {key.lower()}." for key in keys})
+        return f"Stub analysis. Sentiment: {score:.2f}. Key points: none, this is a stub response."
+
+    def create(self, messages, model, stream=False, **kwargs):
+        if self.latency:
+            time.sleep(self.latency)
+        prompt = _prompt_text(messages)
+        content = self.respond(prompt)
+        if stream:
+            return iter([make_chunk(word) for word in re.findall(r"\S+\s*", content)])
+        return make_completion(content, len(prompt) // 4 + 1, len(content) // 4 + 1)
@@ -0,0 +1,265 @@
+"""
+Central scheduler for LLM calls: per-model rate limits, retries with backoff and priorities.
+
+Every request goes through a priority queue served by a few worker threads. Before a request is
+sent, the worker waits for its model's token buckets (requests/min and tokens/min) to have room.
+Rate-limit (429), server (5xx) and connection errors are retried with jittered exponential backoff,
+honouring Retry-After when the provider sends one. Interactive requests are served ahead of
+queued batch work.
+"""
+import heapq
+import itertools
+import random
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable, Dict, Optional, Tuple
+from .tracing import span
+
+# Lower runs first
+INTERACTIVE = 0
+BATCH = 10
+
+# (requests per minute, tokens per minute) per model, matching Groq's free tier
+DEFAULT_LIMITS: Dict[str, Tuple[float, float]] = {
+    "gemma2-9b-it": (30, 15000),
+    "llama3-8b-8192": (30, 30000),
+    "llama-3.1-8b-instant": (30, 20000),
+}
+FALLBACK_LIMITS = (30, 15000)
+# Share of the key's limits the background poller schedules against by default; the dashboard
+# defaults to the rest, so the two processes together stay within one key's limits
+POLLER_RATE_SHARE = 0.3
+
+# Seconds between re-checks of the queue head while its model is throttled
+POLL_INTERVAL = 0.05
+
+RETRYABLE_STATUS = {408, 409, 429, 500, 502, 503, 504}
+RETRYABLE_ERRORS = {"APIConnectionError", "APITimeoutError", "RateLimitError", "InternalServerError", "ConnectError", "ReadTimeout",
+                    "ConnectionError", "ConnectTimeout"}
+
+
+class TokenBucket:
+    """Token bucket refilled continuously at rate_per_minute, holding at most capacity."""
+    def __init__(self, rate_per_minute: float, capacity: Optional[float] = None):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = capacity if capacity is not None else rate_per_minute
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float) -> float:
+        """Seconds until amount is available (0 if it is now). Requests above capacity only need a full bucket."""
+        with self._lock:
+            self._refill()
+            amount = min(amount, self.capacity)
+            return 0.0 if self.tokens >= amount else (amount - self.tokens) / self.rate
+
+    def consume(self, amount: float) -> None:
+        """Take amount out of the bucket; it may go negative to account for under-estimates."""
+        with self._lock:
+            self._refill()
+            self.tokens -= amount
+
+
+def share_limits(limits: Dict[str, Tuple[float, float]], share: float) -> Dict[str, Tuple[float, float]]:
+    """
+    Scale every model's (requests per minute, tokens per minute) to a share of the key's limits.
+
+    The limits belong to the API key, not the process, so processes using one key (e.g. the
+    dashboard and the poller) each schedule against their own share so that together they stay under it.
+    """
+    if not 0 < share <= 1:
+        raise ValueError(f"Rate share must be in (0, 1], got {share}")
+    return {model: (requests * share, tokens * share) for model, (requests, tokens) in limits.items()}
+
+
+def is_retryable(error: Exception) -> bool:
+    status = getattr(error, "status_code", None)
+    if status is None:
+        status = getattr(getattr(error, "response", None), "status_code", None)
+    return status in RETRYABLE_STATUS or type(error).__name__ in RETRYABLE_ERRORS
+
+
+def retry_after(error: Exception) -> Optional[float]:
+    """Seconds from the Retry-After header of error's response, if any."""
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+class LLMScheduler:
+    def __init__(
+        self,
+        limits: Optional[Dict[str, Tuple[float, float]]] = None,
+        workers: int = 8,
+        max_retries: int = 5,
+        base_delay: float = 1.0,
+        max_delay: float = 30.0,
+        fallback_limits: Optional[Tuple[float, float]] = FALLBACK_LIMITS,
+    ):
+        """
+        :param limits: Model id -> (requests per minute, tokens per minute); DEFAULT_LIMITS if omitted
+        :param workers: Number of requests in flight at once
+        :param max_retries: Retries per request before its error is raised to the caller
+        :param base_delay: First backoff delay in seconds, doubled on every retry
+        :param max_delay: Upper bound on a single backoff delay
+        :param fallback_limits: Limits for models missing from limits; None leaves them unthrottled
+                                (e.g. a local backend with no provider quota)
+        """
+        self.limits = dict(DEFAULT_LIMITS if limits is None else limits)
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.fallback_limits = fallback_limits
+        self.stats = {"requests": 0, "retries": 0, "failures": 0, "throttled_seconds": 0.0}
+        self._stats_lock = threading.Lock()
+        self._buckets: Dict[str, Tuple[TokenBucket, TokenBucket]] = {}
+        self._queue = []
+        self._counter = itertools.count()
+        self._condition = threading.Condition()
+        self._dispatch = threading.Lock()
+        self._workers = [threading.Thread(target=self._work, daemon=True, name=f"llm-scheduler-{i}") for i in range(workers)]
+        for worker in self._workers:
+            worker.start()
+
+    def _buckets_for(self, model: str) -> Optional[Tuple[TokenBucket, TokenBucket]]:
+        """Return model's (requests, tokens) buckets, or None if the model is not throttled."""
+        with self._condition:
+            if model not in self._buckets:
+                limits = self.limits.get(model, self.fallback_limits)
+                self._buckets[model] = (TokenBucket(limits[0]), TokenBucket(limits[1])) if limits else None
+            return self._buckets[model]
+
+    def submit(self, fn: Callable, model: str, tokens: int = 0, priority: int = INTERACTIVE) -> Future:
+        """
+        Queue fn() to run once model's rate limits allow it.
+
+        :param fn: Callable making the actual request
+        :param model: Model id whose limits apply
+        :param tokens: Estimated tokens for the request (prompt + max completion)
+        :param priority: INTERACTIVE, BATCH or any int; lower runs first
+        :return: Future with fn's result, or its error after the retries are exhausted
+        """
+        future = Future()
+        self._push(priority, fn, model, tokens, future, 0)
+        return future
+
+    def call(self, fn: Callable, model: str, tokens: int = 0, priority: int = INTERACTIVE):
+        """Blocking version of submit."""
+        return self.submit(fn, model, tokens, priority).result()
+
+    def _push(self, priority, fn, model, tokens, future, attempt):
+        with self._condition:
+            heapq.heappush(self._queue, (priority, next(self._counter), fn, model, tokens, future, attempt))
+            self._condition.notify()
+
+    def _count(self, name, amount=1):
+        with self._stats_lock:
+            self.stats[name] += amount
+
+    def _next(self):
+        """
+        Pop the most urgent request once its model has capacity, and charge it to the buckets.
+
+        Only one worker waits on the limits at a time, and it re-checks the head of the queue
+        every POLL_INTERVAL, so an interactive request arriving while batch work is throttled
+        is the next one sent.
+        """
+        with self._dispatch:
+            while True:
+                with self._condition:
+                    while not self._queue:
+                        self._condition.wait()
+                    _, _, _, model, tokens, _, _ = self._queue[0]
+                buckets = self._buckets_for(model)
+                wait = max(buckets[0].wait_time(1), buckets[1].wait_time(tokens)) if buckets else 0
+                if wait > 0:
+                    wait = min(wait, POLL_INTERVAL)
+                    self._count("throttled_seconds", wait)
+                    time.sleep(wait)
+                    continue
+                with self._condition:
+                    # The head may have changed while the buckets were checked; send it on the next pass
+                    if not self._queue or self._queue[0][3] != model or self._queue[0][4] > tokens:
+                        continue
+                    entry = heapq.heappop(self._queue)
+                if buckets:
+                    buckets[0].consume(1)
+                    buckets[1].consume(entry[4])
+                return entry
+
+    def _work(self):
+        while True:
+            priority, _, fn, model, tokens, future, attempt = self._next()
+            if attempt == 0 and not future.set_running_or_notify_cancel():
+                continue
+            self._run(priority, fn, model, tokens, future, attempt)
+
+    def _run(self, priority, fn, model, tokens, future, attempt):
+        self._count("requests")
+        try:
+            result = fn()
+        except Exception as e:
+            if attempt >= self.max_retries or not is_retryable(e):
+                self._count("failures")
+                future.set_exception(e)
+                return
+            self._count("retries")
+            # Full jitter keeps concurrent retries from hitting the provider in lockstep; the request
+            # is re-queued after the delay so the worker is free to serve others meanwhile
+            delay = max(random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt)), retry_after(e) or 0)
+            timer = threading.Timer(delay, self._push, (priority, fn, model, tokens, future, attempt + 1))
+            timer.daemon = True
+            timer.start()
+            return
+
+        # Correct the token estimate with what the provider reports, when it does
+        usage = getattr(result, "usage", None)
+        actual = getattr(usage, "total_tokens", None)
+        buckets = self._buckets_for(model)
+        if buckets and isinstance(actual, (int, float)):
+            buckets[1].consume(actual - tokens)
+        future.set_result(result)
+
+
+class ScheduledClient:
+    """
+    Wraps an LLM client so chat.completions.create goes through an LLMScheduler.
+
+    Call sites keep using client.chat.completions.create(...) unchanged.
+    """
+    def __init__(self, client, scheduler: LLMScheduler, priority: int = INTERACTIVE):
+        self.client = client
+        self.scheduler = scheduler
+        self.priority = priority
+        self.chat = self
+        self.completions = self
+
+    def create(self, **kwargs):
+        prompt_chars = sum(len(str(message.get("content", ""))) for message in kwargs.get("messages", []))
+        tokens = prompt_chars // 4 + kwargs.get("max_tokens", 0)
+        model = kwargs.get("model", "")
+        with span("llm.call", model=model, priority=self.priority, stream=bool(kwargs.get("stream")), attempts=0) as attrs:
+            submitted = time.perf_counter()
+
+            def call():
+                # Time spent waiting in the queue and on the rate limits, up to the last attempt
+                attrs["queued_seconds"] = round(time.perf_counter() - submitted, 4)
+                attrs["attempts"] += 1
+                return self.client.chat.completions.create(**kwargs)
+
+            response = self.scheduler.call(call, model=model, tokens=tokens, priority=self.priority)
+            usage = getattr(response, "usage", None)
+            if usage is not None:
+                attrs["prompt_tokens"] = getattr(usage, "prompt_tokens", 0)
+                attrs["completion_tokens"] = getattr(usage, "completion_tokens", 0)
+                attrs["tokens"] = getattr(usage, "total_tokens", 0)
+            return response
@@ -1,17 +1,53 @@
-from groq import Groq
-from dotenv import load_dotenv
-import os
 import json
-import requests
-# Load environment variables from .env file
-load_dotenv()
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from .llm import get_backend, get_scheduled_client
+from .llm_scheduler import INTERACTIVE
+from .sentiment_cache import SentimentCache
+from .tracing import bind, span, traced
 
-# Get the API key from the environment variables
-api_key = os.getenv('GROQ_API_KEY')
+ANALYSIS1_MODEL = "gemma2-9b-it"
+ANALYSIS2_MODEL = "llama3-8b-8192"
+AGGREGATOR_MODEL = "llama-3.1-8b-instant"
+FAST_MODEL = "llama-3.1-8b-instant"
+BATCH_MODEL = "llama-3.1-8b-instant"
+
+# Per-article analysis modes and the models each one calls
+#   ensemble: two free-text analyses with different models, then an aggregation call
+#   fast:     one JSON-mode call that returns the final sentiment object directly
+#   batch:    several articles packed into one JSON-mode call, up to BATCH_TOKEN_BUDGET
+ANALYSIS_MODES = {
+    "ensemble": (ANALYSIS1_MODEL, ANALYSIS2_MODEL, AGGREGATOR_MODEL),
+    "fast": (FAST_MODEL,),
+    "batch": (BATCH_MODEL,),
+}
+
+# Approximate input tokens of article text packed into one batch request
+BATCH_TOKEN_BUDGET = 4000
+
+# Bump whenever a per-article prompt changes so cached sentiments are not reused
+PROMPT_VERSION = "1"
 
 class NewsAnalyzer:
-    def __init__(self):
-        self.client = Groq(api_key=api_key)
+    def __init__(self, use_cache=True, cache=None, client=None, mode="ensemble", priority=INTERACTIVE, backend=None):
+        """
+        :param use_cache: Reuse per-article results from the on-disk sentiment cache
+        :param cache: SentimentCache to use instead of the default one
+        :param client: LLM client to use as is, instead of the shared scheduled one from tools.llm
+        :param mode: Per-article analysis mode, one of ANALYSIS_MODES
+        :param priority: Scheduler priority of this analyzer's calls (INTERACTIVE or BATCH)
+        :param backend: LLM backend from tools.llm.BACKENDS, the configured one (LLM_BACKEND) if omitted
+        """
+        if mode not in ANALYSIS_MODES:
+            raise ValueError(f"Unknown analysis mode: {mode}")
+        self._client = client
+        self.cache = (cache or SentimentCache()) if use_cache else None
+        self.mode = mode
+        self.priority = priority
+        self.backend = backend or get_backend()
+
+    @property
+    def client(self):
+        return self._client or get_scheduled_client(self.priority, self.backend)
 
     def analysis1(self, article_text, ticker, counter):
         """Perform sentiment analysis on the article."""
@@ -33,7 +69,7 @@ class NewsAnalyzer:
         try:
             response = self.client.chat.completions.create(
                 messages=[{"role": "user", "content": prompt}],
-                model="gemma2-9b-it",
+                model=ANALYSIS1_MODEL,
                 temperature=0.5,
                 max_tokens=500,
 
@@ -64,7 +100,7 @@ class NewsAnalyzer:
 
             response = self.client.chat.completions.create(
                 messages=[{"role": "user", "content": prompt}],
-                model="llama3-8b-8192",
+                model=ANALYSIS2_MODEL,
                 temperature=0.5,
                 max_tokens=500,
 
@@ -91,22 +127,53 @@ class NewsAnalyzer:
 
         High quality summary:
         """
-        
-        response = self.client.chat.completions.create(
-            messages=[{"role": "user", "content": prompt}],
-            model="llama-3.1-8b-instant",
-            temperature=0.5,
-            max_tokens=500,
-        )
+        try:
+            response = self.client.chat.completions.create(
+                messages=[{"role": "user", "content": prompt}],
+                model=AGGREGATOR_MODEL,
+                temperature=0.5,
+                max_tokens=500,
+            )
+        except Exception as e:
+            # The scheduler has already retried rate limits and server errors by now
+            print(f"Aggregation failed: {e}")
+            return None
         try:
             return json.loads(response.choices[0].message.content)
         except json.JSONDecodeError:
             return self.json_check(response.choices[0].message.content)
 
     def analyze_news_article(self, article_text, ticker, counter):
-        """Main function to analyze a news article using multiple models and aggregate results."""
-        analysis1 = self.analysis1(article_text, ticker, counter)
-        analysis2 = self.analysis2(article_text, ticker, counter)
+        """Main function to analyze a news article, served from the sentiment cache when possible."""
+        # A single article in batch mode is just a fast-mode call
+        analyze = self._analyze_news_article if self.mode == "ensemble" else self.analyze_news_article_fast
+        with span("news.analyze_article", mode=self.mode, article=counter) as attrs:
+            if self.cache is None:
+                return analyze(article_text, ticker, counter)
+
+            key = self._cache_key(article_text, ticker)
+            cached = self.cache.get(key)
+            attrs["cached"] = cached is not None
+            if cached is not None:
+                return cached
+
+            compiled_analysis = analyze(article_text, ticker, counter)
+            # Failed analyses are not cached so the next run retries them
+            if compiled_analysis:
+                self.cache.set(key, compiled_analysis)
+        return compiled_analysis
+
+    def _cache_key(self, article_text, ticker):
+        return SentimentCache.make_key(article_text, ticker, (self.backend, self.mode) + ANALYSIS_MODES[self.mode], PROMPT_VERSION)
+
+    def _analyze_news_article(self, article_text, ticker, counter):
+        """Analyze a news article using multiple models and aggregate results."""
+        # The two analyses are independent, so run them side by side
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            future1 = executor.submit(bind(self.analysis1), article_text, ticker, counter)
+            future2 = executor.submit(bind(self.analysis2), article_text, ticker, counter)
+            analysis1 = future1.result()
+            analysis2 = future2.result()
 
         if analysis1 and analysis2:
             compiled_analysis = self.aggregate_results(analysis1, analysis2, ticker)
@@ -114,6 +181,141 @@ class NewsAnalyzer:
         
         return None
     
+    def analyze_news_article_fast(self, article_text, ticker, counter):
+        """Analyze a news article with a single JSON-mode call instead of the three-call ensemble."""
+        prompt = f"""
+        You are an expert stock analyst. Read the following news article about the stock with ticker {ticker}. Consider its sentiment, tone and emotional content, 
+        its key points, and any potential bias in the language used.
+
+        Give a score rating of sentiment in the perspective of a stock analyst analyzing the stock with ticker {ticker} on a scale from -1 (very negative) to 1 (very positive), and give 2 reasons why you gave that score. Your answer will strictly be a JSON object with keys: Sentiment Score, Reason 1, Reason 2. Do not deviate from this template, do not add anything else.
+
+        Article:
+        {article_text}
+        """
+        try:
+            response = self.client.chat.completions.create(
+                messages=[{"role": "user", "content": prompt}],
+                model=FAST_MODEL,
+                temperature=0.5,
+                max_tokens=500,
+                response_format={"type": "json_object"},
+            )
+        except Exception as e:
+            return None
+        try:
+            return json.loads(response.choices[0].message.content)
+        except json.JSONDecodeError:
+            return self.json_check(response.choices[0].message.content)
+
+    @staticmethod
+    def estimate_tokens(text):
+        """Rough token count for budgeting (about 4 characters per token)."""
+        return len(text) // 4 + 1
+
+    def pack_batches(self, articles, token_budget=BATCH_TOKEN_BUDGET):
+        """
+        Group articles into batches whose combined text stays within token_budget.
+
+        :param articles: Dictionary of (title, url) -> article text
+        :return: List of batches, each a list of (title, url) keys in their original order
+        """
+        batches = []
+        current, current_tokens = [], 0
+        for key, text in articles.items():
+            tokens = self.estimate_tokens(text)
+            # An article bigger than the budget still gets a batch of its own
+            if current and current_tokens + tokens > token_budget:
+                batches.append(current)
+                current, current_tokens = [], 0
+            current.append(key)
+            current_tokens += tokens
+        if current:
+            batches.append(current)
+        return batches
+
+    def analyze_batch(self, articles, ticker):
+        """
+        Analyze several articles in one JSON-mode request.
+
+        :param articles: Dictionary of (title, url) -> article text
+        :return: Dictionary of (title, url) -> sentiment for every article the response covered,
+                 or None if the response could not be parsed at all
+        """
+        keys = list(articles)
+        sections = "\n\n".join(
+            f"Article {number}:\nTitle: {key[0]}\n{articles[key]}" for number, key in enumerate(keys, start=1)
+        )
+        prompt = f"""
+        You are an expert stock analyst. You are given {len(keys)} news articles about the stock with ticker {ticker}. For each article, consider its sentiment, tone and emotional content, 
+        its key points, and any potential bias in the language used.
+
+        For each article, give a score rating of sentiment in the perspective of a stock analyst analyzing the stock with ticker {ticker} on a scale from -1 (very negative) to 1 (very positive), and give 2 reasons why you gave that score. Your answer will strictly be a JSON object with a single key "articles" holding an array with one object per article, in the same order, each with keys: Article, Sentiment Score, Reason 1, Reason 2. Article is the article number. Do not deviate from this template, do not add anything else.
+
+        {sections}
+        """
+        try:
+            response = self.client.chat.completions.create(
+                messages=[{"role": "user", "content": prompt}],
+                model=BATCH_MODEL,
+                temperature=0.5,
+                max_tokens=150 * len(keys) + 100,
+                response_format={"type": "json_object"},
+            )
+            parsed = json.loads(response.choices[0].message.content)
+        except Exception as e:
+            print(f"Batch analysis failed: {e}")
+            return None
+
+        entries = parsed.get("articles") if isinstance(parsed, dict) else parsed
+        if not isinstance(entries, list):
+            return None
+
+        results = {}
+        for position, entry in enumerate(entries):
+            if not isinstance(entry, dict) or not all(k in entry for k in ("Sentiment Score", "Reason 1", "Reason 2")):
+                continue
+            # Prefer the article number the model echoed back, otherwise trust the array order
+            try:
+                index = int(entry.get("Article", position + 1)) - 1
+            except (TypeError, ValueError):
+                index = position
+            if 0 <= index < len(keys) and keys[index] not in results:
+                results[keys[index]] = {k: entry[k] for k in ("Sentiment Score", "Reason 1", "Reason 2")}
+        return results
+
+    def iter_analyze_batches(self, articles, ticker, max_workers=4, token_budget=BATCH_TOKEN_BUDGET):
+        """
+        Analyze articles in token-budgeted batches, yielding ((title, url), sentiment) as batches finish.
+
+        Articles missing from a batch response (or from every batch that failed to parse) fall back
+        to one fast-mode call each. Cached articles are yielded first without any model call.
+        """
+        pending = {}
+        for key, text in articles.items():
+            cached = self.cache.get(self._cache_key(text, ticker)) if self.cache is not None else None
+            if cached is not None:
+                yield key, cached
+            else:
+                pending[key] = text
+
+        def run(batch):
+            with span("news.analyze_batch", articles=len(batch)) as attrs:
+                results = self.analyze_batch({key: pending[key] for key in batch}, ticker) or {}
+                attrs["fallbacks"] = sum(key not in results for key in batch)
+                for counter, key in enumerate(batch):
+                    if key not in results:
+                        results[key] = self.analyze_news_article_fast(pending[key], ticker, counter)
+                return results
+
+        with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+            futures = [executor.submit(bind(run), batch) for batch in self.pack_batches(pending, token_budget)]
+            for future in as_completed(futures):
+                for key, sentiment in future.result().items():
+                    if sentiment and self.cache is not None:
+                        self.cache.set(self._cache_key(pending[key], ticker), sentiment)
+                    yield key, sentiment
+
+    @traced("news.conclusion")
     def conclusion(self, compiled_analysis, ticker):
         """Aggregate and synthesize the results from all 10 articles."""
         prompt = f"""
@@ -124,13 +326,17 @@ class NewsAnalyzer:
 
         High quality summary:
         """
-        
-        response = self.client.chat.completions.create(
-            messages=[{"role": "user", "content": prompt}],
-            model="llama-3.1-8b-instant",
-            temperature=0.5,
-            max_tokens=500,
-        )
+        try:
+            response = self.client.chat.completions.create(
+                messages=[{"role": "user", "content": prompt}],
+                model=AGGREGATOR_MODEL,
+                temperature=0.5,
+                max_tokens=500,
+            )
+        except Exception as e:
+            # The scheduler has already retried rate limits and server errors by now
+            print(f"Conclusion failed: {e}")
+            return None
         try:
             return json.loads(response.choices[0].message.content)
         except json.JSONDecodeError:
@@ -149,12 +355,16 @@ class NewsAnalyzer:
             prompt = f"""
             You are to reformat the output into a JSON object. Ensure that the output is strictly in JSON format and nothing else. Do not change the content of the output, only the format. This is the output you need to reformat: {output}
             """
-            response = self.client.chat.completions.create(
-                messages=[{"role": "user", "content": prompt}],
-                model="llama-3.1-8b-instant",
-                temperature=0.5,
-                max_tokens=500,
-            )
+            try:
+                response = self.client.chat.completions.create(
+                    messages=[{"role": "user", "content": prompt}],
+                    model=AGGREGATOR_MODEL,
+                    temperature=0.5,
+                    max_tokens=500,
+                )
+            except Exception as e:
+                print(f"Reformatting failed: {e}")
+                return None
             try:
                 return json.loads(response.choices[0].message.content)
             except json.JSONDecodeError:
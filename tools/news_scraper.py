@@ -1,52 +1,216 @@
+import threading
+from collections import OrderedDict
 import requests
-from bs4 import BeautifulSoup
+from lxml import html as lxml_html
 from newspaper import Article
+from newspaper.article import ArticleException
+from requests.adapters import HTTPAdapter
+from concurrent.futures import ThreadPoolExecutor, as_completed, TimeoutError
+from .article_index import ArticleIndex
+from .result_cache import cached
+from .tracing import bind, span
+
+LISTING_URL = "https://sg.finance.yahoo.com/quote/{ticker}/news/"
+# (connect, read) timeouts in seconds for the news listing page
+LISTING_TIMEOUT = (3.05, 10)
+# Listing pages whose ETag/Last-Modified are remembered for conditional requests
+MAX_LISTING_VALIDATORS = 256
+# Each stream item's first article link; class tests match whole words, like the CSS selector li.stream-item a.subtle-link
+STREAM_ITEM_XPATH = "//li[contains(concat(' ', normalize-space(@class), ' '), ' stream-item ')]"
+SUBTLE_LINK_XPATH = ".//a[contains(concat(' ', normalize-space(@class), ' '), ' subtle-link ')]"
+
+_session = None
+_session_lock = threading.Lock()
+# url -> (validators to send back, page html), least recently used first
+_listing_pages = OrderedDict()
+_listing_lock = threading.Lock()
+
+
+def get_session():
+    """
+    The requests.Session every NewsScraper fetches listing pages with.
+
+    Sharing it keeps connections to Yahoo alive between tickers and between dashboard runs.
+    """
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=16)
+            _session.mount("http://", adapter)
+            _session.mount("https://", adapter)
+        return _session
+
+
+def parse_listing(html, limit=8):
+    """
+    Extract {title: url} for the first limit stream items of a news listing page.
+
+    Only the stream items are walked, with lxml's XPath, instead of building a full
+    BeautifulSoup tree of the page with the pure-Python parser.
+    """
+    news_data = {}
+    if not html or not html.strip():
+        return news_data
+    for item in lxml_html.fromstring(html).xpath(STREAM_ITEM_XPATH):
+        if len(news_data) >= limit:
+            break
+        links = item.xpath(SUBTLE_LINK_XPATH)
+        if links and links[0].get("title"):
+            news_data[links[0].get("title")] = links[0].get("href")
+    return news_data
+
 
 class NewsScraper:
-    def __init__(self):
+    def __init__(self, max_workers=8, article_timeout=7, deadline=20, result_cache=None, session=None, listing_timeout=LISTING_TIMEOUT,
+                 listing_url=LISTING_URL, use_index=True, index=None):
+        """
+        :param max_workers: Maximum number of articles downloaded at the same time
+        :param article_timeout: Per-article request timeout in seconds
+        :param deadline: Total time budget in seconds for collecting a batch of articles
+        :param result_cache: ResultCache scraped articles are kept in, none if omitted
+        :param session: requests.Session for listing pages, the shared get_session() if omitted
+        :param listing_timeout: Listing page timeout in seconds, or a (connect, read) tuple
+        :param listing_url: News listing URL template with a {ticker} field
+        :param use_index: Serve articles downloaded by earlier runs from the on-disk ArticleIndex
+        :param index: ArticleIndex to use instead of the default one
+        """
         self.headers = {
             "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
         }
+        self.max_workers = max(1, max_workers)
+        self.article_timeout = article_timeout
+        self.deadline = deadline
+        self.result_cache = result_cache
+        self.session = session or get_session()
+        self.listing_timeout = listing_timeout
+        self.listing_url = listing_url
+        self.index = (index or ArticleIndex()) if use_index else None
+
+    def fetch_listing_html(self, url):
+        """
+        Download the HTML of a news listing page.
+
+        Sends the ETag/Last-Modified of the previous copy, if the server gave any, and reuses that
+        copy when the page has not changed (304 Not Modified).
+        """
+        with span("news.listing", url=url) as attrs:
+            with _listing_lock:
+                validators, previous = _listing_pages.get(url, ({}, None))
+            response = self.session.get(url, headers={**self.headers, **validators}, timeout=self.listing_timeout)
+            attrs["bytes"] = len(response.content)
+            attrs["not_modified"] = response.status_code == 304 and previous is not None
+            if attrs["not_modified"]:
+                with _listing_lock:
+                    if url in _listing_pages:
+                        _listing_pages.move_to_end(url)
+                return previous
+            response.raise_for_status()
+
+            validators = {}
+            if response.headers.get("ETag"):
+                validators["If-None-Match"] = response.headers["ETag"]
+            if response.headers.get("Last-Modified"):
+                validators["If-Modified-Since"] = response.headers["Last-Modified"]
+            if validators:
+                with _listing_lock:
+                    _listing_pages[url] = (validators, response.text)
+                    _listing_pages.move_to_end(url)
+                    while len(_listing_pages) > MAX_LISTING_VALIDATORS:
+                        _listing_pages.popitem(last=False)
+            return response.text
 
     def get_news(self, ticker, limit=8):
-        url = f"https://sg.finance.yahoo.com/quote/{ticker}/news/"
+        url = self.listing_url.format(ticker=ticker)
 
         try:
-            response = requests.get(url, headers=self.headers)
-            response.raise_for_status()
+            html = self.fetch_listing_html(url)
         except requests.RequestException as e:
             print(f"Error fetching the webpage: {e}")
             return None
 
-        soup = BeautifulSoup(response.text, 'html.parser')
-        news_items = soup.find_all('li', class_='stream-item')
-
-        news_data = {}
-        count = 0
-        for item in news_items:
-            if count >= limit:
-                break
-            element = item.find('a', class_='subtle-link')
-            if element:
-                title = element['title']
-                link = element['href']
-                news_data[title] = link
-                count += 1
+        with span("news.listing_parse", url=url):
+            return parse_listing(html, limit)
 
-        return news_data
+    def _article(self, url):
+        return Article(url, request_timeout=self.article_timeout, browser_user_agent=self.headers["User-Agent"])
+
+    def fetch_article_html(self, url):
+        """Download the HTML of a single article page."""
+        with span("news.article_download", url=url) as attrs:
+            article = self._article(url)
+            article.download()
+            if article.download_exception_msg:
+                raise ArticleException(article.download_exception_msg)
+            attrs["bytes"] = len(article.html.encode())
+            return article.html
+
+    def download_article(self, url):
+        """Download and parse a single article, returning the parsed newspaper Article."""
+        # Downloading and parsing are separate steps so the download can be recorded or replayed
+        html = self.fetch_article_html(url)
+        with span("news.article_parse", url=url) as attrs:
+            article = self._article(url)
+            article.download(input_html=html)
+            article.parse()
+            attrs["chars"] = len(article.text)
+            return article
+
+    def fetch_article(self, url):
+        """Download and parse a single article, returning its text."""
+        return self.download_article(url).text
+
+    def _download_and_index(self, title, url):
+        article = self.download_article(url)
+        # Empty extractions (paywalls, consent pages) are not indexed so the next run tries again
+        if self.index is not None and article.text:
+            published = article.publish_date.timestamp() if article.publish_date else None
+            self.index.put(url, article.text, title=title, published_at=published)
+        return article.text
+
+    def iter_news_data(self, news_data):
+        """
+        Download articles in parallel and yield ((title, url), text) as each one finishes.
+
+        Articles found in the index are yielded first without downloading, so only URLs not
+        seen by an earlier run cost a request. Articles still running when the deadline passes
+        are dropped rather than waited on.
+        """
+        if not news_data:
+            return
+        known = {}
+        if self.index is not None:
+            with span("news.article_index", articles=len(news_data)) as attrs:
+                known = self.index.get_many(news_data.values())
+                attrs["hits"] = len(known)
+        for title, url in news_data.items():
+            if url in known:
+                yield (title, url), known[url]["text"]
+        unseen = {title: url for title, url in news_data.items() if url not in known}
+        if not unseen:
+            return
+
+        executor = ThreadPoolExecutor(max_workers=min(self.max_workers, len(unseen)))
+        futures = {executor.submit(bind(self._download_and_index), title, url): (title, url) for title, url in unseen.items()}
+        try:
+            for future in as_completed(futures, timeout=self.deadline):
+                try:
+                    yield futures[future], future.result()
+                except Exception as e:
+                    print(f"Error processing article: {e}")
+        except TimeoutError:
+            pending = sum(1 for future in futures if not future.done())
+            print(f"Deadline of {self.deadline}s reached, dropping {pending} unfinished article(s)")
+        finally:
+            # Don't block on stragglers; their threads finish in the background
+            executor.shutdown(wait=False, cancel_futures=True)
 
     def collect_news_data(self, news_data):
-        articles = {}
-        for key, value in news_data.items():
-            try:
-                article = Article(value)
-                article.download()
-                article.parse()
-                articles[key, value] = article.text
-            except Exception as e:
-                print(f"Error processing article: {e}")
-        return articles
+        finished = dict(self.iter_news_data(news_data))
+        # Keep the listing order so downstream numbering doesn't depend on download speed
+        return {(title, url): finished[title, url] for title, url in news_data.items() if (title, url) in finished}
 
+    @cached("news", key=lambda self, ticker: ticker.upper())
     def scrape_and_collect(self, ticker):
         news_data = self.get_news(ticker)
         if news_data:
@@ -0,0 +1,76 @@
+"""
+Pure-Python analysis pipeline, usable without Streamlit.
+
+Returns the same stock information, history analysis and news analysis the dashboard shows.
+Heavy modules (yfinance, groq, newspaper) are imported only when the step needing them runs.
+"""
+import json
+import math
+from typing import Any, Dict
+
+
+def get_stock_info(ticker: str) -> Dict[str, Any]:
+    """Key company and valuation fields, as shown in the Stock & Company Information tab."""
+    from .stock import Stock
+    from .processor import StockInfoProcessor
+
+    return StockInfoProcessor().process(Stock(ticker).get_info())
+
+
+def get_history_analysis(ticker: str, rating: bool = True) -> Dict[str, Any]:
+    """
+    Key metrics for the last year of prices, plus the model's rating when rating is True.
+
+    :return: {"indicators": {...}, "analysis": {"Rating": ..., "Reason 1": ..., ...} or None}
+    """
+    from .stock import Stock
+    from .processor import StockHistoryProcessor
+
+    processor = StockHistoryProcessor()
+    indicators = processor.preprocess(Stock(ticker).get_history())
+    analysis = json.loads(processor.process(indicators)) if rating else None
+    return {"indicators": indicators, "analysis": analysis}
+
+
+def get_news_analysis(ticker: str, max_workers: int = 4, mode: str = "ensemble") -> Dict[str, Any]:
+    """
+    Overall news sentiment and the per-article results, as shown in the News Analysis tab.
+
+    :param mode: Per-article analysis mode, "ensemble", "fast" or "batch"
+
+    :return: {"conclusion": {...}, "articles": [{"title": ..., "url": ..., "Sentiment Score": ..., ...}]}
+    """
+    from .processor import NewsProcessor
+
+    conclusion, title_url_sentiment = NewsProcessor(max_workers=max_workers, mode=mode).process(ticker)
+    articles = [{"title": title, "url": url, **sentiment} for (title, url), sentiment in title_url_sentiment.items()]
+    return {"conclusion": conclusion, "articles": articles}
+
+
+def analyze(ticker: str, info: bool = True, history: bool = True, news: bool = True, rating: bool = True, news_mode: str = "ensemble") -> Dict[str, Any]:
+    """
+    Run the selected parts of the analysis for one ticker.
+
+    :return: Dictionary with "ticker" and one key per part that was run ("info", "history", "news")
+    """
+    result = {"ticker": ticker.upper()}
+    if info:
+        result["info"] = get_stock_info(ticker)
+    if history:
+        result["history"] = get_history_analysis(ticker, rating=rating)
+    if news:
+        result["news"] = get_news_analysis(ticker, mode=news_mode)
+    return result
+
+
+def to_jsonable(value):
+    """Convert numpy scalars, NaN and tuple keys so the result can be passed to json.dumps."""
+    if isinstance(value, dict):
+        return {str(k) if not isinstance(k, str) else k: to_jsonable(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [to_jsonable(v) for v in value]
+    if hasattr(value, "item") and not isinstance(value, (str, bytes)):
+        value = value.item()
+    if isinstance(value, float) and not math.isfinite(value):
+        return None
+    return value
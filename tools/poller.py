@@ -0,0 +1,154 @@
+"""
+Background poller: keep precomputed dashboard results fresh for a fixed set of tickers.
+
+Usage: python -m tools poll AAPL MSFT NVDA [--price-interval 900] [--news-interval 3600]
+       python -m tools poll --file watchlist.txt --once
+
+Every price interval each ticker's information, price history metrics, analyst report and rating
+are recomputed, and every news interval its news is scraped and analyzed. Results go to the shared
+ResultsStore, where the dashboard picks them up instead of computing on demand.
+
+The poller runs its own LLM scheduler, separate from the dashboard's, but both spend the same API
+key's per-minute limits. It therefore schedules against --llm-share of each model's limits (default
+POLLER_RATE_SHARE, 0.3) and the dashboard by default against the remaining 0.7. With a different
+--llm-share, start the dashboard with LLM_RATE_SHARE set to 1 minus it.
+"""
+import argparse
+import json
+import os
+import time
+from typing import List
+from .batch import read_watchlist
+from .llm import BACKENDS
+from .llm_scheduler import BATCH, POLLER_RATE_SHARE
+from .processor import NewsProcessor, StockHistoryProcessor, StockInfoProcessor
+from .results_store import ResultsStore
+from .stock import Stock
+from .tracing import start_trace
+
+
+class Poller:
+    """Recompute each ticker's results on its own schedule and write them to a ResultsStore."""
+    def __init__(
+        self,
+        tickers: List[str],
+        price_interval: float = 15 * 60,
+        news_interval: float = 60 * 60,
+        news_mode: str = "ensemble",
+        include_rating: bool = True,
+        include_news: bool = True,
+        store: ResultsStore = None,
+    ):
+        """
+        :param tickers: Ticker symbols to keep fresh
+        :param price_interval: Seconds between recomputing information, history and rating
+        :param news_interval: Seconds between rescraping and reanalyzing news
+        :param news_mode: Per-article news analysis mode, "ensemble", "fast" or "batch"
+        :param include_rating: Ask the model for the analyst report and rating of the price history
+        :param include_news: Scrape and analyze news
+        :param store: ResultsStore to write to instead of the default one
+        """
+        self.tickers = [ticker.upper() for ticker in tickers]
+        self.intervals = {"prices": price_interval}
+        if include_news:
+            self.intervals["news"] = news_interval
+        self.news_mode = news_mode
+        self.include_rating = include_rating
+        self.store = store or ResultsStore()
+        self.stock_info_processor = StockInfoProcessor()
+        self.history_processor = StockHistoryProcessor(priority=BATCH)
+        self.news_processor = NewsProcessor(mode=news_mode, priority=BATCH)
+        # (ticker, job) -> time.time() when it is due next
+        self.due = {(ticker, job): 0.0 for ticker in self.tickers for job in self.intervals}
+
+    def poll_prices(self, ticker: str) -> None:
+        stock = Stock(ticker)
+        self.store.put(ticker, "info", self.stock_info_processor.process(stock.get_info()))
+        indicators = self.history_processor.preprocess(stock.get_history())
+        history = {"indicators": indicators, "report": None, "rating": None}
+        if self.include_rating:
+            history["report"] = "".join(self.history_processor.stream_report(indicators))
+            history["rating"] = json.loads(self.history_processor.rate(history["report"]))
+        self.store.put(ticker, "history", history)
+
+    def poll_news(self, ticker: str) -> None:
+        conclusion, title_url_sentiment = self.news_processor.process(ticker)
+        # A failed conclusion leaves the previous result in place
+        if not conclusion:
+            print(f"{ticker}: news conclusion unavailable, keeping the stored result")
+            return
+        articles = [[title, url, sentiment] for (title, url), sentiment in title_url_sentiment.items()]
+        news = {"articles": articles, "conclusion": conclusion, "stats": self.news_processor.last_stats}
+        self.store.put(ticker, f"news:{self.news_mode}", news)
+
+    def run_due(self) -> int:
+        """Run every job that is due now; return how many ran."""
+        ran = 0
+        for (ticker, job), due in sorted(self.due.items(), key=lambda item: item[1]):
+            if due > time.time():
+                continue
+            start = time.perf_counter()
+            try:
+                with start_trace(f"poll {ticker} {job}"):
+                    getattr(self, f"poll_{job}")(ticker)
+                print(f"{ticker}: {job} updated in {time.perf_counter() - start:.1f}s")
+            except Exception as e:
+                print(f"{ticker}: {job} failed: {e}")
+            # Scheduled from the end of the run, so a slow run doesn't queue the next one straight away
+            self.due[ticker, job] = time.time() + self.intervals[job]
+            ran += 1
+        return ran
+
+    def run(self, once: bool = False) -> None:
+        """Poll until interrupted, or a single round if once is True."""
+        while True:
+            self.run_due()
+            if once:
+                return
+            time.sleep(max(1.0, min(self.due.values()) - time.time()))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("tickers", nargs="*", help="Ticker symbols to keep fresh")
+    parser.add_argument("--file", help="Watchlist file with one ticker per line")
+    parser.add_argument("--price-interval", type=float, default=15 * 60, help="Seconds between price, information and rating updates")
+    parser.add_argument("--news-interval", type=float, default=60 * 60, help="Seconds between news updates")
+    parser.add_argument("--news-mode", choices=["ensemble", "fast", "batch"], default="ensemble", help="Per-article news analysis mode")
+    parser.add_argument("--no-rating", action="store_true", help="Skip the LLM report and rating of the price history")
+    parser.add_argument("--no-news", action="store_true", help="Skip news scraping and sentiment analysis")
+    parser.add_argument("--backend", choices=BACKENDS, help="LLM backend, overriding LLM_BACKEND")
+    parser.add_argument("--llm-share", type=float, default=POLLER_RATE_SHARE,
+                        help="Fraction of each model's rate limits the poller may use, overriding LLM_RATE_SHARE")
+    parser.add_argument("--once", action="store_true", help="Update every ticker once and exit")
+    args = parser.parse_args(argv)
+    if args.backend:
+        os.environ["LLM_BACKEND"] = args.backend
+    if not 0 < args.llm_share <= 1:
+        parser.error("--llm-share must be in (0, 1]")
+    # Read when the scheduler starts, on the first LLM call
+    os.environ["LLM_RATE_SHARE"] = str(args.llm_share)
+
+    tickers = list(args.tickers)
+    if args.file:
+        tickers.extend(read_watchlist(args.file))
+    if not tickers:
+        parser.error("no tickers given")
+
+    poller = Poller(
+        tickers,
+        price_interval=args.price_interval,
+        news_interval=args.news_interval,
+        news_mode=args.news_mode,
+        include_rating=not args.no_rating,
+        include_news=not args.no_news,
+    )
+    print(f"Polling {len(poller.tickers)} ticker(s) into {poller.store.path}")
+    try:
+        poller.run(once=args.once)
+    except KeyboardInterrupt:
+        print("Poller stopped")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,17 +1,14 @@
 from abc import ABC, abstractmethod
-from .news_analyzer import NewsAnalyzer
-from .news_scraper import NewsScraper
+from .indicators import build_indicator_frame, compute_batch_metrics, stack_histories
 import numpy as np
+import time
 from typing import Dict, Any
-import sys
-import os
-from groq import Groq
-from dotenv import load_dotenv
-load_dotenv()
-api_key = os.getenv('GROQ_API_KEY')
-client = Groq(api_key=api_key)
-# Add the project root to the Python path
-sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from .llm import get_backend, get_scheduled_client
+from .llm_scheduler import INTERACTIVE
+from .result_cache import cached, make_key
+from .tracing import bind, record, span, traced
+from .text_prep import ArticlePreprocessor, PROMPTS_PER_ARTICLE
 
 
 
@@ -20,7 +17,13 @@ class Processor(ABC):
     def process(self, data):
         pass
 
+def _analysis_key(processor, *args):
+    """Key for results that depend on the inputs and on the LLM backend that produced them."""
+    return make_key(args, processor.backend or get_backend())
+
+
 class StockInfoProcessor(Processor):
+    @traced("processor.stock_info")
     def process(self, data):
         """
         Extract key information for stock analysis from the given data.
@@ -117,6 +120,28 @@ class StockInfoProcessor(Processor):
 
 
 class NewsProcessor(Processor):
+    def __init__(self, max_workers: int = 4, mode: str = "ensemble", preprocessor=None, priority=INTERACTIVE, backend=None, result_cache=None):
+        """
+        Initialize the NewsProcessor.
+
+        :param max_workers: Maximum number of articles analyzed concurrently (1 = sequential)
+        :param mode: Analysis mode passed to NewsAnalyzer ("ensemble", "fast" or "batch")
+        :param preprocessor: ArticlePreprocessor applied before analysis, a default one if omitted
+        :param priority: Scheduler priority of the analysis calls (INTERACTIVE or BATCH)
+        :param backend: LLM backend from tools.llm.BACKENDS, the configured one (LLM_BACKEND) if omitted
+        :param result_cache: ResultCache scraped articles and finished analyses are kept in, none if omitted
+        """
+        self.max_workers = max(1, max_workers)
+        self.mode = mode
+        self.priority = priority
+        self.backend = backend
+        self.result_cache = result_cache
+        # Built on first use and then reused for every ticker this processor handles
+        self.news_scraper = None
+        self.news_analyzer = None
+        self.preprocessor = preprocessor or ArticlePreprocessor()
+        # Token savings and duplicate count from the most recent run
+        self.last_stats = {}
 
     def process(self, ticker):
         """
@@ -125,71 +150,152 @@ class NewsProcessor(Processor):
         :param data: List of dictionaries containing raw news data
         :return: List of dictionaries with extracted key information
         """
-        news_scraper = NewsScraper()
-        news_data = news_scraper.scrape_and_collect(ticker)
-        news_analyzer = NewsAnalyzer()
+        for event, payload in self.iter_process(ticker):
+            if event == "conclusion":
+                return payload
+
+    def iter_process(self, ticker):
+        """
+        Same as process, but yields results as they become available.
+
+        Yields ("article", ((title, url), sentiment)) for each analyzed article in completion order,
+        then ("conclusion", (result, title_url_sentiment)) once every article is done. The final
+        title_url_sentiment keeps the listing order, whatever order the articles finished in.
+
+        A run still fresh in result_cache is replayed from it, articles first, without scraping.
+        """
+        key = ("NewsProcessor.iter_process", _analysis_key(self, ticker.upper(), self.mode))
+        cached_run = self.result_cache.get("news", key) if self.result_cache is not None else None
+        if cached_run is not None:
+            articles, conclusion, self.last_stats = cached_run
+            for result in articles:
+                yield "article", result
+            yield "conclusion", conclusion
+            return
+
+        articles = []
+        for event, payload in self._iter_process(ticker):
+            if event == "article":
+                articles.append(payload)
+            yield event, payload
+        # Runs whose conclusion failed are retried next time instead of being cached
+        if self.result_cache is not None and payload[0]:
+            self.result_cache.set("news", key, (articles, payload, self.last_stats))
+
+    def _iter_process(self, ticker):
+        # Imported here so stock-only use of this module doesn't load newspaper and BeautifulSoup
+        from .news_analyzer import NewsAnalyzer
+        from .news_scraper import NewsScraper
+
+        if self.news_scraper is None:
+            self.news_scraper = NewsScraper(result_cache=self.result_cache)
+        if self.news_analyzer is None:
+            self.news_analyzer = NewsAnalyzer(mode=self.mode, priority=self.priority, backend=self.backend)
+        news_analyzer = self.news_analyzer
+        with span("news.scrape", ticker=ticker) as attrs:
+            news_data = self.news_scraper.scrape_and_collect(ticker)
+            attrs["articles"] = len(news_data or {})
         dct = {}
         title_url_sentiment = {}
-        counter = 0
-        for key, value in news_data.items():
-            title = key[0]
-            url = key[1]
-
-            sentiment = news_analyzer.analyze_news_article(value, ticker, counter)
-            counter +=1
-            print(counter)
-            print(sentiment)
+
+        # Strip, dedupe and truncate before any model sees the text
+        with span("news.preprocess") as attrs:
+            prepared, duplicates, stats = self.preprocessor.run(news_data)
+            attrs["tokens_saved"] = stats["tokens_saved"]
+            attrs["duplicates"] = stats["duplicates"]
+        stats["prompt_tokens_saved"] = stats["tokens_saved"] * PROMPTS_PER_ARTICLE.get(news_analyzer.mode, 1)
+        self.last_stats = stats
+        copies = {}
+        for duplicate, original in duplicates.items():
+            copies.setdefault(original, []).append(duplicate)
+
+        items = list(prepared.items())
+        sentiments = {}
+
+        def finished(key, sentiment):
+            sentiments[key] = sentiment
+            # Duplicates share the sentiment of the copy that was analyzed
+            return [(copy, sentiment) for copy in [key] + copies.get(key, [])] if sentiment else []
+
+        if news_analyzer.mode == "batch":
+            for key, sentiment in news_analyzer.iter_analyze_batches(prepared, ticker, max_workers=self.max_workers):
+                for result in finished(key, sentiment):
+                    yield "article", result
+        else:
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                futures = {
+                    executor.submit(bind(news_analyzer.analyze_news_article), value, ticker, index): index
+                    for index, (key, value) in enumerate(items)
+                }
+                for future in as_completed(futures):
+                    index = futures[future]
+                    sentiment = future.result()
+                    print(index + 1)
+                    print(sentiment)
+                    for result in finished(items[index][0], sentiment):
+                        yield "article", result
+
+        # Each distinct story is counted once in the conclusion
+        for counter, (key, value) in enumerate(items, start=1):
+            if sentiments.get(key):
+                dct[f"Article {counter}:"] = sentiments[key]
+        for key in news_data:
+            sentiment = sentiments.get(duplicates.get(key, key))
             if sentiment:
-                dct[f"Article {counter}:"] = sentiment
-                title_url_sentiment[title, url] = sentiment
-    
+                title_url_sentiment[key] = sentiment
+
         result = news_analyzer.conclusion(dct, ticker)
-        return result, title_url_sentiment
+        yield "conclusion", (result, title_url_sentiment)
         
 class StockHistoryProcessor(Processor):
-    def __init__(self):
+    def __init__(self, client=None, priority=INTERACTIVE, backend=None, result_cache=None):
         """
         Initialize the StockHistoryProcessor with a DataFrame of stock history.
         
         :param df: DataFrame containing stock data with columns: Date, Open, High, Low, Close, Volume
+        :param client: LLM client to use as is, instead of the shared scheduled one from tools.llm
+        :param priority: Scheduler priority of this processor's calls (INTERACTIVE or BATCH)
+        :param backend: LLM backend from tools.llm.BACKENDS, the configured one (LLM_BACKEND) if omitted
+        :param result_cache: ResultCache reports and ratings are kept in, none if omitted
         """
+        self._client = client
+        self.priority = priority
+        self.backend = backend
+        self.result_cache = result_cache
         self.df = ""
+        self.indicators = None
         self.metrics = {}
 
     def calculate_key_metrics(self) -> None:
         """Calculate key metrics and indicators from the stock data."""
+        indicators = self.indicators if self.indicators is not None else build_indicator_frame(self.df)
+
         # Basic price information
         self.metrics['latest_price'] = self.df['Close'].iloc[-1]
         self.metrics['price_change'] = self.df['Close'].iloc[-1] - self.df['Close'].iloc[0]
         self.metrics['price_change_percent'] = (self.metrics['price_change'] / self.df['Close'].iloc[0]) * 100
 
         # Returns
-        self.df['Daily_Return'] = self.df['Close'].pct_change()
+        daily_return = indicators['Daily_Return']
         self.metrics['total_return'] = (self.df['Close'].iloc[-1] / self.df['Close'].iloc[0] - 1) * 100
         self.metrics['annualized_return'] = ((1 + self.metrics['total_return'] / 100) ** (252 / len(self.df)) - 1) * 100
 
         # Volatility
-        self.metrics['volatility'] = self.df['Daily_Return'].std() * np.sqrt(252) * 100
+        self.metrics['volatility'] = daily_return.std() * np.sqrt(252) * 100
 
         # Moving Averages
-        self.metrics['SMA_5'] = self.df['Close'].rolling(window=5).mean().iloc[-1]
-        self.metrics['SMA_10'] = self.df['Close'].rolling(window=10).mean().iloc[-1]
-        self.metrics['SMA_20'] = self.df['Close'].rolling(window=20).mean().iloc[-1]
-        self.metrics['SMA_50'] = self.df['Close'].rolling(window=50).mean().iloc[-1]
-        self.metrics['SMA_200'] = self.df['Close'].rolling(window=200).mean().iloc[-1]
+        self.metrics['SMA_5'] = indicators['SMA_5'].iloc[-1]
+        self.metrics['SMA_10'] = indicators['SMA_10'].iloc[-1]
+        self.metrics['SMA_20'] = indicators['SMA_20'].iloc[-1]
+        self.metrics['SMA_50'] = indicators['SMA_50'].iloc[-1]
+        self.metrics['SMA_200'] = indicators['SMA_200'].iloc[-1]
 
         # Relative Strength Index (RSI)
-        delta = self.df['Close'].diff()
-        gain = (delta.where(delta > 0, 0)).rolling(window=14).mean()
-        loss = (-delta.where(delta < 0, 0)).rolling(window=14).mean()
-        rs = gain / loss
-        self.metrics['RSI'] = 100 - (100 / (1 + rs.iloc[-1]))
+        self.metrics['RSI'] = indicators['RSI'].iloc[-1]
 
         # Bollinger Bands
-        rolling_mean = self.df['Close'].rolling(window=20).mean()
-        rolling_std = self.df['Close'].rolling(window=20).std()
-        self.metrics['upper_bollinger'] = rolling_mean.iloc[-1] + (rolling_std.iloc[-1] * 2)
-        self.metrics['lower_bollinger'] = rolling_mean.iloc[-1] - (rolling_std.iloc[-1] * 2)
+        self.metrics['upper_bollinger'] = indicators['BB_Upper'].iloc[-1]
+        self.metrics['lower_bollinger'] = indicators['BB_Lower'].iloc[-1]
 
         # Volume analysis
         self.metrics['average_volume'] = self.df['Volume'].mean()
@@ -201,15 +307,19 @@ class StockHistoryProcessor(Processor):
 
         # Sharpe Ratio (assuming risk-free rate of 2%)
         risk_free_rate = 0.02
-        excess_returns = self.df['Daily_Return'] - risk_free_rate / 252
+        excess_returns = daily_return - risk_free_rate / 252
         self.metrics['sharpe_ratio'] = np.sqrt(252) * excess_returns.mean() / excess_returns.std()
 
         # Maximum Drawdown
-        cumulative_returns = (1 + self.df['Daily_Return']).cumprod()
+        cumulative_returns = (1 + daily_return).cumprod()
         peak = cumulative_returns.expanding().max()
         drawdown = (cumulative_returns / peak - 1)
         self.metrics['max_drawdown'] = drawdown.min() * 100
 
+    @property
+    def client(self):
+        return self._client or get_scheduled_client(self.priority, self.backend)
+
     def get_metrics_dict(self) -> Dict[str, Any]:
         """
         Return the calculated metrics as a dictionary.
@@ -218,28 +328,86 @@ class StockHistoryProcessor(Processor):
         """
         return self.metrics
     
-    def preprocess(self, df):
-        # Implement stock history processing logic here
+    @traced("processor.history_metrics")
+    def preprocess(self, df, indicators=None):
+        """
+        Calculate key metrics for one ticker's history.
+
+        :param df: DataFrame containing stock data with columns: Open, High, Low, Close, Volume
+        :param indicators: Precomputed build_indicator_frame(df) to reuse, computed here if omitted
+        :return: Dictionary of calculated metrics
+        """
         self.df = df
+        self.indicators = indicators
         self.calculate_key_metrics()
         results = self.get_metrics_dict()
         print(results)
         return results
 
+    def preprocess_many(self, histories) -> Dict[str, Dict[str, Any]]:
+        """
+        Calculate the same key metrics for many tickers in a few vectorized passes.
+
+        :param histories: Dictionary of ticker -> history DataFrame (columns: High, Low, Close, Volume)
+        :return: Dictionary of ticker -> metrics dictionary, over the dates shared by all tickers
+        """
+        metrics = compute_batch_metrics(
+            stack_histories(histories, "Close"),
+            high=stack_histories(histories, "High"),
+            low=stack_histories(histories, "Low"),
+            volume=stack_histories(histories, "Volume"),
+        )
+        return metrics.to_dict(orient="index")
+
     def process(self, results):
         # Implement stock history processing logic here
+        report = "".join(self.stream_report(results))
+        return self.rate(report)
+
+    def stream_report(self, results):
+        """
+        Stream the step-by-step analysis report for the given metrics.
+
+        :param results: Dictionary of metrics from preprocess
+        :return: Generator of text chunks as the model produces them, or of the whole report if cached
+        """
+        key = ("StockHistoryProcessor.stream_report", _analysis_key(self, results))
+        report = self.result_cache.get("analysis", key) if self.result_cache is not None else None
+        if report is not None:
+            yield report
+            return
 
         prompt = f"""You are an experienced stock analyst with deep knowledge of technical and fundamental analysis. Your task is to analyze the following stock data and provide a comprehensive analysis report, in a step-by-step, chain-of-thought manner. Consider various aspects such as price movements, technical indicators, volatility, and performance metrics. Explain your reasoning for each observation and conclusion. Additionally,  provide your recommendation on whether to buy, sell, or hold the stock based on the analysis and give top 5 reasons why.
         Stock Data:{results}
         """
-        response = client.chat.completions.create(
+        start = time.perf_counter()
+        stream = self.client.chat.completions.create(
         messages=[{"role": "user", "content": prompt}],
         model="llama-3.1-8b-instant",
         temperature=0.5,
         max_tokens=500,
+        stream=True,
     )
-        reply = response.choices[0].message.content
+        chunks = []
+        for chunk in stream:
+            content = chunk.choices[0].delta.content
+            if content:
+                chunks.append(content)
+                yield content
+        # Recorded once the caller has drained the stream, so it covers the whole report
+        record("processor.history_report", start, chars=sum(map(len, chunks)))
+        if self.result_cache is not None:
+            self.result_cache.set("analysis", key, "".join(chunks))
+
+    @cached("analysis", key=_analysis_key)
+    @traced("processor.history_rating")
+    def rate(self, reply):
+        """
+        Turn an analysis report into the JSON rating with five reasons.
 
+        :param reply: Full analysis report text
+        :return: JSON string with Rating and Reason 1-5
+        """
         prompt = f"""As an expert stock analyst, analyze the following comprehensive stock report and provide a recommendation in JSON format. Your analysis should include a rating (buy, sell, or hold) and five key reasons supporting your recommendation. Format your response as a valid JSON object with the following structure:
 
         {{
@@ -266,7 +434,7 @@ class StockHistoryProcessor(Processor):
         {reply}
 
         Based on this report, provide your recommendation and reasoning in the specified JSON format."""
-        response = client.chat.completions.create(
+        response = self.client.chat.completions.create(
         messages=[{"role": "user", "content": prompt}],
         model="llama-3.1-8b-instant",
         temperature=0.5,
@@ -284,16 +452,16 @@ class OtherDataProcessor(Processor):
 # Factory class to create different types of processors
 class ProcessorFactory:
     @staticmethod
-    def get_processor(processor_type):
+    def get_processor(processor_type, **kwargs):
         if processor_type == "stock_info":
-            return StockInfoProcessor()
+            return StockInfoProcessor(**kwargs)
         ##todo: add other processors here
         elif processor_type == "news":
-            return NewsProcessor()
+            return NewsProcessor(**kwargs)
         elif processor_type == "stock_history":
-            return StockHistoryProcessor()
+            return StockHistoryProcessor(**kwargs)
         elif processor_type == "other_data":
-            return OtherDataProcessor()
+            return OtherDataProcessor(**kwargs)
         else:
             raise ValueError(f"Unknown processor type: {processor_type}")
 
@@ -0,0 +1,176 @@
+"""
+In-memory cache of fetched data and analysis results, with a freshness window per source.
+
+Each entry belongs to a source whose TTL says how long its results stay fresh:
+  quote:        stock info with the current price, a minute
+  history:      daily price bars, as long as the HistoryStore refresh interval
+  fundamentals: quarterly statements and insider transactions, a day
+  news:         scraped articles and the news analysis, an hour
+  analysis:     the model's history report and rating, an hour
+
+The cache is bounded by the estimated memory of its values; the least recently used entries are
+evicted first. Code run inside force_refresh() skips lookups and overwrites what it computes, which
+is how the dashboard's "Force refresh" re-fetches everything for one run.
+
+Cached values are shared between callers and must not be modified in place.
+
+Classes take an optional result_cache and cache nothing without one, so scripts and benchmarks
+see every fetch unless they opt in.
+"""
+import contextvars
+import functools
+import hashlib
+import json
+import os
+import pickle
+import sys
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Optional
+
+from .tracing import record
+
+SOURCE_TTLS = {
+    "quote": 60,
+    "history": 15 * 60,
+    "fundamentals": 24 * 60 * 60,
+    "news": 60 * 60,
+    "analysis": 60 * 60,
+}
+DEFAULT_MAX_BYTES = int(float(os.getenv("RESULT_CACHE_MB", "256")) * 1024 * 1024)
+
+# Set inside force_refresh(); carried into worker threads by tracing.bind
+_refreshing = contextvars.ContextVar("result_cache_refreshing", default=False)
+
+
+def make_key(*parts) -> str:
+    """Hash arbitrary JSON-able parts (dicts, metrics, text) into a short key."""
+    payload = json.dumps(parts, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def estimate_size(value) -> int:
+    """Approximate memory held by value, in bytes."""
+    if hasattr(value, "memory_usage"):
+        usage = value.memory_usage(deep=True)
+        return int(usage.sum() if hasattr(usage, "sum") else usage)
+    try:
+        return len(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+    except Exception:
+        return sys.getsizeof(value)
+
+
+@contextmanager
+def force_refresh():
+    """Recompute and re-store every cached result requested inside the block."""
+    token = _refreshing.set(True)
+    try:
+        yield
+    finally:
+        _refreshing.reset(token)
+
+
+class ResultCache:
+    """Thread-safe TTL cache with least-recently-used eviction by estimated size."""
+    def __init__(self, ttls: Optional[Dict[str, float]] = None, max_bytes: int = DEFAULT_MAX_BYTES):
+        """
+        :param ttls: Source -> seconds its entries stay fresh, overriding SOURCE_TTLS
+        :param max_bytes: Upper bound on the estimated size of all values together
+        """
+        self.ttls = {**SOURCE_TTLS, **(ttls or {})}
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.bytes = 0
+        # (source, key) -> (value, stored_at, size), least recently used first
+        self._entries: "OrderedDict[tuple, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, source: str, key, default=None):
+        """Return the fresh value stored under (source, key), or default."""
+        if _refreshing.get():
+            return default
+        with self._lock:
+            entry = self._entries.get((source, key))
+            if entry is None or time.time() - entry[1] > self.ttls[source]:
+                if entry is not None:
+                    self._drop((source, key))
+                self.misses += 1
+                return default
+            self._entries.move_to_end((source, key))
+            self.hits += 1
+            return entry[0]
+
+    def set(self, source: str, key, value) -> None:
+        """Store value under (source, key) and evict until the cache fits in max_bytes."""
+        if source not in self.ttls:
+            raise ValueError(f"Unknown cache source: {source}")
+        size = estimate_size(value)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if (source, key) in self._entries:
+                self._drop((source, key))
+            self._entries[(source, key)] = (value, time.time(), size)
+            self.bytes += size
+            while self.bytes > self.max_bytes:
+                self._drop(next(iter(self._entries)))
+                self.evictions += 1
+
+    def get_or_compute(self, source: str, key, compute: Callable[[], Any]):
+        """Return the cached value, or compute, store and return it."""
+        start = time.perf_counter()
+        missing = object()
+        value = self.get(source, key, missing)
+        if value is not missing:
+            record("cache.hit", start, source=source)
+            return value
+        value = compute()
+        if value is not None:
+            self.set(source, key, value)
+        return value
+
+    def _drop(self, entry_key) -> None:
+        _, _, size = self._entries.pop(entry_key)
+        self.bytes -= size
+
+    def age(self, source: str, key) -> Optional[float]:
+        """Seconds since (source, key) was stored, or None if it is not cached."""
+        with self._lock:
+            entry = self._entries.get((source, key))
+        return None if entry is None else time.time() - entry[1]
+
+    def invalidate(self, source: Optional[str] = None) -> None:
+        """Remove every entry of source, or all entries."""
+        with self._lock:
+            for entry_key in [k for k in self._entries if source is None or k[0] == source]:
+                self._drop(entry_key)
+
+    def stats(self) -> Dict[str, int]:
+        """Return hit/miss/eviction counters, the number of entries and their estimated bytes."""
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "evictions": self.evictions,
+                    "entries": len(self._entries), "bytes": self.bytes}
+
+
+def cached(source: str, key: Optional[Callable] = None):
+    """
+    Cache a method's results in its instance's result_cache attribute, if that is set.
+
+    :param source: Source whose TTL applies (a key of SOURCE_TTLS)
+    :param key: Function of (self, *args, **kwargs) returning the part of the key that identifies
+                the result, the call's arguments if omitted. The method's name is always added.
+    """
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(self, *args, **kwargs):
+            cache = getattr(self, "result_cache", None)
+            if cache is None:
+                return fn(self, *args, **kwargs)
+            parts = key(self, *args, **kwargs) if key else make_key(args, kwargs)
+            return cache.get_or_compute(source, (fn.__qualname__, parts), lambda: fn(self, *args, **kwargs))
+        return wrapper
+    return decorator
@@ -0,0 +1,82 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional, Tuple
+from .pipeline import to_jsonable
+
+DEFAULT_RESULTS_PATH = os.getenv(
+    "RESULTS_STORE_PATH",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".cache", "results.sqlite"),
+)
+
+
+class ResultsStore:
+    """
+    Precomputed dashboard results per ticker, shared between the poller and the dashboard through SQLite.
+
+    Each ticker has up to three parts, stored as JSON with the time they were computed:
+        info       - StockInfoProcessor output
+        history    - {"indicators": metrics, "report": analyst report text, "rating": rating dict}
+        news:<mode> - {"articles": [[title, url, sentiment], ...], "conclusion": ..., "stats": ...}
+    """
+    def __init__(self, path: str = DEFAULT_RESULTS_PATH):
+        """
+        :param path: SQLite database file
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                """CREATE TABLE IF NOT EXISTS results (
+                    ticker TEXT NOT NULL,
+                    part TEXT NOT NULL,
+                    value TEXT NOT NULL,
+                    computed_at REAL NOT NULL,
+                    PRIMARY KEY (ticker, part)
+                )"""
+            )
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def put(self, ticker: str, part: str, value: Any, computed_at: Optional[float] = None) -> None:
+        """Store value as the latest result of ticker's part."""
+        with self._lock, self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO results (ticker, part, value, computed_at) VALUES (?, ?, ?, ?)",
+                (ticker.upper(), part, json.dumps(to_jsonable(value)), computed_at or time.time()),
+            )
+
+    def get(self, ticker: str, part: str, max_age: Optional[float] = None) -> Optional[Tuple[Any, float]]:
+        """
+        Return (value, computed_at) for ticker's part, or None if missing or older than max_age seconds.
+        """
+        with self._lock, self._connect() as conn:
+            row = conn.execute(
+                "SELECT value, computed_at FROM results WHERE ticker = ? AND part = ?", (ticker.upper(), part)
+            ).fetchone()
+        if row is None or (max_age is not None and time.time() - row[1] > max_age):
+            return None
+        return json.loads(row[0]), row[1]
+
+    def ages(self) -> List[Dict[str, Any]]:
+        """Every stored part with its age in seconds, oldest first."""
+        now = time.time()
+        with self._lock, self._connect() as conn:
+            rows = conn.execute("SELECT ticker, part, computed_at FROM results ORDER BY computed_at").fetchall()
+        return [{"ticker": ticker, "part": part, "age": now - computed_at} for ticker, part, computed_at in rows]
+
+    def clear(self) -> None:
+        """Remove every entry."""
+        with self._lock, self._connect() as conn:
+            conn.execute("DELETE FROM results")
@@ -0,0 +1,250 @@
+"""
+Cross-sectional screener over the stored fundamentals and price histories.
+
+Usage: python -m tools screen "RSI < 30 and pe_ratio < 15 order by sharpe_ratio"
+       python -m tools screen "sector == 'Technology' and debt_to_equity < 50 order by max_drawdown desc limit 10" --out picks.csv
+       python -m tools screen "order by pe_ratio asc" --columns pe_ratio,RSI --rebuild
+
+A screen is a condition over the universe table's columns (pandas expression syntax: and, or, not,
+==, <, in, ...) optionally followed by "order by field [asc|desc], ..." and "limit N". Fields are
+the StockInfoProcessor keys (pe_ratio, debt_to_equity, sector, ...) and the StockHistoryProcessor
+metrics over the last year of bars (RSI, sharpe_ratio, max_drawdown, ...). Ordering is highest
+first unless asc is given. Only stored data is read, so no network calls are made; fill the stores
+with the poller or batch mode first.
+
+The universe table is built from the stores on first use and then reused, however old it is, until
+--rebuild is given; building it reads every ticker's stored files and takes seconds for thousands of
+tickers, while a screen over the saved table takes milliseconds.
+"""
+import argparse
+import json
+import os
+import re
+import time
+from typing import Any, Dict, Iterable, List, Optional
+import numpy as np
+import pandas as pd
+from .batch import read_watchlist, write_results
+from .fundamentals_store import FundamentalsStore, decode_frame, encode_frame
+from .history_store import HistoryStore
+from .indicators import TRADING_DAYS, compute_batch_metrics
+
+DEFAULT_UNIVERSE_PATH = os.getenv(
+    "SCREEN_UNIVERSE_PATH",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".cache", "universe.npz"),
+)
+# Seconds after which the screen output suggests rebuilding the universe table
+UNIVERSE_MAX_AGE = 15 * 60
+# Text fields kept in the universe table; every other info field is numeric
+TEXT_COLUMNS = ["company_name", "sector", "industry", "recommendation"]
+# Columns shown in screen results besides the ones the screen mentions
+DEFAULT_COLUMNS = ["company_name", "sector", "current_price", "pe_ratio", "RSI", "sharpe_ratio", "max_drawdown"]
+
+_SCREEN = re.compile(
+    r"^\s*(?:where\s+)?(?P<condition>.*?)\s*(?:\border\s+by\s+(?P<order>.+?))?\s*(?:\blimit\s+(?P<limit>\d+))?\s*$",
+    re.IGNORECASE | re.DOTALL,
+)
+_IDENTIFIER = re.compile(r"[A-Za-z_]\w*")
+
+
+def history_metrics(store: HistoryStore, tickers: Iterable[str], bars: int = TRADING_DAYS) -> pd.DataFrame:
+    """
+    StockHistoryProcessor key metrics over the last bars rows of each stored history.
+
+    Histories of the same length are stacked and computed in one compute_batch_metrics pass, so
+    a universe costs a few vectorized passes rather than one per ticker.
+
+    :return: DataFrame indexed by ticker; tickers with fewer than two stored bars are left out
+    """
+    columns = ["Close", "High", "Low", "Volume"]
+    by_length: Dict[int, List] = {}
+    for ticker in tickers:
+        tail = store.load_tail(ticker, bars, columns)
+        if tail is not None and len(tail) >= 2:
+            by_length.setdefault(len(tail), []).append((ticker.upper(), tail))
+
+    frames = []
+    for group in by_length.values():
+        stacked = np.stack([tail for _, tail in group], axis=2)  # bars x columns x tickers
+        frames.append(compute_batch_metrics(
+            stacked[:, 0], high=stacked[:, 1], low=stacked[:, 2], volume=stacked[:, 3],
+            tickers=[ticker for ticker, _ in group],
+        ))
+    return pd.concat(frames) if frames else pd.DataFrame(index=pd.Index([], name="ticker"))
+
+
+def build_universe(
+    tickers: Optional[Iterable[str]] = None,
+    fundamentals: Optional[FundamentalsStore] = None,
+    history_store: Optional[HistoryStore] = None,
+) -> pd.DataFrame:
+    """
+    Build the screening table: one row per ticker, info fields joined with price history metrics.
+
+    Where both define a field (average_volume, 52_week_high, 52_week_low) the info value is kept
+    and the history metric fills it in for tickers without stored info.
+
+    :param tickers: Tickers to include, every ticker in either store if omitted
+    :return: DataFrame indexed by ticker, numeric columns as float64
+    """
+    fundamentals = fundamentals or FundamentalsStore()
+    history_store = history_store or HistoryStore()
+    if tickers is None:
+        tickers = sorted(set(fundamentals.tickers()) | set(history_store.tickers()))
+    tickers = [ticker.upper() for ticker in tickers]
+
+    info = fundamentals.info_table(tickers)
+    for column in info.columns:
+        if column not in TEXT_COLUMNS:
+            info[column] = pd.to_numeric(info[column], errors="coerce")
+    info = info.drop(columns=[c for c in info.columns if c not in TEXT_COLUMNS and info[c].isna().all()])
+    info = info.drop(columns=["symbol", "website"], errors="ignore")
+
+    metrics = history_metrics(history_store, tickers)
+    table = info.combine_first(metrics) if not info.empty else metrics
+    table.index.name = "ticker"
+    return table.sort_index()
+
+
+def save_universe(table: pd.DataFrame, path: str = DEFAULT_UNIVERSE_PATH) -> None:
+    """Write a universe table as a pickle-free .npz of column arrays."""
+    arrays, layout = encode_frame(table)
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        np.savez(f, layout=np.array(json.dumps(layout)), **arrays)
+    os.replace(tmp, path)
+
+
+def universe_age(path: str = DEFAULT_UNIVERSE_PATH) -> Optional[float]:
+    """Seconds since the saved universe table was built, or None if there is none."""
+    return time.time() - os.path.getmtime(path) if os.path.exists(path) else None
+
+
+def load_universe(path: str = DEFAULT_UNIVERSE_PATH, max_age: Optional[float] = None) -> Optional[pd.DataFrame]:
+    """Load a saved universe table, or None if it is missing or older than max_age seconds (any age if None)."""
+    if not os.path.exists(path) or (max_age is not None and time.time() - os.path.getmtime(path) > max_age):
+        return None
+    with np.load(path) as npz:
+        arrays = {name: npz[name] for name in npz.files}
+    layout = json.loads(str(arrays.pop("layout")))
+    return decode_frame(arrays, layout)
+
+
+def parse_screen(expression: str) -> Dict[str, Any]:
+    """
+    Split a screen into its condition, ordering and limit.
+
+    :return: {"condition": str or None, "order_by": [(field, ascending), ...], "limit": int or None}
+    """
+    match = _SCREEN.match(expression)
+    order_by = []
+    for part in (match["order"] or "").split(","):
+        words = part.split()
+        if not words:
+            continue
+        if len(words) > 2 or (len(words) == 2 and words[1].lower() not in ("asc", "desc")):
+            raise ValueError(f"Invalid ordering {part.strip()!r}, expected 'field [asc|desc]'")
+        order_by.append((words[0].strip("`"), len(words) == 2 and words[1].lower() == "asc"))
+    return {
+        "condition": match["condition"] or None,
+        "order_by": order_by,
+        "limit": int(match["limit"]) if match["limit"] else None,
+    }
+
+
+def _quote_fields(condition: str, columns: Iterable[str]) -> str:
+    """Backtick fields that are not Python identifiers (e.g. 52_week_high) so pandas can parse them."""
+    for column in sorted(columns, key=len, reverse=True):
+        if not _IDENTIFIER.fullmatch(column):
+            condition = re.sub(rf"(?<![\w`]){re.escape(column)}(?![\w`])", f"`{column}`", condition)
+    return condition
+
+
+def screen(table: pd.DataFrame, expression: str) -> pd.DataFrame:
+    """
+    Filter and rank a universe table with a screen expression, evaluated column-wise over all tickers at once.
+
+    :param table: Universe table from build_universe
+    :param expression: e.g. "RSI < 30 and pe_ratio < 15 order by sharpe_ratio limit 20"
+    :return: Matching rows in rank order
+    """
+    query = parse_screen(expression)
+    result = table
+    if query["condition"]:
+        try:
+            mask = table.eval(_quote_fields(query["condition"], table.columns))
+        except (NameError, SyntaxError, KeyError, TypeError, ValueError) as e:
+            raise ValueError(f"Invalid screen condition {query['condition']!r}: {e}") from e
+        if not isinstance(mask, pd.Series) or not pd.api.types.is_bool_dtype(mask.dtype):
+            raise ValueError(f"Screen condition {query['condition']!r} is not a true/false test")
+        result = table[mask.to_numpy(dtype=bool, na_value=False)]
+    if query["order_by"]:
+        unknown = [field for field, _ in query["order_by"] if field not in table.columns]
+        if unknown:
+            raise ValueError(f"Unknown field(s) to order by: {', '.join(unknown)}")
+        result = result.sort_values(
+            [field for field, _ in query["order_by"]],
+            ascending=[ascending for _, ascending in query["order_by"]],
+            na_position="last",
+            kind="stable",
+        )
+    if query["limit"] is not None:
+        result = result.head(query["limit"])
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("expression", help='Screen, e.g. "RSI < 30 and pe_ratio < 15 order by sharpe_ratio"')
+    parser.add_argument("--tickers", nargs="+", help="Restrict the universe to these tickers")
+    parser.add_argument("--file", help="Watchlist file restricting the universe")
+    parser.add_argument("--columns", help="Comma separated columns to show, default a short summary")
+    parser.add_argument("--limit", type=int, default=50, help="Maximum rows to print (a limit in the screen also applies)")
+    parser.add_argument("--out", help="Write every matching row to a .csv or .json file")
+    parser.add_argument("--rebuild", action="store_true", help="Rebuild the universe table from the stores (takes seconds for thousands of tickers)")
+    args = parser.parse_args(argv)
+
+    tickers = list(args.tickers or [])
+    if args.file:
+        tickers.extend(read_watchlist(args.file))
+
+    start = time.perf_counter()
+    # The saved table covers every stored ticker; a restricted universe is filtered from it
+    table = None if args.rebuild else load_universe()
+    if table is None:
+        table = build_universe()
+        save_universe(table)
+        print(f"Built universe of {len(table)} tickers in {time.perf_counter() - start:.2f}s")
+    elif universe_age() > UNIVERSE_MAX_AGE:
+        print(f"Screening a universe table built {universe_age() / 60:.0f} minutes ago; pass --rebuild to pick up newer store data")
+    if tickers:
+        table = table[table.index.isin([ticker.upper() for ticker in tickers])]
+    if table.empty:
+        print("No stored tickers to screen; fill the stores with `python -m tools poll` or `python -m tools batch` first")
+        return
+
+    start = time.perf_counter()
+    try:
+        result = screen(table, args.expression)
+    except ValueError as e:
+        parser.error(str(e))
+    elapsed = time.perf_counter() - start
+
+    if args.out:
+        write_results(result, args.out)
+    if args.columns:
+        columns = [column.strip() for column in args.columns.split(",") if column.strip()]
+    else:
+        query = parse_screen(args.expression)
+        mentioned = [c for c in table.columns if re.search(rf"(?<![\w`]){re.escape(c)}(?![\w`])", query["condition"] or "")]
+        columns = DEFAULT_COLUMNS + mentioned + [field for field, _ in query["order_by"]]
+    columns = list(dict.fromkeys(column for column in columns if column in result.columns))
+    with pd.option_context("display.width", 200, "display.max_columns", None):
+        print(result[columns].head(args.limit).to_string() if len(result) else "No matches")
+    print(f"{len(result)} of {len(table)} tickers matched in {elapsed * 1000:.1f} ms"
+          + (f", written to {args.out}" if args.out else ""))
+
+
+if __name__ == "__main__":
+    main()
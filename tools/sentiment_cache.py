@@ -0,0 +1,100 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Optional
+
+DEFAULT_CACHE_PATH = os.getenv(
+    "SENTIMENT_CACHE_PATH",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".cache", "sentiment.sqlite"),
+)
+
+
+class SentimentCache:
+    """
+    On-disk cache of per-article sentiment results, backed by SQLite.
+
+    Entries are keyed by a hash of the article text, ticker, model ids and prompt version,
+    so a change to any of them is a cache miss rather than a stale hit.
+    """
+    def __init__(self, path: str = DEFAULT_CACHE_PATH, ttl: float = 6 * 60 * 60, max_entries: int = 5000):
+        """
+        :param path: SQLite database file
+        :param ttl: Seconds an entry stays valid
+        :param max_entries: Maximum number of entries kept; least recently used ones are evicted first
+        """
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                """CREATE TABLE IF NOT EXISTS sentiment (
+                    key TEXT PRIMARY KEY,
+                    value TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    accessed_at REAL NOT NULL
+                )"""
+            )
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    @staticmethod
+    def make_key(article_text: str, ticker: str, models, prompt_version: str) -> str:
+        """Build the content-addressed key for an article analysis."""
+        payload = json.dumps([article_text, ticker.upper(), list(models), prompt_version])
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return the cached value for key, or None if missing or expired."""
+        now = time.time()
+        with self._lock, self._connect() as conn:
+            row = conn.execute("SELECT value, created_at FROM sentiment WHERE key = ?", (key,)).fetchone()
+            if row is None or now - row[1] > self.ttl:
+                if row is not None:
+                    conn.execute("DELETE FROM sentiment WHERE key = ?", (key,))
+                self.misses += 1
+                return None
+            conn.execute("UPDATE sentiment SET accessed_at = ? WHERE key = ?", (now, key))
+            self.hits += 1
+            return json.loads(row[0])
+
+    def set(self, key: str, value: Dict[str, Any]) -> None:
+        """Store value under key and evict expired or excess entries."""
+        now = time.time()
+        with self._lock, self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO sentiment (key, value, created_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value), now, now),
+            )
+            conn.execute("DELETE FROM sentiment WHERE created_at < ?", (now - self.ttl,))
+            conn.execute(
+                """DELETE FROM sentiment WHERE key IN (
+                    SELECT key FROM sentiment ORDER BY accessed_at DESC LIMIT -1 OFFSET ?
+                )""",
+                (self.max_entries,),
+            )
+
+    def clear(self) -> None:
+        """Remove every entry."""
+        with self._lock, self._connect() as conn:
+            conn.execute("DELETE FROM sentiment")
+
+    def stats(self) -> Dict[str, int]:
+        """Return hit/miss counters and the current number of entries."""
+        with self._lock, self._connect() as conn:
+            size = conn.execute("SELECT COUNT(*) FROM sentiment").fetchone()[0]
+        return {"hits": self.hits, "misses": self.misses, "entries": size}
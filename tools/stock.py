@@ -1,37 +1,173 @@
+import time
 import yfinance as yf
+import pandas as pd
 from typing import Optional, List, Dict, Any
+from .fundamentals_store import FundamentalsStore
+from .history_store import HistoryStore
+from .result_cache import ResultCache, cached, make_key
+from .tracing import span, traced
+
+# Offsets used to answer a period request by slicing the stored max-period history
+PERIOD_OFFSETS = {
+    "1d": pd.DateOffset(days=1),
+    "5d": pd.DateOffset(days=5),
+    "1mo": pd.DateOffset(months=1),
+    "3mo": pd.DateOffset(months=3),
+    "6mo": pd.DateOffset(months=6),
+    "1y": pd.DateOffset(years=1),
+    "2y": pd.DateOffset(years=2),
+    "5y": pd.DateOffset(years=5),
+    "10y": pd.DateOffset(years=10),
+}
+
+
+def _symbol_key(stock, *args, **kwargs):
+    return stock.symbol, make_key(args, kwargs)
+
 
 class Stock:
-    def __init__(self, ticker: str):
+    def __init__(self, ticker: str, use_store: bool = True, store: Optional[HistoryStore] = None, refresh_interval: float = 15 * 60,
+                 result_cache: Optional[ResultCache] = None, fundamentals: Optional[FundamentalsStore] = None):
+        """
+        :param ticker: Ticker symbol
+        :param use_store: Serve price history from the local HistoryStore, fetching only new bars, and
+                          info, statements and insider transactions from the local FundamentalsStore
+        :param store: HistoryStore to use instead of the default one
+        :param refresh_interval: Seconds before stored history is checked for new bars again
+        :param result_cache: ResultCache the getters' results are kept in, none if omitted
+        :param fundamentals: FundamentalsStore to use instead of the default one
+        """
+        self.symbol = ticker.upper()
         self.ticker = yf.Ticker(ticker)
+        self.store = (store or HistoryStore()) if use_store else None
+        self.fundamentals = (fundamentals or FundamentalsStore()) if use_store else None
+        self.refresh_interval = refresh_interval
+        self.result_cache = result_cache
+        # Last fetch per getter: {"mode": "cold" | "incremental" | "warm" | "direct", "seconds": ..., "rows_fetched": ...}
+        self.timings: Dict[str, Dict[str, Any]] = {}
 
+    @cached("quote", key=_symbol_key)
+    @traced("stock.info")
     def get_info(self) -> Dict[str, Any]:
         """Get all stock info."""
-        return self.ticker.info
+        return self._snapshot("info", lambda: self.ticker.info)
 
+    @cached("history", key=_symbol_key)
+    @traced("stock.history")
     def get_history(self, period: str = "1y"):
         """Get historical market data."""
-        return self.ticker.history(period=period)
+        if self.store is None or period not in PERIOD_OFFSETS:
+            start = time.perf_counter()
+            history = self._fetch_history(period=period)
+            self.timings["get_history"] = {"mode": "direct", "seconds": time.perf_counter() - start, "rows_fetched": len(history)}
+            return history
+
+        full_history = self.get_full_history()
+        start = time.perf_counter()
+        if full_history.empty:
+            history = full_history
+        else:
+            now = pd.Timestamp.now(tz=full_history.index.tz)
+            history = full_history[full_history.index >= now - PERIOD_OFFSETS[period]]
+        self.timings["get_history"] = {"mode": "slice", "seconds": time.perf_counter() - start, "rows_fetched": 0}
+        return history
     
+    @cached("history", key=_symbol_key)
+    @traced("stock.full_history")
     def get_full_history(self, period: str = "max"):
         """Get historical market data for max period."""
-        return self.ticker.history(period=period, interval="1d")
+        start = time.perf_counter()
+        if self.store is None or period != "max":
+            history = self._fetch_history(period=period, interval="1d")
+            self.timings["get_full_history"] = {"mode": "direct", "seconds": time.perf_counter() - start, "rows_fetched": len(history)}
+            return history
 
+        stored = self.store.load(self.symbol)
+        meta = self.store.meta(self.symbol)
+        if stored is None or stored.empty:
+            history = self._fetch_and_store_max()
+            mode, rows_fetched = "cold", len(history)
+        elif time.time() - meta["updated_at"] < self.refresh_interval:
+            history = stored
+            mode, rows_fetched = "warm", 0
+        else:
+            # Re-request the last stored bar too, since it may have been a partial intraday bar
+            new_bars = self._fetch_history(start=stored.index[-1].strftime("%Y-%m-%d"), interval="1d")
+            rows_fetched = len(new_bars)
+            if new_bars.empty:
+                self.store.touch(self.symbol)
+                history = stored
+            elif self._has_corporate_actions(new_bars[new_bars.index > stored.index[-1]]):
+                # A split or dividend re-adjusts every earlier bar, so the stored series is stale
+                history = self._fetch_and_store_max()
+                rows_fetched = len(history)
+            else:
+                history = pd.concat([stored[stored.index < new_bars.index[0]], new_bars.reindex(columns=stored.columns, fill_value=0)])
+                self.store.save(self.symbol, history)
+            mode = "incremental"
+
+        self.timings["get_full_history"] = {"mode": mode, "seconds": time.perf_counter() - start, "rows_fetched": rows_fetched}
+        return history
+
+    def _fetch_history(self, **kwargs):
+        """Download bars from Yahoo Finance."""
+        with span("yfinance.history", symbol=self.symbol, **kwargs) as attrs:
+            history = self.ticker.history(**kwargs)
+            attrs["rows"] = len(history)
+            attrs["bytes"] = int(history.memory_usage(index=True).sum())
+        return history
+
+    def _fetch_and_store_max(self):
+        history = self._fetch_history(period="max", interval="1d")
+        if not history.empty:
+            self.store.save(self.symbol, history)
+        return history
+
+    @staticmethod
+    def _has_corporate_actions(bars) -> bool:
+        actions = [col for col in ("Dividends", "Stock Splits") if col in bars.columns]
+        return bool(actions) and bool((bars[actions] != 0).any().any())
+
+    @cached("fundamentals", key=_symbol_key)
+    @traced("stock.quarterly_income_statement")
     def get_quarterly_income_statement(self):
         """Show quarterly income statement."""
-        return self.ticker.quarterly_income_stmt
+        return self._snapshot("quarterly_income_statement", lambda: self.ticker.quarterly_income_stmt)
 
+    @cached("fundamentals", key=_symbol_key)
+    @traced("stock.quarterly_balance_sheet")
     def get_quarterly_balance_sheet(self):
         """Show quarterly balance sheet."""
-        return self.ticker.quarterly_balance_sheet
+        return self._snapshot("quarterly_balance_sheet", lambda: self.ticker.quarterly_balance_sheet)
 
+    @cached("fundamentals", key=_symbol_key)
+    @traced("stock.quarterly_cashflow")
     def get_quarterly_cashflow(self):
         """Show quarterly cash flow statement."""
-        return self.ticker.quarterly_cashflow
+        return self._snapshot("quarterly_cashflow", lambda: self.ticker.quarterly_cashflow)
 
+    @cached("fundamentals", key=_symbol_key)
+    @traced("stock.insider_transactions")
     def get_insider_transactions(self):
         """Show insider transactions."""
-        return self.ticker.insider_transactions
+        return self._snapshot("insider_transactions", lambda: self.ticker.insider_transactions)
+
+    def _snapshot(self, dataset: str, fetch):
+        """Serve dataset from the FundamentalsStore while it is fresh, else fetch and store it."""
+        start = time.perf_counter()
+        if self.fundamentals is None:
+            value, mode = fetch(), "direct"
+        elif self.fundamentals.is_fresh(self.symbol, dataset):
+            value, mode = self.fundamentals.load(self.symbol, dataset), "warm"
+        else:
+            value = fetch()
+            # yfinance answers unknown tickers with an empty info dict or frame; don't store those
+            empty = value is None or (len(value) <= 1 if isinstance(value, dict) else getattr(value, "empty", False))
+            if not empty:
+                value = self.fundamentals.save(self.symbol, dataset, value)
+            mode = "cold"
+        self.timings[f"get_{dataset}"] = {"mode": mode, "seconds": time.perf_counter() - start}
+        return value
     
     def get_all_data(self) -> Dict[str, Any]:
         """
@@ -0,0 +1,184 @@
+"""
+Article preprocessing before LLM calls: boilerplate stripping, token-budgeted truncation and
+near-duplicate detection, so fewer and shorter prompts are sent.
+"""
+import hashlib
+import re
+from typing import Dict, List, Optional, Tuple
+
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+# Lines that are page furniture rather than article content
+BOILERPLATE_PATTERNS = [
+    r"^(advertisement|story continues( below)?|continue reading|read more:?.*|related:.*|recommended stories?)$",
+    r"^(sign up|subscribe|click here|follow us|download the app|get the latest)\b.*",
+    # Footer lines only: short and ending in the phrase, so sentences that mention it are kept
+    r"^.{0,60}\b(all rights reserved|terms of (service|use)|privacy policy|cookie policy)\.?$",
+    r"^(©|copyright)\s*(©\s*)?\d{4}\b.{0,80}$",
+    r"^(photo|image|video)( credit)?:.*",
+    r"^(share|tweet|email|print)( this( article| story)?)?$",
+]
+_BOILERPLATE = re.compile("|".join(f"(?:{pattern})" for pattern in BOILERPLATE_PATTERNS), re.IGNORECASE)
+_TOKEN = re.compile(r"\w+|[^\w\s]")
+
+# Number of prompts each analysis mode puts the article text into (ensemble sends it twice)
+PROMPTS_PER_ARTICLE = {"ensemble": 2, "fast": 1, "batch": 1}
+
+
+class Tokenizer:
+    """Counts and truncates by tokens, using tiktoken when installed and a word/punctuation split otherwise."""
+    def __init__(self, encoding: str = "cl100k_base"):
+        self.encoding = tiktoken.get_encoding(encoding) if tiktoken else None
+
+    def count(self, text: str) -> int:
+        if self.encoding:
+            return len(self.encoding.encode(text, disallowed_special=()))
+        return len(_TOKEN.findall(text))
+
+    def head(self, text: str, max_tokens: int) -> str:
+        """Return the longest prefix of text with at most max_tokens tokens."""
+        if max_tokens <= 0:
+            return ""
+        if self.encoding:
+            tokens = self.encoding.encode(text, disallowed_special=())
+            return text if len(tokens) <= max_tokens else self.encoding.decode(tokens[:max_tokens])
+        matches = list(_TOKEN.finditer(text))
+        return text if len(matches) <= max_tokens else text[:matches[max_tokens - 1].end()]
+
+    def tail(self, text: str, max_tokens: int) -> str:
+        """Return the longest suffix of text with at most max_tokens tokens."""
+        if max_tokens <= 0:
+            return ""
+        if self.encoding:
+            tokens = self.encoding.encode(text, disallowed_special=())
+            return text if len(tokens) <= max_tokens else self.encoding.decode(tokens[-max_tokens:])
+        matches = list(_TOKEN.finditer(text))
+        return text if len(matches) <= max_tokens else text[matches[-max_tokens].start():]
+
+
+def strip_boilerplate(text: str) -> str:
+    """Drop boilerplate lines and repeated lines, and collapse blank runs."""
+    lines = []
+    seen = set()
+    for line in text.splitlines():
+        line = re.sub(r"\s+", " ", line).strip()
+        if not line or _BOILERPLATE.match(line):
+            continue
+        if line in seen:
+            continue
+        seen.add(line)
+        lines.append(line)
+    return "\n".join(lines)
+
+
+def truncate(text: str, max_tokens: int, tokenizer: Tokenizer, strategy: str = "head_tail") -> str:
+    """
+    Cut text down to max_tokens tokens.
+
+    :param strategy: "head" keeps the beginning; "head_tail" keeps the beginning and the last
+                     quarter of the budget from the end, where articles often put outlook and quotes
+    """
+    if tokenizer.count(text) <= max_tokens:
+        return text
+    if strategy == "head":
+        return tokenizer.head(text, max_tokens)
+    if strategy == "head_tail":
+        tail_tokens = max_tokens // 4
+        return tokenizer.head(text, max_tokens - tail_tokens) + "\n...\n" + tokenizer.tail(text, tail_tokens)
+    raise ValueError(f"Unknown truncation strategy: {strategy}")
+
+
+class MinHasher:
+    """MinHash signatures over word shingles, for estimating Jaccard similarity between articles."""
+    _PRIME = (1 << 61) - 1
+
+    def __init__(self, num_perm: int = 64, shingle_size: int = 5, seed: int = 1):
+        self.shingle_size = shingle_size
+        params = hashlib.sha256(str(seed).encode()).digest()
+        self.permutations = []
+        for i in range(num_perm):
+            digest = hashlib.sha256(params + i.to_bytes(4, "big")).digest()
+            a = int.from_bytes(digest[:8], "big") % self._PRIME or 1
+            b = int.from_bytes(digest[8:16], "big") % self._PRIME
+            self.permutations.append((a, b))
+
+    def shingles(self, text: str) -> set:
+        words = re.findall(r"\w+", text.lower())
+        if len(words) < self.shingle_size:
+            return {" ".join(words)} if words else set()
+        return {" ".join(words[i:i + self.shingle_size]) for i in range(len(words) - self.shingle_size + 1)}
+
+    def signature(self, text: str, shingles: Optional[set] = None) -> List[int]:
+        """MinHash signature of text, or of its precomputed shingles. Texts without shingles all share one signature."""
+        shingles = self.shingles(text) if shingles is None else shingles
+        hashes = [int.from_bytes(hashlib.blake2b(s.encode(), digest_size=8).digest(), "big") for s in shingles]
+        if not hashes:
+            return [self._PRIME] * len(self.permutations)
+        return [min((a * h + b) % self._PRIME for h in hashes) for a, b in self.permutations]
+
+    @staticmethod
+    def similarity(sig1: List[int], sig2: List[int]) -> float:
+        return sum(x == y for x, y in zip(sig1, sig2)) / len(sig1)
+
+
+class ArticlePreprocessor:
+    """
+    Prepare scraped articles for analysis.
+
+    Strips boilerplate, collapses near-duplicates (e.g. the same wire story syndicated by several
+    publishers) onto the first copy, and truncates what is left to a token budget.
+    """
+    def __init__(self, max_tokens: int = 1000, strategy: str = "head_tail", dedupe_threshold: float = 0.8, min_shingles: int = 5):
+        """
+        :param max_tokens: Token budget per article after boilerplate stripping (None = no truncation)
+        :param strategy: Truncation strategy, "head" or "head_tail"
+        :param dedupe_threshold: Estimated Jaccard similarity above which articles count as duplicates (None = off)
+        :param min_shingles: Articles with fewer distinct word shingles are never treated as duplicates
+        """
+        self.max_tokens = max_tokens
+        self.strategy = strategy
+        self.dedupe_threshold = dedupe_threshold
+        self.min_shingles = min_shingles
+        self.tokenizer = Tokenizer()
+        self.minhasher = MinHasher()
+
+    def run(self, articles: Dict[Tuple[str, str], str]) -> Tuple[Dict, Dict, Dict[str, int]]:
+        """
+        :param articles: Dictionary of (title, url) -> article text
+        :return: (prepared, duplicates, stats) where prepared maps the kept keys to their prepared
+                 text, duplicates maps each dropped key to the kept key it duplicates, and stats has
+                 tokens_before, tokens_after, tokens_saved and duplicates counts
+        """
+        prepared, duplicates, signatures = {}, {}, {}
+        tokens_before = tokens_after = 0
+        for key, text in articles.items():
+            tokens_before += self.tokenizer.count(text)
+            cleaned = strip_boilerplate(text)
+
+            shingles = self.minhasher.shingles(cleaned) if self.dedupe_threshold is not None else set()
+            # Empty, boilerplate-only and very short articles have too few shingles to compare
+            # reliably (all empty ones even share a signature), so they are always analyzed
+            if len(shingles) >= max(self.min_shingles, 1):
+                signature = self.minhasher.signature(cleaned, shingles)
+                match = next((kept for kept, kept_sig in signatures.items()
+                              if MinHasher.similarity(signature, kept_sig) >= self.dedupe_threshold), None)
+                if match is not None:
+                    duplicates[key] = match
+                    continue
+                signatures[key] = signature
+
+            if self.max_tokens is not None:
+                cleaned = truncate(cleaned, self.max_tokens, self.tokenizer, self.strategy)
+            prepared[key] = cleaned
+            tokens_after += self.tokenizer.count(cleaned)
+
+        stats = {
+            "tokens_before": tokens_before,
+            "tokens_after": tokens_after,
+            "tokens_saved": tokens_before - tokens_after,
+            "duplicates": len(duplicates),
+        }
+        return prepared, duplicates, stats
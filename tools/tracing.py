@@ -0,0 +1,241 @@
+"""
+Lightweight tracing of where an analysis run spends its time.
+
+Code wraps its steps in span("stock.info"), span("llm.call", model=...) and so on. Spans opened
+while a trace is active (begin_trace / start_trace) are collected into that trace with their start
+offset, duration, thread, parent span and attributes such as bytes and tokens. Every span, traced
+or not, also feeds per-name totals exported in the Prometheus text format.
+
+Work handed to thread pools keeps its trace when submitted through bind(fn).
+
+Exports:
+  - Trace.to_jsonl() / the TRACE_JSONL environment variable, appending each finished trace's spans
+  - prometheus_text() / serve_metrics(port), serving the totals at http://host:port/metrics
+"""
+import contextvars
+import functools
+import itertools
+import json
+import os
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional
+
+# Upper bounds (seconds) of the span duration histogram buckets
+DURATION_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+# Finished traces kept in memory for inspection
+MAX_TRACES = 20
+
+# (trace, span id) of the innermost open span, or (trace, None) at the top of a trace
+_current = contextvars.ContextVar("tracing_current", default=(None, None))
+_ids = itertools.count(1)
+
+
+class Trace:
+    """The spans recorded during one run."""
+    def __init__(self, name: str):
+        self.name = name
+        self.id = f"{int(time.time() * 1000):x}-{next(_ids)}"
+        self.started = time.time()
+        self._start = time.perf_counter()
+        self.duration: Optional[float] = None
+        self.spans: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+
+    def add(self, span: Dict[str, Any]) -> None:
+        with self._lock:
+            self.spans.append(span)
+
+    def offset(self, perf_counter: float) -> float:
+        return perf_counter - self._start
+
+    def to_jsonl(self) -> str:
+        """One JSON object per span, ordered by start time."""
+        with self._lock:
+            spans = sorted(self.spans, key=lambda span: span["start"])
+        return "".join(json.dumps({"trace_id": self.id, "trace": self.name, **span}, default=str) + "\n" for span in spans)
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """Span name -> count, total seconds, bytes and tokens."""
+        totals = defaultdict(lambda: {"count": 0, "seconds": 0.0, "bytes": 0, "tokens": 0})
+        with self._lock:
+            for span in self.spans:
+                entry = totals[span["name"]]
+                entry["count"] += 1
+                entry["seconds"] += span["duration"]
+                entry["bytes"] += span["attrs"].get("bytes", 0) or 0
+                entry["tokens"] += span["attrs"].get("tokens", 0) or 0
+        return dict(totals)
+
+
+class Tracer:
+    def __init__(self, jsonl_path: Optional[str] = None):
+        """
+        :param jsonl_path: File each finished trace's spans are appended to as JSON lines (None = off)
+        """
+        self.jsonl_path = jsonl_path
+        self.traces = deque(maxlen=MAX_TRACES)
+        self._metrics = defaultdict(lambda: {"count": 0, "errors": 0, "seconds": 0.0, "bytes": 0, "tokens": 0,
+                                             "buckets": [0] * len(DURATION_BUCKETS)})
+        self._lock = threading.Lock()
+
+    def begin_trace(self, name: str) -> Trace:
+        """Start a trace and make it the active one in this context, replacing any unfinished one."""
+        trace = Trace(name)
+        _current.set((trace, None))
+        return trace
+
+    def end_trace(self, trace: Trace) -> Trace:
+        """Finish trace, stop collecting into it and export it."""
+        trace.duration = trace.offset(time.perf_counter())
+        if _current.get()[0] is trace:
+            _current.set((None, None))
+        self.traces.append(trace)
+        if self.jsonl_path:
+            os.makedirs(os.path.dirname(os.path.abspath(self.jsonl_path)), exist_ok=True)
+            with self._lock, open(self.jsonl_path, "a") as f:
+                f.write(trace.to_jsonl())
+        return trace
+
+    @contextmanager
+    def start_trace(self, name: str):
+        trace = self.begin_trace(name)
+        try:
+            yield trace
+        finally:
+            self.end_trace(trace)
+
+    @contextmanager
+    def span(self, name: str, **attrs):
+        """
+        Time the enclosed block as a span called name.
+
+        Yields the span's attribute dict, so the block can add to it (e.g. attrs["bytes"] = len(html)).
+        Exceptions are recorded in attrs["error"] and re-raised.
+        """
+        trace, parent = _current.get()
+        span_id = next(_ids)
+        token = _current.set((trace, span_id))
+        start = time.perf_counter()
+        try:
+            yield attrs
+        except BaseException as e:
+            attrs["error"] = type(e).__name__
+            raise
+        finally:
+            _current.reset(token)
+            self._finish(trace, parent, span_id, name, start, attrs)
+
+    def record(self, name: str, start: float, **attrs) -> None:
+        """
+        Record a span that started at start (a time.perf_counter() value) and ends now.
+
+        For steps that cannot be wrapped in a with block, such as a generator consumed by the caller.
+        """
+        trace, parent = _current.get()
+        self._finish(trace, parent, next(_ids), name, start, attrs)
+
+    def _finish(self, trace, parent, span_id, name, start, attrs):
+        duration = time.perf_counter() - start
+        self._observe(name, duration, attrs)
+        if trace is not None:
+            trace.add({
+                "name": name,
+                "span_id": span_id,
+                "parent_id": parent,
+                "start": trace.offset(start),
+                "duration": duration,
+                "thread": threading.current_thread().name,
+                "attrs": attrs,
+            })
+
+    def traced(self, name: str):
+        """Decorator form of span for whole functions."""
+        def decorator(fn):
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                with self.span(name):
+                    return fn(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def _observe(self, name, duration, attrs):
+        with self._lock:
+            metric = self._metrics[name]
+            metric["count"] += 1
+            metric["errors"] += "error" in attrs
+            metric["seconds"] += duration
+            metric["bytes"] += attrs.get("bytes", 0) or 0
+            metric["tokens"] += attrs.get("tokens", 0) or 0
+            for i, bound in enumerate(DURATION_BUCKETS):
+                if duration <= bound:
+                    metric["buckets"][i] += 1
+
+    def prometheus_text(self) -> str:
+        """Span totals in the Prometheus text exposition format."""
+        with self._lock:
+            metrics = {name: dict(metric, buckets=list(metric["buckets"])) for name, metric in self._metrics.items()}
+        lines = [
+            "# HELP stock_analysis_span_seconds Time spent in traced spans.",
+            "# TYPE stock_analysis_span_seconds histogram",
+        ]
+        for name, metric in sorted(metrics.items()):
+            for bound, count in zip(DURATION_BUCKETS, metric["buckets"]):
+                lines.append(f'stock_analysis_span_seconds_bucket{{span="{name}",le="{bound}"}} {count}')
+            lines.append(f'stock_analysis_span_seconds_bucket{{span="{name}",le="+Inf"}} {metric["count"]}')
+            lines.append(f'stock_analysis_span_seconds_sum{{span="{name}"}} {metric["seconds"]:.6f}')
+            lines.append(f'stock_analysis_span_seconds_count{{span="{name}"}} {metric["count"]}')
+        for key, help_text in (("errors", "Spans that ended with an exception."),
+                               ("bytes", "Bytes downloaded in traced spans."),
+                               ("tokens", "LLM tokens used in traced spans.")):
+            lines.append(f"# HELP stock_analysis_span_{key}_total {help_text}")
+            lines.append(f"# TYPE stock_analysis_span_{key}_total counter")
+            for name, metric in sorted(metrics.items()):
+                lines.append(f'stock_analysis_span_{key}_total{{span="{name}"}} {metric[key]}')
+        return "\n".join(lines) + "\n"
+
+    def serve_metrics(self, port: int, host: str = "0.0.0.0"):
+        """Serve prometheus_text() at /metrics from a daemon thread; returns the server."""
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        tracer = self
+
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = tracer.prometheus_text().encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        server = ThreadingHTTPServer((host, port), MetricsHandler)
+        threading.Thread(target=server.serve_forever, daemon=True, name="metrics-server").start()
+        return server
+
+
+def bind(fn):
+    """Return fn bound to the current trace context, for running in another thread."""
+    context = contextvars.copy_context()
+    # A fresh copy per call, since one context cannot be entered by two threads at once
+    return lambda *args, **kwargs: context.copy().run(fn, *args, **kwargs)
+
+
+# Shared tracer used by the tools modules
+tracer = Tracer(jsonl_path=os.getenv("TRACE_JSONL"))
+span = tracer.span
+record = tracer.record
+traced = tracer.traced
+begin_trace = tracer.begin_trace
+end_trace = tracer.end_trace
+start_trace = tracer.start_trace
+prometheus_text = tracer.prometheus_text
+serve_metrics = tracer.serve_metrics
@@ -0,0 +1,133 @@
+import numpy as np
+
+# Decimals kept for prices and indicator values; more than the chart can show, far fewer than repr gives
+VALUE_DECIMALS = 4
+COLOR_BULL = 'rgba(38,166,154,0.9)'
+COLOR_BEAR = 'rgba(239,83,80,0.9)'
+# Points per series the dashboard sends for the max-period charts; about 16 years of daily bars
+CHART_MAX_POINTS = 4000
+
+
+def lttb_indices(values, threshold):
+    """
+    Pick threshold points of a series with Largest-Triangle-Three-Buckets downsampling.
+
+    The first and last points are always kept; in between, each bucket contributes the point
+    forming the largest triangle with the previously kept point and the next bucket's average,
+    which preserves peaks and troughs that plain striding would skip.
+
+    :param values: Series values at evenly spaced positions (NaN is treated as 0 when choosing)
+    :param threshold: Number of points to keep
+    :return: Sorted array of kept positions
+    """
+    n = len(values)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    y = np.nan_to_num(np.asarray(values, dtype=float))
+    x = np.arange(n, dtype=float)
+    # threshold - 2 buckets between the first and last point
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.int64)
+    counts = np.diff(edges)
+    # Bucket averages, used as the third corner of the previous bucket's triangles
+    avg_x = np.add.reduceat(x[:-1], edges[:-1]) / counts
+    avg_y = np.add.reduceat(y[:-1], edges[:-1]) / counts
+
+    selected = np.empty(threshold, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    a = 0
+    for i in range(threshold - 2):
+        start, end = edges[i], edges[i + 1]
+        if i + 1 < len(counts):
+            next_x, next_y = avg_x[i + 1], avg_y[i + 1]
+        else:
+            next_x, next_y = x[-1], y[-1]
+        area = np.abs((x[a] - next_x) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (next_y - y[a]))
+        a = start + int(area.argmax())
+        selected[i + 1] = a
+    return selected
+
+
+def _dates(index):
+    """YYYY-MM-DD strings for a DatetimeIndex, in the exchange's local calendar."""
+    if index.tz is not None:
+        index = index.tz_localize(None)
+    return np.datetime_as_string(index.values.astype("datetime64[D]"))
+
+
+def _points(times, values):
+    """[{"time", "value"}] for a line or histogram series; NaN becomes a whitespace point {"time"}."""
+    return [{"time": t, "value": v} if v == v else {"time": t} for t, v in zip(times, values.tolist())]
+
+
+def build_chart_payload(stock_history, indicators, max_points=None):
+    """
+    Build the series data of the lightweight-charts panes straight from the history's arrays.
+
+    Every column is rounded and converted with one NumPy pass, and each series is built once,
+    so there is no per-row strftime and no to_json/json.loads round trip.
+
+    When the history has more than max_points bars it is downsampled to that many: candles and
+    volume are aggregated over evenly sized buckets of bars (first open, highest high, lowest low,
+    last close, summed volume), and the close area and MACD lines keep the points chosen by
+    lttb_indices, so spikes survive.
+
+    :param stock_history: History DataFrame indexed by Date with Open, High, Low, Close, Volume
+    :param indicators: build_indicator_frame(stock_history), for MACD, Signal and Histogram
+    :param max_points: Most points per series, no downsampling if None
+    :return: Dictionary with candles, volume, close, macd, signal and histogram point lists
+    """
+    times = _dates(stock_history.index)
+    columns = {
+        name.lower(): np.round(stock_history[name].to_numpy(dtype=float), VALUE_DECIMALS)
+        for name in ("Open", "High", "Low", "Close")
+    }
+    volume = stock_history["Volume"].to_numpy(dtype=float)
+    macd = {
+        name.lower(): np.round(indicators[name].to_numpy(dtype=float), VALUE_DECIMALS)
+        for name in ("MACD", "Signal", "Histogram")
+    }
+    n = len(times)
+
+    close_times, close = times, columns["close"]
+    macd_times = times
+    if max_points and n > max_points:
+        # Candles and volume: aggregate evenly sized buckets of consecutive bars
+        starts = np.unique(np.linspace(0, n, max_points, endpoint=False).astype(np.int64))
+        ends = np.append(starts[1:], n) - 1
+        columns = {
+            "open": columns["open"][starts],
+            "high": np.maximum.reduceat(columns["high"], starts),
+            "low": np.minimum.reduceat(columns["low"], starts),
+            "close": columns["close"][ends],
+        }
+        volume = np.add.reduceat(volume, starts)
+        candle_times = times[starts]
+
+        # Lines: keep the visually significant points
+        kept = lttb_indices(close, max_points)
+        close_times, close = times[kept], close[kept]
+        kept = lttb_indices(macd["macd"], max_points)
+        macd_times = times[kept]
+        macd = {name: series[kept] for name, series in macd.items()}
+    else:
+        candle_times = times
+
+    candle_times = candle_times.tolist()
+    colors = np.where(columns["open"] > columns["close"], COLOR_BEAR, COLOR_BULL).tolist()
+    candles = [
+        {"time": t, "open": o, "high": h, "low": l, "close": c, "color": color}
+        for t, o, h, l, c, color in zip(
+            candle_times, columns["open"].tolist(), columns["high"].tolist(),
+            columns["low"].tolist(), columns["close"].tolist(), colors,
+        )
+    ]
+    macd_times = macd_times.tolist()
+    return {
+        "candles": candles,
+        "volume": _points(candle_times, np.nan_to_num(volume).astype(np.int64)),
+        "close": _points(close_times.tolist(), close),
+        "macd": _points(macd_times, macd["macd"]),
+        "signal": _points(macd_times, macd["signal"]),
+        "histogram": _points(macd_times, macd["histogram"]),
+    }
@@ -1,42 +1,31 @@
-import streamlit as st
-from streamlit_lightweight_charts import renderLightweightCharts
 import pandas as pd
 import numpy as np
-import json
-import requests
 
-def display_stock_charts(stock_history):
-    # Prepare data
-    df = stock_history.reset_index()
-    df['time'] = df['Date'].dt.strftime('%Y-%m-%d')
-    df = df.rename(columns={
-        'Open': 'open',
-        'High': 'high',
-        'Low': 'low',
-        'Close': 'close',
-        'Volume': 'volume'
-    })
-    
-    COLOR_BULL = 'rgba(38,166,154,0.9)'
-    COLOR_BEAR = 'rgba(239,83,80,0.9)'
-    df['color'] = np.where(df['open'] > df['close'], COLOR_BEAR, COLOR_BULL)
-    
-    # Calculate MACD
-    exp1 = df['close'].ewm(span=12, adjust=False).mean()
-    exp2 = df['close'].ewm(span=26, adjust=False).mean()
-    macd = exp1 - exp2
-    signal = macd.ewm(span=9, adjust=False).mean()
-    hist = macd - signal
-    df['MACD'] = macd
-    df['Signal'] = signal
-    df['Histogram'] = hist
+# The chart component and requests are imported inside the functions that need them,
+# so pure helpers like calculate_bollinger_bands can be used without pulling in streamlit
+
+def display_stock_charts(stock_history, indicators=None, max_points=None):
+    """
+    Render the lightweight-charts panes for a price history.
+
+    :param stock_history: History DataFrame indexed by Date
+    :param indicators: build_indicator_frame(stock_history) to reuse, computed here if omitted
+    :param max_points: Downsample each series to at most this many points (see build_chart_payload)
+    """
+    from streamlit_lightweight_charts import renderLightweightCharts
+    from .chart_payload import COLOR_BEAR, COLOR_BULL, build_chart_payload
+
+    if indicators is None:
+        from tools.indicators import build_indicator_frame
+        indicators = build_indicator_frame(stock_history)
 
-    # Prepare JSON data
-    candles = json.loads(df[['time', 'open', 'high', 'low', 'close', 'color']].to_json(orient="records"))
-    volume = json.loads(df[['time', 'volume']].rename(columns={"volume": "value"}).to_json(orient="records"))
-    macd = json.loads(df[['time', 'MACD']].rename(columns={"MACD": "value"}).to_json(orient="records"))
-    signal = json.loads(df[['time', 'Signal']].rename(columns={"Signal": "value"}).to_json(orient="records"))
-    histogram = json.loads(df[['time', 'Histogram']].rename(columns={"Histogram": "value"}).to_json(orient="records"))
+    # Each series is built once, straight from the history's arrays
+    payload = build_chart_payload(stock_history, indicators, max_points=max_points)
+    candles = payload["candles"]
+    volume = payload["volume"]
+    macd = payload["macd"]
+    signal = payload["signal"]
+    histogram = payload["histogram"]
 
     # Line chart with volume options
     line_volume_options = {
@@ -69,7 +58,7 @@ def display_stock_charts(stock_history):
     line_volume_series = [
         {
             "type": 'Area',
-            "data": json.loads(df[['time', 'close']].rename(columns={"close": "value"}).to_json(orient="records")),
+            "data": payload["close"],
             "options": {
                 "topColor": 'rgba(33, 150, 243, 0.56)',
                 "bottomColor": 'rgba(33, 150, 243, 0.04)',
@@ -227,19 +216,16 @@ def get_sentiment_color(score):
     
 
 def chat(prompt):
-    
-    response = requests.post(
-        "http://localhost:11434/api/generate",
-        json={
-            "model": "llama3.1",
-            "prompt": prompt,
-            "stream": False
-        }
-    )
-    
-    if response.status_code == 200:
-        return response.json()['response']
-    else:
+    # Goes through the shared Ollama backend so calls reuse its pooled connections
+    from tools.llm import get_client
+
+    try:
+        response = get_client("ollama").chat.completions.create(
+            messages=[{"role": "user", "content": prompt}],
+            model="llama3.1",
+        )
+        return response.choices[0].message.content
+    except Exception:
         return "Error: Unable to generate analysis"
     
 def calculate_bollinger_bands(data, window=20, num_std=2):